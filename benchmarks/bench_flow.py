@@ -0,0 +1,72 @@
+"""
+Wall-clock comparison of the sequential and concurrent flow.
+
+Generates a synthetic ET 3.1 workbook (see benchmarks/synthetic.py), preprocesses its sheets,
+then times the stages after preprocessing, as mapped over the sheets by main.process_sheets,
+with one worker (every stage in turn, as the flow used to run) and with `--workers`. The stage
+cache is disabled so every stage runs, and outputs are removed between runs.
+
+Usage:
+    python -m benchmarks.bench_flow [--sheets Quarter Annual "Main Table"] [--workers 4]
+                                    [--warehouse] [--repeat 3] [--scale 1]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from benchmarks.synthetic import SHEETS, write_et_workbook
+from energytrend_etl.main import process_sheets
+from energytrend_etl.stage_cache import StageCache
+from energytrend_etl.preprocess_data import process_workbook
+
+
+def bench(sheets: dict[str, int], workers: list[int], warehouse: bool, repeat: int, scale: int) -> list[dict]:
+    """Times the sheet stages with each number of workers, keeping the best of `repeat` runs."""
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Stages read and write relative to the working directory, like the pipeline
+        os.chdir(work_dir)
+        try:
+            os.makedirs('./data')
+            write_et_workbook('./data/ET_3.1_JUL_24.xlsx', scale=scale)
+            frames = process_workbook.fn('ET_3.1_JUL_24.xlsx', sheets)
+            cache = StageCache(enabled=False)
+
+            for max_workers in workers:
+                seconds = []
+                for _ in range(repeat):
+                    for directory in ('./output', './report'):
+                        shutil.rmtree(directory, ignore_errors=True)
+                    start = time.perf_counter()
+                    if not process_sheets(cache, 'ET_3.1_JUL_24.xlsx', frames, sheets, './output', 'wide', ['csv'],
+                                          './output/energytrend.sqlite' if warehouse else None,
+                                          max_workers=max_workers):
+                        raise RuntimeError('A stage failed; see ./logs/main.log')
+                    seconds.append(time.perf_counter() - start)
+                results.append({'workers': max_workers, 'sheets': len(sheets), 'wall_s': min(seconds)})
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the wall time of the sequential and concurrent flow.')
+    parser.add_argument('--sheets', nargs='+', choices=list(SHEETS), default=list(SHEETS), help='Sheets to process.')
+    parser.add_argument('--workers', type=int, default=4, help='Workers of the concurrent flow.')
+    parser.add_argument('--warehouse', action='store_true', help='Also store every sheet in a SQLite warehouse.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per flow.')
+    parser.add_argument('--scale', type=int, default=1, help='Blocks of ET 3.1 categories per sheet.')
+    args = parser.parse_args()
+
+    sheets = {name: SHEETS[name] for name in args.sheets}
+    results = bench(sheets, [1, args.workers], args.warehouse, args.repeat, args.scale)
+    print(f"{'workers':>8} {'sheets':>7} {'wall_s':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['sheets']:>7} {result['wall_s']:>8.2f}")
+    print(f"Speed-up: {results[0]['wall_s'] / results[1]['wall_s']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Cost of handing a processed sheet to another stage or process: pickling versus Arrow IPC.
+
+Generates synthetic ET 3.1 workbooks (see benchmarks/synthetic.py) at each `--sizes` entry of
+SCALExYEARS, preprocesses their Quarter sheet, and times serializing and deserializing the
+processed sheet with pickle (as Prefect results and process pools do by default) and as an
+Arrow IPC file in shared memory that the reader memory-maps (arrow_handoff.write_frame and
+read_frame). It also times a round trip through a spawned worker process, passing the sheet
+itself or a SharedFrame handle, and reports the bytes each format produces. Sheets are handed
+over as Arrow whatever their size, to find the size from which sharing pays (MIN_ARROW_CELLS).
+
+Usage:
+    python -m benchmarks.bench_handoff [--sizes 1x25 10x100 53x250] [--repeat 5]
+"""
+import os
+import time
+import pickle
+import argparse
+import tempfile
+import multiprocessing
+import pandas as pd
+from typing import Any, Callable
+from concurrent.futures import ProcessPoolExecutor
+from benchmarks.synthetic import write_et_workbook
+from energytrend_etl.preprocess_data import process_workbook
+from energytrend_etl.arrow_handoff import SHARED_MEMORY_DIR, read_frame, receive_frame, share_frame, write_frame
+
+
+def best(run: Callable[[], Any], repeat: int) -> tuple[Any, float]:
+    """Runs `run` `repeat` times, returning its last result and its best time in milliseconds."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        seconds.append(time.perf_counter() - start)
+    return result, min(seconds) * 1000
+
+
+def _echo(df: pd.DataFrame) -> pd.DataFrame:
+    """A worker stage that receives a sheet and returns it."""
+    return df
+
+
+def _echo_shared(df: Any) -> Any:
+    """A worker stage that receives a sheet and returns it through shared memory."""
+    return share_frame(receive_frame(df), min_cells=0)
+
+
+def bench(sizes: list[tuple[int, int]], repeat: int) -> list[dict]:
+    """Measures each handoff of the processed Quarter sheet at each size."""
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir, \
+            ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        # Start the worker outside the measurements
+        pool.submit(_echo, pd.DataFrame()).result()
+        # Stages read and write relative to the working directory, like the pipeline
+        os.chdir(work_dir)
+        try:
+            os.makedirs('./data')
+            for scale, years in sizes:
+                filename = f"ET_3.1_{scale}x{years}.xlsx"
+                write_et_workbook(f"./data/{filename}", scale=scale, years=years)
+                df = process_workbook.fn(filename, {'Quarter': 4}, max_workers=1)['Quarter']
+                size = f"{df.shape[0]}x{df.shape[1]}"
+                path = os.path.join(SHARED_MEMORY_DIR, f"bench_handoff-{os.getpid()}.arrow")
+
+                data, dump_ms = best(lambda: pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), repeat)
+                _, load_ms = best(lambda: pickle.loads(data), repeat)
+                _, process_ms = best(lambda: pool.submit(_echo, df).result(), repeat)
+                results.append({'size': size, 'format': 'pickle', 'write_ms': dump_ms, 'read_ms': load_ms,
+                                'process_ms': process_ms, 'mb': len(data) / 2 ** 20})
+
+                try:
+                    _, write_ms = best(lambda: write_frame(df, path), repeat)
+                    _, read_ms = best(lambda: read_frame(path), repeat)
+                    arrow_mb = os.path.getsize(path) / 2 ** 20
+                finally:
+                    os.remove(path)
+                _, process_ms = best(lambda: receive_frame(pool.submit(_echo_shared, share_frame(df, min_cells=0)).result()), repeat)
+                results.append({'size': size, 'format': 'arrow', 'write_ms': write_ms, 'read_ms': read_ms,
+                                'process_ms': process_ms, 'mb': arrow_mb})
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare pickling and Arrow IPC handoffs of a processed sheet.')
+    parser.add_argument('--sizes', nargs='+', default=['1x25', '10x100', '53x250'],
+                        help='Workbook sizes as SCALExYEARS (see benchmarks/synthetic.py).')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per measurement.')
+    args = parser.parse_args()
+
+    sizes = [tuple(int(part) for part in size.split('x')) for size in args.sizes]
+    print(f"{'size':>10} {'format':>7} {'write_ms':>9} {'read_ms':>8} {'process_ms':>11} {'mb':>7}")
+    for result in bench(sizes, args.repeat):
+        print(f"{result['size']:>10} {result['format']:>7} {result['write_ms']:>9.2f} {result['read_ms']:>8.2f} "
+              f"{result['process_ms']:>11.2f} {result['mb']:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Throughput, latency and retries of the ingest stage against a simulated statistics site.
+
+Writes a catalogue of synthetic releases and a page linking to them (see benchmarks/synthetic.py),
+serves them through benchmarks/stand_in.simulate_site with the latency, bandwidth cap, error
+bursts, truncated bodies and validators given, and runs ingest_catalogue with each number of
+`--workers`. Every setting is run cold, into an empty data directory, then warm, when every
+request is conditional. For each run it reports the files ingested and failed, throughput, the
+p50 and p99 latency of ingesting one file (including its retries), the requests the site
+answered, how many of them were retries and how many bodies were cut off.
+
+The retry backoff of fetch_html and download_file (4 to 10 seconds) is scaled by
+`--backoff-scale`, so runs with faults finish in seconds; use 1 for the real waits.
+
+Usage:
+    python -m benchmarks.bench_ingest [--files 20] [--scale 1] [--workers 1 4 8] [--per-host 4]
+                                      [--latency 0.05] [--jitter 0.02] [--bandwidth-mbps 10]
+                                      [--error-rate 0.05] [--burst 3] [--truncate-rate 0.02]
+                                      [--validators both] [--backoff-scale 0.01] [--seed 0]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+from typing import Iterator
+from tenacity import wait_exponential
+from benchmarks.synthetic import write_et_catalogue
+from benchmarks.stand_in import SiteProfile, SiteStats, simulate_site
+from energytrend_etl.ingest_data import download_file, fetch_html, page_index_cache
+from energytrend_etl.ingest_catalogue import CatalogueTarget, DownloadResult, ingest_catalogue
+
+
+@contextlib.contextmanager
+def scaled_backoff(scale: float) -> Iterator[None]:
+    """Scales the exponential backoff between retries of fetch_html and download_file for the block."""
+    retrying = [fetch_html.retry, download_file.retry]
+    waits = [policy.wait for policy in retrying]
+    try:
+        for policy, wait in zip(retrying, waits):
+            policy.wait = wait_exponential(multiplier=wait.multiplier * scale, min=wait.min * scale,
+                                           max=wait.max * scale, exp_base=wait.exp_base)
+        yield
+    finally:
+        for policy, wait in zip(retrying, waits):
+            policy.wait = wait
+
+
+def summarize(results: list[DownloadResult], stats: SiteStats, seconds: float) -> dict:
+    """Summarizes one ingest run from its results and the requests the site answered."""
+    ok = [result for result in results if result.status in ('downloaded', 'up_to_date')]
+    latencies = [result.seconds for result in results if result.filename]
+    pages = len({result.target.url for result in results})
+    files = len({result.filename for result in results if result.filename})
+    return {
+        'ok': len(ok),
+        'failed': len(results) - len(ok),
+        'mb_s': sum(result.bytes for result in results) / 2 ** 20 / seconds,
+        'files_s': files / seconds,
+        'p50_s': float(np.percentile(latencies, 50)) if latencies else 0.0,
+        'p99_s': float(np.percentile(latencies, 99)) if latencies else 0.0,
+        'requests': stats.requests,
+        # Every request beyond one per page and one per file; a page missing from the link index
+        # cache after a 304 costs one more, which the cache makes rare
+        'retries': max(0, stats.requests - pages - files),
+        'truncated': stats.truncated,
+        'statuses': dict(sorted(stats.statuses.items())),
+    }
+
+
+def bench(
+        files: int,
+        scale: int,
+        workers: list[int],
+        per_host_limit: int,
+        profile: SiteProfile,
+        backoff_scale: float
+) -> list[dict]:
+    """Runs ingest_catalogue cold and warm with each number of workers against one simulated site."""
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir, scaled_backoff(backoff_scale):
+        site_dir = os.path.join(work_dir, 'site')
+        data_dir = os.path.join(work_dir, 'data')
+        link_texts = write_et_catalogue(site_dir, files, scale)
+
+        with simulate_site(site_dir, profile) as (base_url, stats):
+            targets = [CatalogueTarget(f"{base_url}/index.html", text) for text in link_texts]
+            for max_workers in workers:
+                shutil.rmtree(data_dir, ignore_errors=True)
+                page_index_cache.clear()
+                for run in ('cold', 'warm'):
+                    stats.reset()
+                    start = time.perf_counter()
+                    outcome = ingest_catalogue.fn(targets, data_dir=data_dir, max_workers=max_workers,
+                                                  per_host_limit=per_host_limit)
+                    summary = summarize(outcome, stats, time.perf_counter() - start)
+                    results.append({'workers': max_workers, 'run': run, **summary})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the ingest stage against a simulated statistics site.')
+    parser.add_argument('--files', type=int, default=20, help='Releases in the catalogue.')
+    parser.add_argument('--scale', type=int, default=1, help='Blocks of ET 3.1 categories per sheet.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='Worker threads to compare.')
+    parser.add_argument('--per-host', type=int, default=4, help='Concurrent requests per host.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds before each response.')
+    parser.add_argument('--jitter', type=float, default=0.02, help='Uniform extra latency, in seconds.')
+    parser.add_argument('--bandwidth-mbps', type=float, default=10.0, help='Cap on each response, in MB/s (0 for none).')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='Probability that a request starts an error burst.')
+    parser.add_argument('--burst', type=int, default=3, help='Requests answered 429 or 503 in each burst.')
+    parser.add_argument('--truncate-rate', type=float, default=0.02, help='Probability that a body is cut off halfway.')
+    parser.add_argument('--validators', choices=['both', 'etag', 'last_modified', 'none'], default='both',
+                        help='Validators the site sends with each file.')
+    parser.add_argument('--backoff-scale', type=float, default=0.01, help='Scale of the retry backoff (1 for real waits).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the simulated faults.')
+    args = parser.parse_args()
+
+    profile = SiteProfile(latency_s=args.latency, jitter_s=args.jitter,
+                          bandwidth_bps=args.bandwidth_mbps * 2 ** 20 or None, error_rate=args.error_rate,
+                          burst_length=args.burst, truncate_rate=args.truncate_rate,
+                          validators=args.validators, seed=args.seed)
+    results = bench(args.files, args.scale, args.workers, args.per_host, profile, args.backoff_scale)
+    print(f"{'workers':>7} {'run':>4} {'ok':>4} {'failed':>6} {'mb_s':>7} {'files_s':>7} {'p50_s':>6} "
+          f"{'p99_s':>6} {'requests':>8} {'retries':>7} {'truncated':>9}  statuses")
+    for result in results:
+        statuses = ' '.join(f"{status}:{count}" for status, count in result['statuses'].items())
+        print(f"{result['workers']:>7} {result['run']:>4} {result['ok']:>4} {result['failed']:>6} "
+              f"{result['mb_s']:>7.2f} {result['files_s']:>7.2f} {result['p50_s']:>6.3f} {result['p99_s']:>6.3f} "
+              f"{result['requests']:>8} {result['retries']:>7} {result['truncated']:>9}  {statuses}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Peak memory of the in-memory stages for one workbook.
+
+Generates a synthetic ET 3.1 workbook (see benchmarks/synthetic.py) and runs the stages that
+hold the data in memory on every sheet: preprocessing, validation against the workbook, the
+consistency report and the reshape to long format. It also converts the processed sheets to
+EnergyTables in float64 and float32. For each stage it reports the peak of Python allocations
+traced by tracemalloc above what was allocated before the stage, and the memory held by its
+result.
+
+Usage:
+    python -m benchmarks.bench_memory [--scale 53] [--years 250]
+"""
+import os
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Any, Callable
+from benchmarks.synthetic import SHEETS, write_et_workbook
+from energytrend_etl.validation import validate_data
+from energytrend_etl.energy_table import EnergyTable
+from energytrend_etl.consistency_rules import evaluate_rules
+from energytrend_etl.preprocess_data import process_workbook, reshape_to_long
+
+
+def traced(stage: Callable[[], Any]) -> tuple[Any, float]:
+    """Runs a stage, returning its result and its peak traced allocations in MB above the baseline."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = stage()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, (peak - baseline) / 2 ** 20
+
+
+def frame_mb(frames: dict[str, pd.DataFrame]) -> float:
+    """The memory held by DataFrames, counting the Python objects in object columns."""
+    return sum(df.memory_usage(deep=True).sum() for df in frames.values()) / 2 ** 20
+
+
+def bench(scale: int, years: int) -> list[dict]:
+    """Measures each stage over every sheet of one synthetic workbook."""
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Stages read and write relative to the working directory, like the pipeline
+        os.chdir(work_dir)
+        try:
+            os.makedirs('./data')
+            write_et_workbook('./data/ET_3.1_JUL_24.xlsx', scale=scale, years=years)
+            # Parse once outside the measurement, so preprocessing reads the parsed-sheet caches
+            process_workbook.fn('ET_3.1_JUL_24.xlsx', SHEETS, max_workers=1)
+
+            frames, peak = traced(lambda: process_workbook.fn('ET_3.1_JUL_24.xlsx', SHEETS, max_workers=1))
+            results.append({'stage': 'preprocess', 'peak_mb': peak, 'result_mb': frame_mb(frames)})
+
+            previous, peak = traced(lambda: {name: validate_data.fn('ET_3.1_JUL_24.xlsx', frames[name], name, header,
+                                                                    './snapshots', './report')
+                                             for name, header in SHEETS.items()})
+            results.append({'stage': 'validate', 'peak_mb': peak, 'result_mb': frame_mb(previous)})
+
+            for dtype in (np.float64, np.float32):
+                tables, peak = traced(lambda: {name: EnergyTable.from_frame(df, dtype=dtype) for name, df in frames.items()})
+                results.append({'stage': f"energy_table ({np.dtype(dtype).name})", 'peak_mb': peak,
+                                'result_mb': sum(table.nbytes for table in tables.values()) / 2 ** 20})
+
+            reports, peak = traced(lambda: {name: evaluate_rules(frames[name], previous[name]) for name in SHEETS})
+            results.append({'stage': 'consistency_rules', 'peak_mb': peak, 'result_mb': frame_mb(reports)})
+
+            long_frames, peak = traced(lambda: {name: reshape_to_long.fn(frames[name]) for name in SHEETS})
+            results.append({'stage': 'reshape_to_long', 'peak_mb': peak, 'result_mb': frame_mb(long_frames)})
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the peak memory of the in-memory stages for one workbook.')
+    parser.add_argument('--scale', type=int, default=53, help='Blocks of ET 3.1 categories per sheet.')
+    parser.add_argument('--years', type=int, default=250, help='Years of quarterly data.')
+    args = parser.parse_args()
+
+    print(f"{'stage':<24} {'peak_mb':>8} {'result_mb':>10}")
+    for result in bench(args.scale, args.years):
+        print(f"{result['stage']:<24} {result['peak_mb']:>8.1f} {result['result_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Parse-time and peak-memory benchmark for the Excel reader engines.
+
+Reads every data sheet of the shipped ET 3.1 workbook, and of synthetic ET-shaped workbooks
+scaled up in rows, with each installed engine. Each measurement runs in a fresh process, so
+peak resident memory is attributable to one engine and one workbook.
+
+Usage:
+    python -m benchmarks.bench_readers [--scales 10 100] [--repeat 3]
+"""
+import os
+import time
+import resource
+import argparse
+import tempfile
+import multiprocessing
+import pandas as pd
+from benchmarks.synthetic import SHEETS, write_et_workbook
+from energytrend_etl.excel_readers import available_engines, open_workbook, read_sheet
+
+
+SHIPPED_WORKBOOK = './data/ET_3.1_JUL_24.xlsx'
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def read_all_sheets(file_path: str, engine: str) -> int:
+    """Parses every data sheet of a workbook from one open workbook, returning the number of cells read."""
+    with open_workbook(file_path, engine) as workbook:
+        return sum(read_sheet(workbook, sheet_name, header).size for sheet_name, header in SHEETS.items())
+
+
+def _measure(file_path: str, engine: str, repeat: int) -> dict:
+    """Runs in a fresh process: times `repeat` parses and records the peak memory above the baseline."""
+    baseline = _peak_rss_bytes()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cells = read_all_sheets(file_path, engine)
+        seconds.append(time.perf_counter() - start)
+    return {'cells': cells, 'parse_ms': min(seconds) * 1000, 'peak_mb': (_peak_rss_bytes() - baseline) / 2 ** 20}
+
+
+def bench(file_path: str, repeat: int) -> list[dict]:
+    """Benchmarks every installed engine on one workbook."""
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for engine in available_engines():
+        with context.Pool(1) as pool:
+            result = pool.apply(_measure, (file_path, engine, repeat))
+        results.append({'engine': engine, 'bytes': os.path.getsize(file_path), **result})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare Excel reader engines by parse time and peak memory.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100], help='Row multipliers of the synthetic workbooks.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed parses per engine.')
+    args = parser.parse_args()
+
+    rows = []
+    if os.path.exists(SHIPPED_WORKBOOK):
+        rows += [{'workbook': 'shipped', **result} for result in bench(SHIPPED_WORKBOOK, args.repeat)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            path = write_et_workbook(os.path.join(tmp_dir, f"synthetic_x{scale}.xlsx"), scale=scale)
+            rows += [{'workbook': f"synthetic x{scale}", **result} for result in bench(path, args.repeat)]
+
+    report = pd.DataFrame(rows)
+    fastest = report.groupby('workbook')['parse_ms'].transform('min')
+    report['parse_vs_fastest'] = report['parse_ms'] / fastest
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 120):
+        print(report.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Read-back benchmark for the output writers.
+
+Writes the processed ET 3.1 'Quarter' sheet (and copies scaled up by tiling rows) in every
+output format and compares on-disk size and the time to load each file back.
+
+Usage:
+    python -m benchmarks.bench_writers [--scales 1 10 100] [--layout wide|long] [--repeat 5]
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from energytrend_etl.writers import WRITERS, read_output
+from energytrend_etl.preprocess_data import process_excel_data, reshape_to_long
+
+
+def disk_size(path: str) -> int:
+    """Returns the size of a file, or the total size of the files under a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def scale_frame(df: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """Tiles the rows of a wide frame `scale` times with unique category labels."""
+    if scale == 1:
+        return df
+    scaled = pd.concat([df] * scale)
+    scaled.index = [f"{label} #{i // len(df)}" for i, label in enumerate(scaled.index)]
+    return scaled
+
+
+def bench(df: pd.DataFrame, repeat: int) -> list[dict]:
+    """Writes `df` in every format and times reading it back, keeping the best of `repeat` reads."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, writer in WRITERS.items():
+            start = time.perf_counter()
+            path = writer(df, os.path.join(tmp_dir, 'bench'))
+            write_seconds = time.perf_counter() - start
+
+            read_seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                read_output(path)
+                read_seconds.append(time.perf_counter() - start)
+
+            results.append({
+                'format': name,
+                'rows': len(df),
+                'bytes': disk_size(path),
+                'write_ms': write_seconds * 1000,
+                'read_ms': min(read_seconds) * 1000,
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare output formats by size and read-back time.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='Row multipliers to benchmark.')
+    parser.add_argument('--layout', choices=['wide', 'long'], default='wide', help='Layout of the benchmarked table.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed reads per format.')
+    args = parser.parse_args()
+
+    base_df = process_excel_data.fn('ET_3.1_JUL_24.xlsx', 'Quarter', 4)
+    rows = []
+    for scale in args.scales:
+        df = scale_frame(base_df, scale)
+        if args.layout == 'long':
+            df = reshape_to_long.fn(df)
+        for result in bench(df, args.repeat):
+            rows.append({'scale': scale, **result})
+
+    report = pd.DataFrame(rows)
+    csv = report[report['format'] == 'csv'].set_index('scale')
+    report['size_vs_csv'] = report['bytes'] / report['scale'].map(csv['bytes'])
+    report['read_vs_csv'] = report['read_ms'] / report['scale'].map(csv['read_ms'])
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 120):
+        print(report.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
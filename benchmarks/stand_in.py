@@ -0,0 +1,278 @@
+"""
+A local HTTP stand-in for the statistics site, serving a directory of workbooks and pages.
+
+`serve_directory` serves the files as they are. `simulate_site` serves them like a busy remote
+site: with latency, a bandwidth cap, bursts of 429/503 responses, bodies cut off part-way and
+configurable ETag/Last-Modified validators, recording every request it answers.
+"""
+import os
+import time
+import random
+import functools
+import threading
+import contextlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator
+from urllib.parse import unquote, urlparse
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Size of the blocks written to the socket, and the granularity of the bandwidth cap
+CHUNK_SIZE = 16 * 1024  # 16 KB
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Serves files with Last-Modified headers, without logging every request to stderr."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def _serve(server: ThreadingHTTPServer) -> Iterator[str]:
+    """Runs a server on a background thread for the duration of the block, yielding its base URL."""
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def serve_directory(directory: str) -> Iterator[str]:
+    """
+    Serves a directory on an ephemeral local port for the duration of the block.
+
+    Args:
+        directory (str): The directory to serve.
+
+    Yields:
+        str: The base URL of the server, e.g. 'http://127.0.0.1:54321'.
+    """
+    handler = functools.partial(QuietHandler, directory=directory)
+    with _serve(ThreadingHTTPServer(('127.0.0.1', 0), handler)) as base_url:
+        yield base_url
+
+
+@dataclass(frozen=True)
+class SiteProfile:
+    """How the simulated site answers requests. The defaults answer like serve_directory."""
+    latency_s: float = 0.0                  # before the response headers
+    jitter_s: float = 0.0                   # uniform extra latency, up to this many seconds
+    bandwidth_bps: float | None = None      # cap on each response body, in bytes per second
+    error_rate: float = 0.0                 # probability that a request starts a burst of errors
+    error_statuses: tuple[int, ...] = (429, 503)
+    burst_length: int = 1                   # consecutive requests, to any path, answered with the error
+    truncate_rate: float = 0.0              # probability that a body is cut off halfway
+    validators: str = 'both'                # 'both', 'etag', 'last_modified' or 'none'
+    conditional: bool = True                # honour If-None-Match, If-Modified-Since and If-Range
+    seed: int = 0
+
+
+@dataclass
+class SiteStats:
+    """The requests answered by the simulated site."""
+    statuses: Counter = field(default_factory=Counter)
+    paths: Counter = field(default_factory=Counter)
+    latencies: list[float] = field(default_factory=list)   # seconds from request to the end of the body
+    bytes_sent: int = 0
+    truncated: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def requests(self) -> int:
+        """The number of requests answered."""
+        return sum(self.statuses.values())
+
+    def record(self, path: str, status: int, seconds: float, sent: int, truncated: bool) -> None:
+        with self.lock:
+            self.statuses[status] += 1
+            self.paths[path] += 1
+            self.latencies.append(seconds)
+            self.bytes_sent += sent
+            self.truncated += truncated
+
+    def reset(self) -> None:
+        """Forgets the requests answered so far, e.g. between runs of a benchmark."""
+        with self.lock:
+            self.statuses.clear()
+            self.paths.clear()
+            self.latencies.clear()
+            self.bytes_sent = 0
+            self.truncated = 0
+
+
+class SimulatedSiteServer(ThreadingHTTPServer):
+    """Serves a directory through SimulatedSiteHandler, holding the profile, faults and statistics."""
+    daemon_threads = True
+
+    def __init__(self, directory: str, profile: SiteProfile):
+        super().__init__(('127.0.0.1', 0), SimulatedSiteHandler)
+        self.directory = directory
+        self.profile = profile
+        self.stats = SiteStats()
+        self.random = random.Random(profile.seed)
+        self.burst_left = 0
+        self.burst_status = 0
+        self.fault_lock = threading.Lock()
+
+    def draw_faults(self) -> tuple[int | None, float, bool]:
+        """Draws the error status (or None), latency and truncation of the next request."""
+        profile = self.profile
+        with self.fault_lock:
+            if not self.burst_left and self.random.random() < profile.error_rate:
+                self.burst_left = profile.burst_length
+                self.burst_status = self.random.choice(profile.error_statuses)
+            status = None
+            if self.burst_left:
+                self.burst_left -= 1
+                status = self.burst_status
+            latency = profile.latency_s + self.random.uniform(0, profile.jitter_s)
+            truncate = self.random.random() < profile.truncate_rate
+        return status, latency, truncate
+
+
+class SimulatedSiteHandler(BaseHTTPRequestHandler):
+    """Answers GET requests for the files of a directory according to the server's SiteProfile."""
+    # Keep-alive, so pooled sessions reuse connections as they would against the real site
+    protocol_version = 'HTTP/1.1'
+    server: SimulatedSiteServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        start = time.perf_counter()
+        path = unquote(urlparse(self.path).path)
+        status, latency, truncate = self.server.draw_faults()
+        time.sleep(latency)
+
+        sent, truncated = 0, False
+        if status is not None:
+            self._send_empty(status, {'Retry-After': '1'} if status == 429 else {})
+        else:
+            status, sent, truncated = self._send_file(path, truncate)
+        self.server.stats.record(path, status, time.perf_counter() - start, sent, truncated)
+
+    def _file_path(self, path: str) -> str | None:
+        """Maps a request path into the served directory, or None if it falls outside it."""
+        relative = os.path.normpath(path.lstrip('/') or 'index.html')
+        if relative.startswith('..') or os.path.isabs(relative):
+            return None
+        return os.path.join(self.server.directory, relative)
+
+    def _validators(self, stat: os.stat_result) -> dict:
+        """The ETag and Last-Modified headers the profile sends for a file."""
+        headers = {}
+        if self.server.profile.validators in ('both', 'etag'):
+            headers['ETag'] = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        if self.server.profile.validators in ('both', 'last_modified'):
+            headers['Last-Modified'] = formatdate(stat.st_mtime, usegmt=True)
+        return headers
+
+    def _not_modified(self, stat: os.stat_result, validators: dict) -> bool:
+        """Whether the request's conditional headers match the current file."""
+        if not self.server.profile.conditional:
+            return False
+        if 'ETag' in validators and 'If-None-Match' in self.headers:
+            return self.headers['If-None-Match'] == validators['ETag']
+        if 'Last-Modified' in validators and 'If-Modified-Since' in self.headers:
+            try:
+                return int(stat.st_mtime) <= parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range_start(self, validators: dict) -> int:
+        """The offset of a resumable range request for the current file, or 0 to send all of it."""
+        requested = self.headers.get('Range', '')
+        if not (self.server.profile.conditional and requested.startswith('bytes=') and requested.endswith('-')):
+            return 0
+        if self.headers.get('If-Range') not in validators.values():
+            return 0
+        try:
+            return int(requested[len('bytes='):-1])
+        except ValueError:
+            return 0
+
+    def _send_empty(self, status: int, headers: dict) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _send_file(self, path: str, truncate: bool) -> tuple[int, int, bool]:
+        """Sends a file, or the part of it a range request asks for, returning (status, bytes sent, truncated)."""
+        file_path = self._file_path(path)
+        if file_path is None or not os.path.isfile(file_path):
+            self._send_empty(404, {})
+            return 404, 0, False
+
+        stat = os.stat(file_path)
+        validators = self._validators(stat)
+        if self._not_modified(stat, validators):
+            self._send_empty(304, validators)
+            return 304, 0, False
+
+        start = self._range_start(validators)
+        if start >= stat.st_size > 0:
+            self._send_empty(416, {'Content-Range': f'bytes */{stat.st_size}'})
+            return 416, 0, False
+        status = 206 if start else 200
+        length = stat.st_size - start
+        self.send_response(status)
+        for name, value in validators.items():
+            self.send_header(name, value)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{stat.st_size - 1}/{stat.st_size}')
+        self.send_header('Content-Type', 'text/html' if path.endswith('.html') else 'application/octet-stream')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+
+        # A truncated body stops halfway and drops the connection, short of its Content-Length
+        limit = length // 2 if truncate and length > 1 else length
+        sent = self._write_body(file_path, start, limit)
+        if limit < length:
+            self.close_connection = True
+        return status, sent, limit < length
+
+    def _write_body(self, file_path: str, start: int, limit: int) -> int:
+        """Writes `limit` bytes of a file from `start`, pacing the writes to the bandwidth cap."""
+        bandwidth = self.server.profile.bandwidth_bps
+        began = time.perf_counter()
+        sent = 0
+        with open(file_path, 'rb') as file:
+            file.seek(start)
+            while sent < limit:
+                chunk = file.read(min(CHUNK_SIZE, limit - sent))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if bandwidth:
+                    time.sleep(max(0.0, sent / bandwidth - (time.perf_counter() - began)))
+        self.wfile.flush()
+        return sent
+
+
+@contextlib.contextmanager
+def simulate_site(directory: str, profile: SiteProfile = SiteProfile()) -> Iterator[tuple[str, SiteStats]]:
+    """
+    Serves a directory as a simulated remote site on an ephemeral local port for the duration of the block.
+
+    Args:
+        directory (str): The directory to serve.
+        profile (SiteProfile): The latency, bandwidth, faults and validators of the site (default
+            is a site without faults).
+
+    Yields:
+        tuple[str, SiteStats]: The base URL of the server, and the statistics of the requests it answers.
+    """
+    server = SimulatedSiteServer(directory, profile)
+    with _serve(server) as base_url:
+        yield base_url, server.stats
@@ -0,0 +1,207 @@
+"""
+Benchmark suite for the pipeline stages, with JSON baselines that fail the run on regressions.
+
+Each scenario generates a catalogue of synthetic ET-shaped releases (see benchmarks/synthetic.py),
+serves it from a local HTTP stand-in for the statistics site, and runs the stages of the pipeline
+over every release: ingest, preprocess, validate, save, and the consistency and profiling reports.
+Profiling is slow and only run on the first release of a scenario.
+
+For every stage the suite records the best wall time of `--repeat` runs and the peak memory
+traced by tracemalloc in one further run. Allocations made outside the Python allocator, such
+as by the Rust calamine reader, are not traced.
+
+Usage:
+    python -m benchmarks.suite [--scenarios small catalogue] [--repeat 3]
+                               [--baseline benchmarks/baselines/baseline.json] [--update-baseline]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Callable
+from dataclasses import dataclass
+from benchmarks.stand_in import serve_directory
+from benchmarks.synthetic import write_et_catalogue
+from energytrend_etl.save_to_csv import save_data
+from energytrend_etl.validation import validate_data
+from energytrend_etl.preprocess_data import process_excel_data
+from energytrend_etl.ingest_catalogue import CatalogueTarget, ingest_catalogue
+from energytrend_etl.validation_report import generate_data_consistency_report, generate_data_profiling_report
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'baseline.json')
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A catalogue of `files` releases whose Quarter sheets hold (19 * scale) x (4 * years) cells."""
+    files: int
+    scale: int
+    years: int
+
+
+SCENARIOS = {
+    'small': Scenario(files=1, scale=1, years=25),          # 19 x 100, the size of the real release
+    'catalogue': Scenario(files=100, scale=1, years=25),    # 100 releases of the real size
+    'medium': Scenario(files=1, scale=53, years=250),       # about 1k x 1k
+    'large': Scenario(files=1, scale=527, years=1250),      # about 10k x 5k; takes minutes to generate
+}
+
+
+def measure(stage: Callable[[], Any], repeat: int) -> dict:
+    """Runs a stage `repeat` times for the best wall time, then once more under tracemalloc for peak memory."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'wall_s': min(seconds), 'peak_mb': peak / 2 ** 20}
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> dict:
+    """Runs every stage of the pipeline over a scenario's catalogue, returning metrics per stage."""
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir, serve_directory(os.path.join(work_dir, 'site')) as base_url:
+        link_texts = write_et_catalogue(os.path.join(work_dir, 'site'), scenario.files, scenario.scale, scenario.years)
+        targets = [CatalogueTarget(f"{base_url}/index.html", text) for text in link_texts]
+
+        # Stages read and write relative to the working directory, like the pipeline
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            def ingest():
+                # Start from an empty data directory so every run downloads everything
+                shutil.rmtree('./data', ignore_errors=True)
+                return ingest_catalogue.fn(targets, data_dir='./data')
+
+            results['ingest'] = measure(ingest, repeat)
+            filenames = [result.filename for result in ingest()]
+            if not all(filenames):
+                raise RuntimeError('Ingestion failed; see ./logs/ingest_catalogue.log')
+
+            frames = {}
+            def preprocess():
+                # Drop parsed-sheet caches so every run parses the workbooks
+                for sidecar in glob.glob('./data/*.arrow'):
+                    os.remove(sidecar)
+                for filename in filenames:
+                    frames[filename] = process_excel_data.fn(filename, 'Quarter', 4)
+                    if frames[filename].empty:
+                        raise RuntimeError(f"Preprocessing {filename} failed; see ./logs/preprocess_data.log")
+
+            results['preprocess'] = measure(preprocess, repeat)
+
+            previous = {}
+            def validate():
+                for filename in filenames:
+                    previous[filename] = validate_data.fn(filename, frames[filename], 'Quarter', 4, './snapshots', './report')
+
+            results['validate'] = measure(validate, repeat)
+            results['save'] = measure(lambda: [save_data.fn(frames[f], f, './output', ['csv']) for f in filenames], repeat)
+            results['consistency_report'] = measure(
+                lambda: [generate_data_consistency_report.fn(frames[f], previous[f], f, './report') for f in filenames],
+                repeat)
+            results['profiling_report'] = measure(
+                lambda: generate_data_profiling_report.fn(frames[filenames[0]], filenames[0], './report'), 1)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def environment() -> dict:
+    """Describes the machine the benchmarks ran on, as baselines only compare well on the same kind of machine."""
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def compare(
+        results: dict,
+        baseline: dict,
+        time_tolerance: float,
+        memory_tolerance: float,
+        min_seconds: float = 0.01,
+        min_mb: float = 1.0
+) -> list[str]:
+    """
+    Compares results with a baseline, stage by stage.
+
+    Args:
+        results (dict): Metrics per scenario and stage, as returned by run_scenario.
+        baseline (dict): Baseline metrics in the same shape.
+        time_tolerance (float): The accepted relative increase in wall time, e.g. 0.5 for 50%.
+        memory_tolerance (float): The accepted relative increase in peak memory.
+        min_seconds (float): Increases in wall time below this are noise and never regressions (default is 0.01).
+        min_mb (float): Increases in peak memory below this are never regressions (default is 1.0).
+
+    Returns:
+        list[str]: One message per regression; empty if there are none.
+    """
+    regressions = []
+    for scenario, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baseline.get(scenario, {}).get(stage)
+            if base is None:
+                continue
+            for key, tolerance, floor, unit in (('wall_s', time_tolerance, min_seconds, 's'),
+                                                ('peak_mb', memory_tolerance, min_mb, 'MB')):
+                if metrics[key] > base[key] * (1 + tolerance) and metrics[key] - base[key] > floor:
+                    regressions.append(f"{scenario}/{stage}: {key} {metrics[key]:.3f}{unit} "
+                                       f"exceeds baseline {base[key]:.3f}{unit} by more than {tolerance:.0%}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages against JSON baselines.')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=['small', 'catalogue'], help='Scenarios to run.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per stage.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file to compare with or update.')
+    parser.add_argument('--update-baseline', action='store_true', help='Record the results as the new baseline.')
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='Accepted relative increase in wall time.')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='Accepted relative increase in peak memory.')
+    args = parser.parse_args()
+
+    results = {name: run_scenario(SCENARIOS[name], args.repeat) for name in args.scenarios}
+    print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        baseline = {'environment': environment(), 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline['results'] = json.load(file).get('results', {})
+        baseline['results'].update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2)
+        print(f"Baseline updated at {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get('environment') != environment():
+        print(f"Warning: baseline was recorded on {baseline.get('environment')}, not {environment()}.")
+
+    regressions = compare(results, baseline['results'], args.time_tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print('No regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
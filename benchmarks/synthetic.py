@@ -0,0 +1,150 @@
+"""
+Synthetic workbooks shaped like the ET 3.1 release, for benchmarking at sizes the real file does not reach.
+
+The generated workbook has the same sheets, preamble rows, header rows and row labels as
+ET_3.1_JUL_24.xlsx, and its values satisfy the table's roll-ups and identities, so it passes
+process_excel_data's integrity checks. `scale` repeats the block of 19 categories and
+`years` sets the number of quarterly periods (four per year), so the Quarter sheet holds
+(19 * scale) x (4 * years) cells: scale 1 and 25 years is the size of the real release,
+scale 527 and 1250 years about 10k x 5k.
+
+Usage:
+    python -m benchmarks.synthetic PATH [--scale 10] [--years 25]
+"""
+import os
+import shutil
+import argparse
+import numpy as np
+from openpyxl import Workbook
+
+
+# Sheets of the ET 3.1 workbook and the row (0-indexed) holding their column labels
+SHEETS = {'Quarter': 4, 'Annual': 4, 'Main Table': 3}
+
+QUARTERS = ['1st', '2nd', '3rd', '4th']
+
+FIRST_YEAR = 1999
+
+
+def et_3_1_block(n_periods: int, rng: np.random.Generator) -> list[tuple[str, np.ndarray]]:
+    """Generates one block of ET 3.1 rows whose roll-ups and identities hold exactly in every period."""
+    def leaf(mean: float) -> np.ndarray:
+        return np.round(rng.normal(mean, mean * 0.1, n_periods).clip(0), 2)
+
+    crude, ngls, feedstocks = leaf(20000), leaf(1500), leaf(50)
+    imports_crude, imports_feedstocks = leaf(10000), leaf(900)
+    exports_crude, exports_feedstocks = leaf(8000), leaf(500)
+    stock_change = np.round(rng.normal(0, 200, n_periods), 2)
+    transfers = np.round(rng.normal(0, 20, n_periods), 2)
+    statistical_difference = np.round(rng.normal(0, 20, n_periods), 2)
+    energy_industry_use = leaf(10)
+
+    production = crude + ngls + feedstocks
+    imports = imports_crude + imports_feedstocks
+    exports = exports_crude + exports_feedstocks
+    total_supply = production + imports - exports + stock_change + transfers
+    total_demand = total_supply - statistical_difference
+    transformation = total_demand - energy_industry_use
+    return [
+        ('Indigenous production [note 2]', production),
+        ('Crude oil', crude),
+        ('NGLs [note 3]', ngls),
+        ('Feedstocks', feedstocks),
+        ('Imports [note 4]', imports),
+        ('Crude oil & NGLs', imports_crude),
+        ('Feedstocks', imports_feedstocks),
+        ('Exports [note 4]', exports),
+        ('Crude Oil & NGLs', exports_crude),
+        ('Feedstocks', exports_feedstocks),
+        ('Stock change [note 5]', stock_change),
+        ('Transfers [note 6]', transfers),
+        ('Total supply', total_supply),
+        ('Statistical difference [note 7]', statistical_difference),
+        ('Total demand ', total_demand),
+        ('Transformation', transformation),
+        ('Petroleum refineries', transformation),
+        ('Energy industry use', energy_industry_use),
+        ('Oil & gas extraction', energy_industry_use),
+    ]
+
+
+def _write_sheet(workbook: Workbook, title: str, header: int, periods: list[str], rows: list[tuple[str, np.ndarray]]):
+    sheet = workbook.create_sheet(title)
+    sheet.append([f"Table 3.1 Supply and use of crude oil, natural gas liquids and feedstocks ({title})"])
+    for _ in range(header - 1):
+        sheet.append(['Synthetic benchmark data'])
+    sheet.append(['Column1', *periods])
+    for label, values in rows:
+        sheet.append([label, *np.round(values, 2).tolist()])
+
+
+def write_et_workbook(path: str, scale: int = 1, years: int = 25, seed: int = 0) -> str:
+    """
+    Writes a synthetic workbook shaped like the ET 3.1 release.
+
+    Args:
+        path (str): The path of the .xlsx file to write.
+        scale (int): The number of blocks of ET 3.1 categories per sheet (default is 1, 19 rows).
+        years (int): The number of years of quarterly data (default is 25, 100 quarters).
+        seed (int): The random seed (default is 0).
+
+    Returns:
+        str: The path written.
+    """
+    rng = np.random.default_rng(seed)
+    quarter_periods = [f"{FIRST_YEAR + i // 4} \n{QUARTERS[i % 4]} quarter" for i in range(years * 4)]
+    quarterly = [row for _ in range(scale) for row in et_3_1_block(len(quarter_periods), rng)]
+    # Annual figures are sums of the quarters, so the identities carry over
+    annual = [(label, values.reshape(-1, 4).sum(axis=1)) for label, values in quarterly]
+    annual_periods = [str(FIRST_YEAR + i) for i in range(years)]
+
+    # Write-only mode streams rows to disk instead of building the sheets in memory
+    workbook = Workbook(write_only=True)
+    _write_sheet(workbook, 'Main Table', SHEETS['Main Table'], annual_periods[-2:] + quarter_periods[-8:],
+                 [(label, np.r_[a[-2:], q[-8:]]) for (label, a), (_, q) in zip(annual, quarterly)])
+    _write_sheet(workbook, 'Annual', SHEETS['Annual'], annual_periods, annual)
+    _write_sheet(workbook, 'Quarter', SHEETS['Quarter'], quarter_periods, quarterly)
+    workbook.save(path)
+    return path
+
+
+def write_et_catalogue(directory: str, files: int = 1, scale: int = 1, years: int = 25) -> list[str]:
+    """
+    Writes a catalogue of synthetic releases and a statistics page linking to them.
+
+    One workbook is generated and copied under each release name, as the content of the
+    releases does not matter to the stages being measured.
+
+    Args:
+        directory (str): The directory to write the workbooks and 'index.html' to.
+        files (int): The number of releases (default is 1).
+        scale (int): The number of blocks of ET 3.1 categories per sheet (default is 1).
+        years (int): The number of years of quarterly data (default is 25).
+
+    Returns:
+        list[str]: The link text of each release on the statistics page, in order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    filenames = [f"ET_3.1_{i:04d}.xlsx" for i in range(files)]
+    first = write_et_workbook(os.path.join(directory, filenames[0]), scale, years)
+    for filename in filenames[1:]:
+        shutil.copyfile(first, os.path.join(directory, filename))
+
+    link_texts = [f"Synthetic release {i:04d} (ET 3.1 - quarterly)" for i in range(files)]
+    anchors = ''.join(f'<a href="/{filename}">{text}</a>\n' for filename, text in zip(filenames, link_texts))
+    with open(os.path.join(directory, 'index.html'), 'w') as page:
+        page.write(f"<html><body>\n{anchors}</body></html>\n")
+    return link_texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Write a synthetic ET 3.1-shaped workbook.')
+    parser.add_argument('path', help='The .xlsx file to write.')
+    parser.add_argument('--scale', type=int, default=1, help='Blocks of ET 3.1 categories per sheet.')
+    parser.add_argument('--years', type=int, default=25, help='Years of quarterly data.')
+    args = parser.parse_args()
+    print(write_et_workbook(args.path, args.scale, args.years))
+
+
+if __name__ == '__main__':
+    main()
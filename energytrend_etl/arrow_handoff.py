@@ -0,0 +1,291 @@
+import os
+import json
+import uuid
+import pickle
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import IO, Any
+from dataclasses import dataclass
+from energytrend_etl.logger_config import setup_logger
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/arrow_handoff.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Shared memory where available, so frames handed between processes never touch the disk
+SHARED_MEMORY_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+# Schema metadata key describing how the columns of a DataFrame were split between its float block and table
+LAYOUT_KEY = b'energytrend_etl.layout'
+
+# Smallest DataFrame, in cells, handed over as Arrow: below about 4 MB of floats, pickling is
+# cheaper even across processes (see benchmarks/bench_handoff.py)
+MIN_ARROW_CELLS = 500_000
+
+# Most columns other than floats inserted one by one when reading a DataFrame, well below the
+# 100 blocks at which pandas warns of fragmentation
+MAX_INSERTED_COLUMNS = 50
+
+# Errors raised when a DataFrame holds values Arrow cannot represent
+ARROW_ERRORS = (pa.ArrowException, TypeError, ValueError)
+
+
+def _encode_mixed(column: pd.Series) -> tuple[np.ndarray, pa.StructArray]:
+    """
+    Encodes an object column of floats and strings, such as a period column whose blanks were
+    filled with '', as a float value and a text override per cell.
+
+    Raises:
+        TypeError: If the column holds anything but floats and strings.
+    """
+    values = column.to_numpy()
+    is_text = np.fromiter(map(isinstance, values, [str] * len(values)), dtype=bool, count=len(values))
+    if not all(map(isinstance, values[~is_text], [float] * int((~is_text).sum()))):
+        raise TypeError(f"Column '{column.name}' holds values other than floats and strings")
+    numbers = np.full(len(values), np.nan)
+    numbers[~is_text] = values[~is_text].astype(np.float64)
+    text = pa.array(np.where(is_text, values, None), type=pa.string())
+    return numbers, pa.StructArray.from_arrays([pa.array(numbers), text], names=['value', 'text'])
+
+
+def _decode_mixed(column: pa.ChunkedArray) -> np.ndarray:
+    """Restores an object column encoded by _encode_mixed."""
+    column = column.combine_chunks()
+    values = column.field('value').to_numpy(zero_copy_only=False).astype(object)
+    text = column.field('text')
+    is_text = text.is_valid().to_numpy(zero_copy_only=False)
+    values[is_text] = text.to_numpy(zero_copy_only=False)[is_text]
+    return values
+
+
+def split_frame(df: pd.DataFrame) -> tuple[np.ndarray, pa.Table]:
+    """
+    Splits a DataFrame into a column-major block of its float64 columns and an Arrow table of
+    the other columns and the index.
+
+    The block is written as one tensor, so it costs a single copy rather than a conversion per
+    column, and reads back as one pandas block. Object columns of strings are stored as strings,
+    and object columns mixing floats with strings as a struct of a float and a text override.
+
+    Args:
+        df (pd.DataFrame): The DataFrame, with string column labels.
+
+    Returns:
+        tuple[np.ndarray, pa.Table]: The block of categories x float columns, and the table,
+            whose schema metadata records where each column goes.
+
+    Raises:
+        TypeError, ValueError, pa.ArrowException: If the DataFrame holds values Arrow cannot represent.
+    """
+    if not all(isinstance(label, str) for label in [*df.columns, df.columns.name or '']):
+        raise TypeError('Only DataFrames with string column labels are handed over as Arrow')
+    is_float = (df.dtypes == np.float64).to_numpy(dtype=bool)
+    positions = np.flatnonzero(is_float)
+    # A run of float columns, such as the periods of a processed sheet, is selected without a copy
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        values = df.iloc[:, positions[0]:positions[-1] + 1].to_numpy(dtype=np.float64)
+    else:
+        values = df.iloc[:, is_float].to_numpy(dtype=np.float64)
+    values = np.asfortranarray(values)
+
+    others = df.iloc[:, ~is_float]
+    mixed = {}
+    for i in np.flatnonzero(others.dtypes.to_numpy() == object).tolist():
+        column = others.iloc[:, i]
+        if pd.api.types.infer_dtype(column, skipna=False) not in ('string', 'empty'):
+            numbers, mixed[i] = _encode_mixed(column)
+            # Arrow infers the rest of the schema with the float values in place of the column
+            others.isetitem(i, numbers)
+
+    table = pa.Table.from_pandas(others)
+    columns, fields = table.columns, list(table.schema)
+    for i, column in enumerate(columns[:others.shape[1]]):
+        if i in mixed:
+            columns[i], fields[i] = mixed[i], fields[i].with_type(mixed[i].type)
+        elif column.null_count and pa.types.is_floating(column.type):
+            # Arrow reads NaN as null; stored as a value, the column reads back without a copy
+            columns[i] = pa.array(others.iloc[:, i].to_numpy())
+    layout = {'columns': list(df.columns), 'name': df.columns.name,
+              'floats': positions.tolist(), 'mixed': list(mixed)}
+    metadata = {**table.schema.metadata, LAYOUT_KEY: json.dumps(layout).encode()}
+    if columns == table.columns:
+        # Rebuilding a table without columns would lose its rows
+        return values, table.replace_schema_metadata(metadata)
+    return values, pa.Table.from_arrays(columns, schema=pa.schema(fields, metadata=metadata))
+
+
+def join_frame(values: np.ndarray, table: pa.Table) -> pd.DataFrame:
+    """
+    Joins a block and table made by split_frame back into their DataFrame.
+
+    The block becomes the float columns' pandas block as is, so a memory-mapped block stays on
+    the map, read-only, rather than being copied.
+
+    Args:
+        values (np.ndarray): The column-major block of float columns.
+        table (pa.Table): The table of the other columns and the index.
+
+    Returns:
+        pd.DataFrame: The DataFrame.
+    """
+    layout = json.loads(table.schema.metadata[LAYOUT_KEY])
+    decoded = {}
+    for i in layout['mixed']:
+        decoded[i] = _decode_mixed(table.column(i))
+        table = table.set_column(i, table.field(i).name, table.column(i).combine_chunks().field('value'))
+    others = table.to_pandas()
+    for i, column in decoded.items():
+        others.isetitem(i, column)
+
+    index = others.index
+    if len(index) != len(values):
+        # A table without columns keeps no rows, so its RangeIndex is restored from the pandas metadata
+        kind = table.schema.pandas_metadata['index_columns'][0]
+        index = pd.RangeIndex(kind['start'], kind['stop'], kind['step'], name=kind['name'])
+    df = pd.DataFrame(values, index=index, copy=False)
+    positions = np.setdiff1d(np.arange(len(layout['columns'])), layout['floats'])
+    if len(positions) <= MAX_INSERTED_COLUMNS:
+        # Each other column becomes a block of its own next to the float block, which is not copied
+        for i, position in enumerate(positions.tolist()):
+            df.insert(position, others.columns[i], others.iloc[:, i].array, allow_duplicates=True)
+    else:
+        # Beyond that, the columns are concatenated then put back in order, which copies them
+        order = np.argsort(np.concatenate([layout['floats'], positions]), kind='stable')
+        df = pd.concat([df, others.set_axis(index)], axis=1, copy=False).iloc[:, order]
+    if layout['columns']:
+        df.columns = pd.Index(layout['columns'], dtype=object, name=layout['name'])
+    else:
+        df.columns = others.columns
+    return df
+
+
+def write_frame(df: pd.DataFrame, path: str) -> str:
+    """
+    Writes a DataFrame as an uncompressed Arrow tensor of its float block followed by an Arrow
+    IPC stream of its other columns, which readers can memory-map.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+        path (str): The path of the file.
+
+    Returns:
+        str: The path written.
+    """
+    values, table = split_frame(df)
+    with pa.OSFile(path, 'wb') as sink:
+        pa.ipc.write_tensor(pa.Tensor.from_numpy(values), sink)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """
+    Reads a DataFrame written by write_frame, memory-mapping the file rather than reading it.
+
+    The file may be removed once read; the mapping keeps its contents until the DataFrame is
+    released.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        pd.DataFrame: The DataFrame, whose float columns are a read-only view of the map.
+    """
+    with pa.memory_map(path) as source:
+        values = pa.ipc.read_tensor(source).to_numpy()
+        return join_frame(values, pa.ipc.open_stream(source).read_all())
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    """A DataFrame handed to another process as an Arrow IPC file in shared memory."""
+    path: str
+
+    def load(self) -> pd.DataFrame:
+        """Maps the DataFrame and removes the file, so it is freed once the DataFrame is released."""
+        try:
+            return read_frame(self.path)
+        finally:
+            os.remove(self.path)
+
+
+def share_frame(
+        df: pd.DataFrame, 
+        directory: str = SHARED_MEMORY_DIR, 
+        min_cells: int = MIN_ARROW_CELLS
+) -> 'SharedFrame | pd.DataFrame':
+    """
+    Hands a DataFrame to another process: returned from a worker, it is pickled as a path only.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+        directory (str): Where to write the file (default is /dev/shm where available).
+        min_cells (int): Smallest DataFrame shared (default is MIN_ARROW_CELLS).
+
+    Returns:
+        SharedFrame | pd.DataFrame: A handle to the shared DataFrame, or the DataFrame itself if
+            it is smaller or Arrow cannot represent it, in which case it is pickled as usual.
+    """
+    if df.size < min_cells:
+        return df
+    path = os.path.join(directory, f"energytrend_etl-{uuid.uuid4().hex}.arrow")
+    try:
+        return SharedFrame(write_frame(df, path))
+    except ARROW_ERRORS as e:
+        if os.path.exists(path):
+            os.remove(path)
+        logger.warning("Handing over the DataFrame by pickling, as Arrow cannot represent it: %s", e)
+        return df
+
+
+def receive_frame(value: 'SharedFrame | pd.DataFrame') -> pd.DataFrame:
+    """Resolves what share_frame returned into the DataFrame."""
+    return value.load() if isinstance(value, SharedFrame) else value
+
+
+class ArrowPickler(pickle.Pickler):
+    """
+    Pickles a result with its DataFrames of at least `min_cells` written alongside as Arrow IPC
+    files, named after the pickle with a sequence number, so the pickle itself stays small.
+    """
+
+    def __init__(self, file: IO[bytes], path: str, min_cells: int = MIN_ARROW_CELLS):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.path = path
+        self.min_cells = min_cells
+        self.frames = 0
+
+    def persistent_id(self, obj: Any) -> str | None:
+        if not isinstance(obj, pd.DataFrame) or obj.size < self.min_cells:
+            return None
+        frame_path = f"{self.path}.{self.frames}.arrow"
+        try:
+            # Written atomically, as another flow may be storing the same result
+            write_frame(obj, f"{frame_path}.tmp")
+            os.replace(f"{frame_path}.tmp", frame_path)
+        except ARROW_ERRORS:
+            if os.path.exists(f"{frame_path}.tmp"):
+                os.remove(f"{frame_path}.tmp")
+            return None
+        self.frames += 1
+        return os.path.basename(frame_path)
+
+
+class ArrowUnpickler(pickle.Unpickler):
+    """Loads a result pickled by ArrowPickler, memory-mapping its DataFrames."""
+
+    def __init__(self, file: IO[bytes], path: str):
+        super().__init__(file)
+        self.directory = os.path.dirname(path)
+
+    def persistent_load(self, pid: str) -> pd.DataFrame:
+        return read_frame(os.path.join(self.directory, pid))
@@ -0,0 +1,304 @@
+import os
+import json
+import glob
+import time
+import logging
+import argparse
+import multiprocessing
+from dataclasses import dataclass, asdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from energytrend_etl.logger_config import queue_logging_initializer, setup_logger
+from energytrend_etl.sheet_cache import file_sha256
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/backfill.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_BACKFILL_DIR = './output/vintages'
+
+# Name of the append-only progress journal within the output directory
+CHECKPOINT_NAME = 'backfill_checkpoint.jsonl'
+
+
+@dataclass
+class BackfillResult:
+    """The outcome of backfilling one archived workbook."""
+    path: str
+    sha256: str
+    status: str = 'failed'  # One of 'done', 'failed' or 'skipped' (done in an earlier run)
+    sheets: int = 0
+    cells: int = 0
+    rule_failures: int = 0
+    seconds: float = 0.0
+    error: str = ''
+
+
+@dataclass
+class BackfillSummary:
+    """The outcome of a backfill run."""
+    results: list[BackfillResult]
+    seconds: float
+
+    @property
+    def processed(self) -> int:
+        """The number of workbooks processed in this run, successfully or not."""
+        return sum(result.status != 'skipped' for result in self.results)
+
+    @property
+    def files_per_second(self) -> float:
+        """Throughput of this run, counting workbooks processed rather than skipped."""
+        return self.processed / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def failed(self) -> list[BackfillResult]:
+        """The workbooks that failed."""
+        return [result for result in self.results if result.status == 'failed']
+
+
+def find_workbooks(sources: list[str]) -> list[str]:
+    """
+    Lists the archived workbooks to backfill.
+
+    Args:
+        sources (list[str]): Workbook paths and directories; directories contribute their .xlsx files.
+
+    Returns:
+        list[str]: The workbook paths, sorted and without duplicates.
+    """
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            paths.update(glob.glob(os.path.join(source, '*.xlsx')))
+        else:
+            paths.add(source)
+    return sorted(paths)
+
+
+def load_checkpoint(checkpoint_path: str) -> dict[str, str]:
+    """
+    Reads which workbooks an earlier backfill completed.
+
+    Args:
+        checkpoint_path (str): The path of the progress journal.
+
+    Returns:
+        dict[str, str]: The content hash of every completed workbook, mapped to its path. A line
+            cut short by an interruption is ignored.
+    """
+    completed = {}
+    if not os.path.exists(checkpoint_path):
+        return completed
+    with open(checkpoint_path) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get('status') == 'done':
+                completed[entry['sha256']] = entry['path']
+    return completed
+
+
+def _record(checkpoint_path: str, result: BackfillResult) -> None:
+    # One line per workbook, flushed immediately, so an interrupted run loses at most the workbooks in flight
+    with open(checkpoint_path, 'a') as file:
+        file.write(json.dumps(asdict(result)) + '\n')
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _init_worker(memory_limit_mb: int | None, log_initializer, log_initargs: tuple) -> None:
+    """Runs in each worker process: caps its address space and joins queue logging if started."""
+    if memory_limit_mb:
+        import resource
+        limit = memory_limit_mb * 2 ** 20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if log_initializer is not None:
+        log_initializer(*log_initargs)
+
+
+def backfill_workbook(
+        path: str,
+        sha256: str,
+        sheets: dict[str, int],
+        output_path: str,
+        formats: list[str] | None,
+        warehouse: str | None,
+        checks: dict
+) -> BackfillResult:
+    """
+    Parses, transforms, validates and stores every sheet of one archived workbook.
+
+    Runs in a worker process, so it returns only a small summary rather than the data.
+
+    Args:
+        path (str): The path of the workbook.
+        sha256 (str): The content hash of the workbook.
+        sheets (dict[str, int]): The sheets to process, mapped to the row (0-indexed) holding their column labels.
+        output_path (str): The directory to save each sheet to, named after the workbook and sheet.
+        formats (list[str] | None): Output formats to write, as for save_data.
+        warehouse (str | None): Path of a SQLite warehouse whose vintage store to record the release in, or None.
+        checks (dict): Integrity check parameters passed to preprocess_frame (default layout is that
+            of the workbook's dataset, as for main).
+
+    Returns:
+        BackfillResult: The outcome, with status 'failed' and the error if any stage failed.
+    """
+    # Imported here so that the parent process does not pay for them
+    from energytrend_etl.warehouse import sheet_filename
+    from energytrend_etl.category_tree import dataset_layout
+    from energytrend_etl.save_to_csv import save_data
+    from energytrend_etl.vintages import save_data_to_vintage_store
+    from energytrend_etl.preprocess_data import preprocess_frame, reshape_to_long
+    from energytrend_etl.sheet_cache import read_excel_sheets_cached
+    from energytrend_etl.consistency_rules import evaluate_rules
+    from energytrend_etl.energy_table import EnergyTable
+
+    result = BackfillResult(path, sha256)
+    start = time.perf_counter()
+    filename = os.path.basename(path)
+    try:
+        raw_frames = read_excel_sheets_cached(path, sheets)
+        # Identities are checked against the layout of the workbook's dataset, unless one is given
+        checks = {'layout': dataset_layout(filename), **checks}
+        for sheet_name, raw_df in raw_frames.items():
+            df = preprocess_frame(raw_df, filename, **checks)
+            if df.empty:
+                result.error = f"Sheet '{sheet_name}' failed preprocessing"
+                return result
+            # Each vintage is checked on its own, as vintages complete in no particular order
+            table = EnergyTable.from_frame(df)
+            report = evaluate_rules(df, df, table=table)
+            result.rule_failures += int(report['failures'].sum())
+            output_name = sheet_filename(filename, sheet_name)
+            if not save_data.fn(df, output_name, output_path, formats):
+                result.error = f"Sheet '{sheet_name}' could not be saved"
+                return result
+            if warehouse and save_data_to_vintage_store.fn(reshape_to_long.fn(df, table), output_name, warehouse) < 0:
+                result.error = f"Sheet '{sheet_name}' could not be recorded in the vintage store"
+                return result
+            result.sheets += 1
+            result.cells += df.size
+        result.status = 'done'
+    except MemoryError:
+        result.error = 'Exceeded the worker memory limit'
+    except Exception as e:
+        result.error = str(e)
+    finally:
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+def backfill(
+        sources: list[str],
+        output_path: str = DEFAULT_BACKFILL_DIR,
+        sheets: dict[str, int] | None = None,
+        formats: list[str] | None = None,
+        warehouse: str | None = None,
+        max_workers: int | None = None,
+        memory_limit_mb: int | None = None,
+        tasks_per_worker: int = 10,
+        resume: bool = True,
+        **checks
+) -> BackfillSummary:
+    """
+    Rebuilds history from archived releases, processing workbooks in parallel worker processes.
+
+    Progress is journalled to 'backfill_checkpoint.jsonl' in the output directory as each workbook
+    completes, so an interrupted backfill resumes where it stopped: workbooks whose content was
+    already backfilled are skipped, even if they were renamed or moved.
+
+    Memory is bounded in two ways: workers are replaced after `tasks_per_worker` workbooks, so
+    memory held by the allocator does not accumulate, and `memory_limit_mb` caps the address
+    space of each worker, failing a workbook that needs more rather than the machine.
+
+    Args:
+        sources (list[str]): Archived workbook paths and directories of workbooks.
+        output_path (str): The directory to save each vintage to (default is './output/vintages').
+        sheets (dict[str, int] | None): The sheets to process, mapped to the row (0-indexed) holding their
+            column labels (default is {'Quarter': 4}).
+        formats (list[str] | None): Output formats to write, as for save_data (default is ['csv']).
+        warehouse (str | None): Path of a SQLite warehouse to record every release in its vintage store,
+            in whatever order the releases complete (default is None, no warehouse).
+        max_workers (int | None): The number of worker processes (default is the CPU count).
+        memory_limit_mb (int | None): The address space limit of each worker in MB (default is None, no limit).
+        tasks_per_worker (int): The number of workbooks a worker processes before it is replaced (default is 10).
+        resume (bool): Skip workbooks completed by an earlier run (default is True).
+        **checks: Integrity check parameters passed to preprocess_frame.
+
+    Returns:
+        BackfillSummary: The outcome of every workbook and the throughput of the run.
+    """
+    sheets = sheets or {'Quarter': 4}
+    max_workers = max_workers or os.cpu_count() or 1
+    os.makedirs(output_path, exist_ok=True)
+    checkpoint_path = os.path.join(output_path, CHECKPOINT_NAME)
+    completed = load_checkpoint(checkpoint_path) if resume else {}
+
+    start = time.perf_counter()
+    results, pending = [], []
+    for path in find_workbooks(sources):
+        sha256 = file_sha256(path)
+        if sha256 in completed:
+            results.append(BackfillResult(path, sha256, status='skipped'))
+        else:
+            pending.append((path, sha256))
+    if results:
+        logger.info("Resuming backfill: skipping %s workbook(s) completed earlier.", len(results))
+
+    log_initializer, log_initargs = queue_logging_initializer()
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(memory_limit_mb, log_initializer, log_initargs),
+                             max_tasks_per_child=tasks_per_worker) as pool:
+        # Keep a bounded number of workbooks in flight rather than queueing the whole archive
+        queued, in_flight = iter(pending), {}
+        while True:
+            while len(in_flight) < 2 * max_workers and (item := next(queued, None)):
+                in_flight[pool.submit(backfill_workbook, *item, sheets, output_path, formats, warehouse, checks)] = item
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, sha256 = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # A worker that died, e.g. killed by the OS, fails its workbook
+                    result = BackfillResult(path, sha256, error=f"Worker failed: {str(e)}")
+                results.append(result)
+                _record(checkpoint_path, result)
+                if result.status == 'failed':
+                    logger.error("Failed to backfill %s: %s", result.path, result.error)
+            elapsed = time.perf_counter() - start
+            processed = sum(result.status != 'skipped' for result in results)
+            logger.info("Backfilled %s/%s workbook(s), %.2f files/s.", processed, len(pending), processed / elapsed)
+
+    summary = BackfillSummary(results, time.perf_counter() - start)
+    logger.info("Backfill complete: %s workbook(s) in %.1fs (%.2f files/s), %s failed.",
+                summary.processed, summary.seconds, summary.files_per_second, len(summary.failed))
+    return summary
+
+
+if __name__ == '__main__':
+    from energytrend_etl.main import parse_sheet
+
+    parser = argparse.ArgumentParser(description='Rebuild history from archived ET releases.')
+    parser.add_argument('sources', nargs='+', help='Archived workbooks and directories of workbooks.')
+    parser.add_argument('--output-path', type=str, default=DEFAULT_BACKFILL_DIR, help='The directory to save each vintage to.')
+    parser.add_argument('--sheets', nargs='+', type=parse_sheet, default=None, metavar='NAME:HEADER', help='Sheets to process with their header rows, e.g. Quarter:4.')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'parquet', 'feather'], default=['csv'], help='Output formats to write.')
+    parser.add_argument('--warehouse', type=str, default=None, help='Path of a SQLite warehouse to record every release in.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes.')
+    parser.add_argument('--memory-limit-mb', type=int, default=None, help='Address space limit of each worker in MB.')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and backfill every workbook.')
+
+    args = parser.parse_args()
+    summary = backfill(args.sources, args.output_path, dict(args.sheets) if args.sheets else None, args.formats,
+                       args.warehouse, args.workers, args.memory_limit_mb, resume=not args.restart)
+    print(f"{summary.processed} workbook(s) in {summary.seconds:.1f}s ({summary.files_per_second:.2f} files/s); "
+          f"{len(summary.failed)} failed.")
@@ -0,0 +1,215 @@
+import re
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from energytrend_etl.warehouse import dataset_name
+
+
+# Category labels carry note references such as 'Indigenous production [note 2]'
+NOTE_PATTERN = r'\s*\[note\s*(\d+)\]'
+
+# Separator between the labels of a category path, e.g. 'Imports / Feedstocks'
+PATH_SEPARATOR = ' / '
+
+
+def normalize_label(label: str) -> str:
+    """Normalizes a category label for matching: notes stripped, whitespace collapsed, case folded."""
+    return ' '.join(re.sub(NOTE_PATTERN, '', str(label)).split()).casefold()
+
+
+@dataclass(frozen=True)
+class Identity:
+    """An accounting identity: `total` equals the signed sum of `terms`, given as (path, sign) pairs."""
+    total: str
+    terms: tuple[tuple[str, int], ...]
+    name: str = ''
+
+    def __post_init__(self):
+        if not self.name:
+            object.__setattr__(self, 'name', f"{self.total} identity")
+
+
+@dataclass(frozen=True)
+class CategoryLayout:
+    """
+    The implicit nesting of a published table: which rows sit under which, and which rows are derived.
+
+    Children are matched by label against the rows that follow their parent, so repeated labels
+    such as 'Feedstocks' are attached to the nearest enclosing parent that declares them.
+    """
+    name: str
+    children: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    identities: tuple[Identity, ...] = ()
+    rollups: bool = True  # Whether every parent must equal the sum of its children
+
+
+# Supply and use of crude oil, NGLs and feedstocks (ET 3.1), quarterly and annual sheets
+ET_3_1_LAYOUT = CategoryLayout(
+    name='ET 3.1',
+    children={
+        'Indigenous production': ('Crude oil', 'NGLs', 'Feedstocks'),
+        'Imports': ('Crude oil & NGLs', 'Feedstocks'),
+        'Exports': ('Crude oil & NGLs', 'Feedstocks'),
+        'Total demand': ('Transformation', 'Energy industry use'),
+        'Transformation': ('Petroleum refineries',),
+        'Energy industry use': ('Oil & gas extraction',),
+    },
+    identities=(
+        Identity('Total supply', (
+            ('Indigenous production', 1), ('Imports', 1), ('Exports', -1), ('Stock change', 1), ('Transfers', 1)
+        )),
+        Identity('Total demand', (('Total supply', 1), ('Statistical difference', -1))),
+    ),
+)
+
+# Layouts of the datasets whose tables have one, keyed by warehouse.dataset_name
+DATASET_LAYOUTS = {'ET_3.1': ET_3_1_LAYOUT}
+
+
+def dataset_layout(filename: str) -> CategoryLayout | None:
+    """
+    Chooses the category layout whose identities the sheets of a workbook are checked against.
+
+    Args:
+        filename (str): The workbook filename, e.g. 'ET_3.1_JUL_24.xlsx'.
+
+    Returns:
+        CategoryLayout | None: The layout of the workbook's dataset, or None if the dataset has no
+            declared layout, in which case identity checks are skipped.
+    """
+    return DATASET_LAYOUTS.get(dataset_name(filename))
+
+
+class CategoryTree:
+    """
+    The parsed category hierarchy of a table, stored as arrays in row order.
+
+    `parent[i]` is the row index of row i's parent (-1 for top-level rows), and the children of
+    row i are `child_index[child_offsets[i]:child_offsets[i + 1]]`, as in a CSR adjacency list.
+    """
+
+    def __init__(self, labels: np.ndarray, notes: np.ndarray, parent: np.ndarray):
+        self.labels = labels
+        self.notes = notes
+        self.parent = parent
+        self.depth = np.zeros(len(parent), dtype=np.int8)
+        paths = labels.copy()
+        # Parents always precede their children, so one forward pass resolves depths and paths
+        for row in np.flatnonzero(parent >= 0):
+            self.depth[row] = self.depth[parent[row]] + 1
+            paths[row] = f"{paths[parent[row]]}{PATH_SEPARATOR}{labels[row]}"
+        self.paths = paths
+        self.child_index = np.argsort(parent, kind='stable')[np.count_nonzero(parent < 0):].astype(np.int32)
+        self.child_offsets = np.searchsorted(parent[self.child_index], np.arange(len(parent) + 1)).astype(np.int32)
+        self._row_of_path = {normalize_label(path): row for row, path in enumerate(paths)}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def from_labels(cls, labels: pd.Index, layout: CategoryLayout) -> 'CategoryTree':
+        """
+        Parses a flat list of row labels into a tree, stripping note references into `notes`.
+
+        Args:
+            labels (pd.Index): The row labels in table order.
+            layout (CategoryLayout): The nesting declared for the table.
+
+        Returns:
+            CategoryTree: The parsed tree.
+        """
+        raw = labels.astype(str).to_series(index=range(len(labels)))
+        notes = raw.str.findall(NOTE_PATTERN).map(lambda found: tuple(int(note) for note in found))
+        cleaned = raw.str.replace(NOTE_PATTERN, '', regex=True).str.split().str.join(' ')
+        children = {normalize_label(name): {normalize_label(child) for child in kids}
+                    for name, kids in layout.children.items()}
+
+        parent = np.full(len(cleaned), -1, dtype=np.int32)
+        open_parents: list[int] = []
+        for row, key in enumerate(cleaned.str.casefold()):
+            # Close parents until one declares this row as a child
+            while open_parents and key not in children[cleaned.iloc[open_parents[-1]].casefold()]:
+                open_parents.pop()
+            if open_parents:
+                parent[row] = open_parents[-1]
+            if key in children:
+                open_parents.append(row)
+
+        return cls(cleaned.to_numpy(dtype=object), notes.to_numpy(dtype=object), parent)
+
+    def children(self, row: int) -> np.ndarray:
+        """Returns the row indices of the children of a row."""
+        return self.child_index[self.child_offsets[row]:self.child_offsets[row + 1]]
+
+    def row_of(self, path: str) -> int:
+        """Returns the row index of a category path such as 'Imports / Feedstocks'."""
+        return self._row_of_path[normalize_label(path)]
+
+    def check_matrix(self, layout: CategoryLayout) -> tuple[list[str], np.ndarray]:
+        """
+        Builds one row of coefficients per check, so that `matrix @ values` gives every residual.
+
+        Each check is `total - sum(sign * term)`; roll-ups compare every parent with its children.
+
+        Args:
+            layout (CategoryLayout): The layout whose identities and roll-ups to check.
+
+        Returns:
+            tuple[list[str], np.ndarray]: The check names and a (checks x categories) float64 matrix.
+
+        Raises:
+            KeyError: If an identity refers to a category path absent from the tree.
+        """
+        names = []
+        rows = []
+        if layout.rollups:
+            parents = np.flatnonzero(np.diff(self.child_offsets))
+            rollups = np.zeros((len(parents), len(self)))
+            rollups[np.arange(len(parents)), parents] = 1.0
+            rollups[np.searchsorted(parents, self.parent[self.child_index]), self.child_index] = -1.0
+            names.extend(f"{self.paths[row]} roll-up" for row in parents)
+            rows.append(rollups)
+        for identity in layout.identities:
+            coefficients = np.zeros((1, len(self)))
+            coefficients[0, self.row_of(identity.total)] = 1.0
+            for path, sign in identity.terms:
+                coefficients[0, self.row_of(path)] -= sign
+            names.append(identity.name)
+            rows.append(coefficients)
+        matrix = np.vstack(rows) if rows else np.zeros((0, len(self)))
+        return names, matrix
+
+
+def check_identities(
+        values: np.ndarray,
+        periods: pd.Index,
+        tree: CategoryTree,
+        layout: CategoryLayout,
+        tolerance: float = 0.1
+) -> pd.DataFrame:
+    """
+    Checks every roll-up and identity of a layout for every period at once, as one matrix product.
+
+    Args:
+        values (np.ndarray): The float64 block of categories x periods, in tree row order.
+        periods (pd.Index): The period labels of the columns of `values`.
+        tree (CategoryTree): The parsed category tree.
+        layout (CategoryLayout): The layout whose identities and roll-ups to check.
+        tolerance (float): The largest absolute residual accepted, allowing for rounding in published
+            figures (default is 0.1).
+
+    Returns:
+        pd.DataFrame: One row per failed check and period with 'check', 'period' and 'residual'
+            columns; empty if every identity holds. Periods with missing terms are not checked.
+    """
+    names, matrix = tree.check_matrix(layout)
+    missing = np.isnan(values)
+    residuals = matrix @ np.where(missing, 0.0, values)
+    # Checks with a missing term are left unchecked rather than failed
+    checked = ((matrix != 0) @ missing) == 0
+    checks, cols = np.nonzero(checked & (np.abs(residuals) > tolerance))
+    return pd.DataFrame({
+        'check': np.asarray(names, dtype=object)[checks],
+        'period': periods[cols],
+        'residual': residuals[checks, cols],
+    }, columns=['check', 'period', 'residual'])
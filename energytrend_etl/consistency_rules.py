@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from energytrend_etl.revisions import numeric_frame
+from energytrend_etl.energy_table import EnergyTable
+from energytrend_etl.preprocess_data import METADATA_COLUMNS, parse_period_columns
+
+
+# Columns of the per-rule, per-column result table
+RESULT_COLUMNS = ['rule', 'column', 'checked', 'failures', 'passed']
+
+# ET categories that are signed flows rather than quantities
+SIGNED_CATEGORIES = ('Stock change', 'Transfers', 'Statistical difference')
+
+
+@dataclass(frozen=True)
+class RuleContext:
+    """The inputs shared by every rule, prepared once per report."""
+    values: np.ndarray        # float64 block of categories x periods
+    periods: pd.Index         # period column labels, in release order
+    categories: pd.Index      # cleaned, unique category labels
+    df: pd.DataFrame          # the current wide DataFrame, including metadata columns
+    previous_df: pd.DataFrame # the previous wide DataFrame
+    quarters: np.ndarray      # boolean mask of the quarter columns among the periods
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, previous_df: pd.DataFrame, table: EnergyTable | None = None) -> 'RuleContext':
+        data = numeric_frame(df, table)
+        quarters = parse_period_columns(data.columns)['quarter'].notna().to_numpy()
+        return cls(data.to_numpy(), data.columns, data.index, df, previous_df, quarters)
+
+    def rows(self, include: tuple[str, ...] | None, exclude: tuple[str, ...]) -> np.ndarray:
+        """
+        Returns a boolean mask of the categories a rule applies to, shaped to broadcast over the
+        period columns, so rules mask their results rather than copy the selected rows of the block.
+        """
+        mask = np.isin(self.categories, include) if include is not None else np.ones(len(self.categories), bool)
+        return (mask & ~np.isin(self.categories, exclude))[:, None]
+
+    def quarterly(self, checked: np.ndarray, failures: np.ndarray) -> pd.DataFrame:
+        """
+        Builds the result rows of a rule evaluated on the quarter columns only; annual and other
+        period columns are reported as not checked.
+        """
+        all_checked = np.zeros(len(self.periods), np.int64)
+        all_failures = np.zeros(len(self.periods), np.int64)
+        all_checked[self.quarters], all_failures[self.quarters] = checked, failures
+        return _result(self.periods, all_checked, all_failures)
+
+
+def _result(columns: pd.Index | list, checked: np.ndarray | int, failures: np.ndarray | int) -> pd.DataFrame:
+    """Builds a rule's result rows, one per column."""
+    n_columns = len(columns)
+    return pd.DataFrame({
+        'column': np.asarray(columns, dtype=object),
+        'checked': np.broadcast_to(checked, n_columns).astype(np.int64),
+        'failures': np.broadcast_to(failures, n_columns).astype(np.int64),
+    })
+
+
+@dataclass(frozen=True)
+class NotNull:
+    """Every cell is present; blanks in period columns count as missing."""
+    name: str = 'not_null'
+
+    def evaluate(self, context: RuleContext) -> pd.DataFrame:
+        n_rows = len(context.categories)
+        period_result = _result(context.periods, n_rows, np.isnan(context.values).sum(axis=0))
+        metadata = context.df[[col for col in METADATA_COLUMNS if col in context.df.columns]]
+        metadata_missing = (metadata.isna() | (metadata == '')).sum().to_numpy()
+        return pd.concat([period_result, _result(metadata.columns, len(metadata), metadata_missing)])
+
+
+@dataclass(frozen=True)
+class TimeFormat:
+    """A metadata column holds timestamps in the given format."""
+    column: str = 'processed_date'
+    time_format: str = '%Y-%m-%d %H:%M:%S'
+    name: str = 'time_format'
+
+    def evaluate(self, context: RuleContext) -> pd.DataFrame:
+        if self.column not in context.df.columns:
+            return _result([self.column], 0, 1)
+        parsed = pd.to_datetime(context.df[self.column], format=self.time_format, errors='coerce')
+        return _result([self.column], len(parsed), parsed.isna().sum())
+
+
+@dataclass(frozen=True)
+class NumericRange:
+    """Values of the selected categories lie within [min_value, max_value]."""
+    min_value: float = -np.inf
+    max_value: float = np.inf
+    include: tuple[str, ...] | None = None
+    exclude: tuple[str, ...] = ()
+    name: str = 'numeric_range'
+
+    def evaluate(self, context: RuleContext) -> pd.DataFrame:
+        values, rows = context.values, context.rows(self.include, self.exclude)
+        present = ~np.isnan(values) & rows
+        # Comparisons with NaN are False, so missing cells never fail
+        out_of_range = ((values < self.min_value) | (values > self.max_value)) & rows
+        return _result(context.periods, present.sum(axis=0), out_of_range.sum(axis=0))
+
+
+@dataclass(frozen=True)
+class QuarterOnQuarterChange:
+    """No quarterly value moves by more than `max_relative_change` of its value in the preceding quarter."""
+    max_relative_change: float = 0.5
+    include: tuple[str, ...] | None = None
+    exclude: tuple[str, ...] = SIGNED_CATEGORIES
+    name: str = 'quarter_on_quarter_change'
+
+    def evaluate(self, context: RuleContext) -> pd.DataFrame:
+        values, rows = context.values[:, context.quarters], context.rows(self.include, self.exclude)
+        previous, current = values[:, :-1], values[:, 1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.subtract(current, previous)
+            np.abs(change, out=change)
+            np.divide(change, np.abs(previous), out=change)
+        # Changes from a zero or missing base are undefined and not checked
+        comparable = np.isfinite(change) & rows
+        exceeded = comparable & (change > self.max_relative_change)
+        # The first quarter has no predecessor
+        checked = np.concatenate([[0], comparable.sum(axis=0)])[:values.shape[1]]
+        failures = np.concatenate([[0], exceeded.sum(axis=0)])[:values.shape[1]]
+        return context.quarterly(checked, failures)
+
+
+@dataclass(frozen=True)
+class ZScoreOutlier:
+    """No quarterly value lies more than `threshold` standard deviations from its category's mean over all quarters."""
+    threshold: float = 4.0
+    include: tuple[str, ...] | None = None
+    exclude: tuple[str, ...] = ()
+    name: str = 'z_score_outlier'
+
+    def evaluate(self, context: RuleContext) -> pd.DataFrame:
+        values, rows = context.values[:, context.quarters], context.rows(self.include, self.exclude)
+        present = ~np.isnan(values) & rows
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.nanmean(values, axis=1, keepdims=True)
+            std = np.nanstd(values, axis=1, keepdims=True)
+            z_scores = np.subtract(values, mean)
+            np.abs(z_scores, out=z_scores)
+            np.divide(z_scores, std, out=z_scores)
+        # Constant categories (std 0) give non-finite z-scores and have no outliers
+        outliers = np.isfinite(z_scores) & (z_scores > self.threshold) & rows
+        return context.quarterly(present.sum(axis=0), outliers.sum(axis=0))
+
+
+@dataclass(frozen=True)
+class ColumnDrift:
+    """
+    Columns of the current release absent from the previous one ('new'), or the reverse ('missing').
+
+    Metadata columns are left out of both releases, as published snapshots do not keep them.
+    """
+    kind: str = 'new'
+    name: str = ''
+
+    def __post_init__(self):
+        if self.kind not in ('new', 'missing'):
+            raise ValueError(f"Unknown column drift kind: {self.kind}")
+        if not self.name:
+            object.__setattr__(self, 'name', f"{self.kind}_columns")
+
+    def evaluate(self, context: RuleContext) -> pd.DataFrame:
+        current = context.df.columns.difference(METADATA_COLUMNS, sort=False)
+        previous = context.previous_df.columns.difference(METADATA_COLUMNS, sort=False)
+        columns, other = (current, previous) if self.kind == 'new' else (previous, current)
+        return _result(columns, 1, ~columns.isin(other))
+
+
+# Rules applied by generate_data_consistency_report unless others are given
+DEFAULT_RULES = (
+    NotNull(),
+    TimeFormat(),
+    NumericRange(min_value=0, exclude=SIGNED_CATEGORIES),
+    QuarterOnQuarterChange(),
+    ZScoreOutlier(),
+    ColumnDrift('new'),
+    ColumnDrift('missing'),
+)
+
+
+def evaluate_rules(
+        df: pd.DataFrame,
+        previous_df: pd.DataFrame,
+        rules: tuple = DEFAULT_RULES,
+        table: EnergyTable | None = None
+) -> pd.DataFrame:
+    """
+    Evaluates a set of consistency rules over a wide DataFrame.
+
+    The period block is converted to a single float64 array once, and every rule is a handful
+    of NumPy reductions over it, so the cost grows with the number of cells rather than the
+    number of columns times the number of rules.
+
+    Args:
+        df (pd.DataFrame): The current wide DataFrame.
+        previous_df (pd.DataFrame): The previous wide DataFrame, used by column drift rules.
+        rules (tuple): The rules to evaluate (default is DEFAULT_RULES).
+        table (EnergyTable | None): The table of `df`, if already converted (default is None).
+
+    Returns:
+        pd.DataFrame: One row per rule and column with 'rule', 'column', 'checked', 'failures' and 'passed'.
+    """
+    context = RuleContext.build(df, previous_df, table)
+    results = [rule.evaluate(context).assign(rule=rule.name) for rule in rules]
+    report = pd.concat(results, ignore_index=True) if results else _result([], 0, 0).assign(rule='')
+    report['passed'] = report['failures'] == 0
+    return report[RESULT_COLUMNS]
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+
+
+# Metadata columns added by process_excel_data
+METADATA_COLUMNS = ['processed_date', 'filename']
+
+
+@dataclass(frozen=True)
+class EnergyTable:
+    """
+    A wide table held compactly: one contiguous float block of categories x periods, the category
+    and period labels as separate arrays, and the release metadata kept out of the rows.
+
+    The block is column-major, like the blocks pandas keeps columns in, so each period is one
+    contiguous run of values and `frame()` wraps the block without copying it. The flow converts
+    each processed sheet once and passes the table to validation, the consistency rules and the
+    reshape, which take their numbers from it, or from views of it. The pipeline keeps float64
+    tables; float32 ones are for callers holding many releases at once.
+    """
+    values: np.ndarray         # float64 or float32 block of categories x periods
+    categories: np.ndarray     # row labels, as in the processed DataFrame
+    periods: np.ndarray        # value column labels: periods, and per cent changes in the Main Table
+    metadata: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(
+            cls,
+            df: pd.DataFrame,
+            columns: np.ndarray | None = None,
+            dtype: type = np.float64
+    ) -> 'EnergyTable':
+        """
+        Converts a processed or published wide DataFrame, writing each column straight into the block.
+
+        Args:
+            df (pd.DataFrame): The wide DataFrame. Metadata columns are moved out of the rows;
+                blanks and placeholder text such as '(-)' become NaN.
+            columns (np.ndarray | None): A boolean mask of the columns to keep (default is None,
+                every column but the metadata).
+            dtype (type): np.float64, or np.float32 to halve the block at the cost of precision
+                beyond about seven significant digits (default is np.float64).
+
+        Returns:
+            EnergyTable: The table.
+        """
+        is_metadata = df.columns.isin(METADATA_COLUMNS)
+        metadata = {str(df.columns[i]): str(df.iat[0, i]) for i in np.flatnonzero(is_metadata) if len(df)}
+        keep = ~is_metadata if columns is None else np.asarray(columns, dtype=bool) & ~is_metadata
+        positions = np.flatnonzero(keep)
+
+        values = np.empty((len(df), len(positions)), dtype=dtype, order='F')
+        for j, position in enumerate(positions):
+            column = df.iloc[:, position]
+            if not pd.api.types.is_float_dtype(column.dtype):
+                column = pd.to_numeric(column, errors='coerce')
+            values[:, j] = column
+        return cls(values, df.index.to_numpy(), df.columns[positions].to_numpy(), metadata)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """The number of categories and periods."""
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        """The memory held by the block and the label arrays, not counting the label strings."""
+        return self.values.nbytes + self.categories.nbytes + self.periods.nbytes
+
+    def frame(self) -> pd.DataFrame:
+        """Wraps the block in a DataFrame indexed by category, without copying it."""
+        return pd.DataFrame(self.values, index=pd.Index(self.categories), columns=pd.Index(self.periods), copy=False)
+
+    def view(self, categories: slice = slice(None), periods: slice | np.ndarray = slice(None)) -> 'EnergyTable':
+        """
+        Selects a range of categories and periods, sharing this table's block rather than copying it.
+
+        Args:
+            categories (slice): The positions of the categories to keep (default is all).
+            periods (slice | np.ndarray): The positions of the periods to keep, or a boolean mask of
+                them (default is all). A mask shares the block when it selects one run of periods,
+                and is copied otherwise, e.g. for the periods between the per cent changes of the
+                Main Table.
+
+        Returns:
+            EnergyTable: A table over the same memory.
+        """
+        if isinstance(periods, np.ndarray):
+            positions = np.flatnonzero(periods)
+            if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+                periods = slice(int(positions[0]), int(positions[-1]) + 1)
+            elif not len(positions):
+                periods = slice(0, 0)
+        return EnergyTable(self.values[categories, periods], self.categories[categories],
+                           self.periods[periods], self.metadata)
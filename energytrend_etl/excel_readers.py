@@ -0,0 +1,100 @@
+import importlib.util
+import pandas as pd
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ExcelEngine:
+    """A pandas Excel reader backend and the module it needs."""
+    name: str
+    module: str
+    engine_kwargs: dict = field(default_factory=dict)
+
+    def available(self) -> bool:
+        """Tells whether the backend's module is installed."""
+        return importlib.util.find_spec(self.module) is not None
+
+
+# Excel reader backends, fastest first as measured by benchmarks/bench_readers.py
+ENGINES = {
+    # Rust parser; 5-10x faster than openpyxl on ET 3.1-shaped workbooks, for about twice the peak memory
+    'calamine': ExcelEngine('calamine', 'python_calamine'),
+    # Pure-Python parser, streaming rows from the read-only workbook
+    'openpyxl': ExcelEngine('openpyxl', 'openpyxl', {'read_only': True, 'data_only': True, 'keep_links': False}),
+}
+
+
+def available_engines() -> list[str]:
+    """
+    Lists the installed Excel reader backends, fastest first.
+
+    Returns:
+        list[str]: The names of the backends whose module can be imported.
+    """
+    return [name for name, engine in ENGINES.items() if engine.available()]
+
+
+def select_engine(engine: str | None = None) -> str:
+    """
+    Chooses the Excel reader backend to use.
+
+    Args:
+        engine (str | None): A backend to use, or None for the fastest installed backend.
+
+    Returns:
+        str: The name of the backend.
+
+    Raises:
+        ValueError: If the requested backend is unknown or not installed, or no backend is installed.
+    """
+    if engine is not None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown Excel engine '{engine}'. Choose from {sorted(ENGINES)}.")
+        if not ENGINES[engine].available():
+            raise ValueError(f"Excel engine '{engine}' needs the '{ENGINES[engine].module}' module, which is not installed.")
+        return engine
+    engines = available_engines()
+    if not engines:
+        raise ValueError(f"No Excel engine is installed. Install one of: {[e.module for e in ENGINES.values()]}.")
+    return engines[0]
+
+
+def open_workbook(file_path: str, engine: str | None = None) -> pd.ExcelFile:
+    """
+    Opens a workbook once so that several sheets can be parsed from it.
+
+    Args:
+        file_path (str): The path of the Excel workbook.
+        engine (str | None): The backend to use (default is the fastest installed backend).
+
+    Returns:
+        pd.ExcelFile: The open workbook; close it when done.
+    """
+    engine = select_engine(engine)
+    return pd.ExcelFile(file_path, engine=engine, engine_kwargs=ENGINES[engine].engine_kwargs)
+
+
+def read_sheet(
+        source: str | pd.ExcelFile,
+        sheet_name: str,
+        header: int,
+        engine: str | None = None
+) -> pd.DataFrame:
+    """
+    Parses one sheet of a workbook.
+
+    Args:
+        source (str | pd.ExcelFile): The path of the workbook, or a workbook opened by open_workbook.
+        sheet_name (str): The name of the sheet to read.
+        header (int): Row (0-indexed) to use for the column labels of the parsed DataFrame.
+        engine (str | None): The backend to use when `source` is a path (default is the fastest installed backend).
+
+    Returns:
+        pd.DataFrame: The parsed sheet.
+    """
+    # An open workbook already has its engine; note that pd.ExcelFile is itself os.PathLike
+    if not isinstance(source, str):
+        return pd.read_excel(source, sheet_name=sheet_name, header=header)
+    engine = select_engine(engine)
+    return pd.read_excel(source, sheet_name=sheet_name, header=header,
+                         engine=engine, engine_kwargs=ENGINES[engine].engine_kwargs)
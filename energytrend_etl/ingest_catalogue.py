@@ -0,0 +1,220 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import requests
+from collections import Counter
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from prefect import task
+from tenacity import RetryError
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.link_index import LinkIndex
+from energytrend_etl.ingest_data import download_file, fetch_link_index
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/ingest_catalogue.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+@dataclass(frozen=True)
+class CatalogueTarget:
+    """A dataset to ingest: the statistics page it is published on and the text of its link."""
+    url: str
+    html_name: str
+
+
+@dataclass
+class DownloadResult:
+    """The outcome of ingesting one catalogue target."""
+    target: CatalogueTarget
+    filename: str = ""
+    status: str = "not_found"  # One of 'downloaded', 'up_to_date', 'not_found' or 'failed'
+    bytes: int = 0
+    seconds: float = 0.0
+    error: str = ""  # Why the target failed, e.g. its page could not be fetched
+
+    @property
+    def throughput(self) -> float:
+        """Download throughput in bytes per second."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def create_session(pool_size: int = 16) -> requests.Session:
+    """
+    Creates a keep-alive HTTP session whose connection pool is shared by all worker threads.
+
+    Args:
+        pool_size (int): The maximum number of pooled connections per host (default is 16).
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    # Retries are handled by tenacity in fetch_html and download_file
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HostLimiter:
+    """Caps the number of in-flight requests to each host."""
+
+    def __init__(self, per_host_limit: int):
+        self.per_host_limit = per_host_limit
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._semaphores[host]
+
+
+def local_filenames(links: list[str]) -> dict[str, str]:
+    """
+    Names the local copy of each workbook after the last segment of its URL path.
+
+    Distinct links whose names collide, e.g. 'https://a.example/2024/et.xlsx' and
+    'https://b.example/2023/et.xlsx', are told apart by a short hash of the link, so neither
+    overwrites the other.
+
+    Args:
+        links (list[str]): The distinct workbook links.
+
+    Returns:
+        dict[str, str]: The filename of each link.
+    """
+    names = {link: os.path.basename(urlparse(link).path) for link in links}
+    counts = Counter(names.values())
+    for link, name in names.items():
+        if counts[name] > 1:
+            stem, extension = os.path.splitext(name)
+            names[link] = f"{stem}_{hashlib.sha256(link.encode()).hexdigest()[:8]}{extension}"
+    return names
+
+
+def _error_message(e: Exception) -> str:
+    """Describes an error, unwrapping the last error of a request that ran out of retries."""
+    if isinstance(e, RetryError) and e.last_attempt.exception() is not None:
+        e = e.last_attempt.exception()
+    return str(e)
+
+
+def _fetch_page_index(
+        url: str,
+        session: requests.Session,
+        limiter: HostLimiter
+) -> LinkIndex | str:
+    """Fetches the link index of one statistics page, returning the error message on failure."""
+    try:
+        return fetch_link_index(url, session, limiter)
+    except Exception as e:
+        message = f"Error fetching catalogue page {url}: {_error_message(e)}"
+        logger.error(message)
+        return message
+
+
+def _download_target(
+        link: str,
+        filename: str,
+        data_dir: str,
+        session: requests.Session,
+        limiter: HostLimiter
+) -> tuple[str, int, float, str]:
+    """Downloads one workbook unless it is up to date, returning (status, bytes, seconds, error)."""
+    file_path = os.path.join(data_dir, filename)
+    start = time.perf_counter()
+    try:
+        size = download_file(link, file_path, session, limiter)
+        if size is None:
+            logger.info("%s is already up-to-date.", filename)
+            return 'up_to_date', 0, time.perf_counter() - start, ""
+        seconds = time.perf_counter() - start
+        logger.info("Downloaded %s: %s bytes in %.3fs (%.2f MB/s)",
+                    filename, size, seconds, size / max(seconds, 1e-9) / 1e6)
+        return 'downloaded', size, seconds, ""
+    except Exception as e:
+        message = f"Error downloading {link}: {_error_message(e)}"
+        logger.error(message)
+        return 'failed', 0, time.perf_counter() - start, message
+
+
+# Prefect task
+@task(log_prints=True, tags=["ingest_data"])
+def ingest_catalogue(
+        targets: list[CatalogueTarget],
+        data_dir: str = './data',
+        max_workers: int = 8,
+        per_host_limit: int = 4
+) -> list[DownloadResult]:
+    """
+    Ingests many Excel datasets concurrently over one pooled keep-alive session.
+
+    Each statistics page is fetched once no matter how many targets it publishes, and every
+    distinct workbook is downloaded once on a bounded thread pool, with at most `per_host_limit`
+    requests in flight to any host. A request only holds its host's slot while it is in flight,
+    not while it waits to be retried. Targets whose page could not be fetched are reported as
+    'failed' with the error, rather than as 'not_found'.
+
+    Args:
+        targets (list[CatalogueTarget]): The (page URL, link text) pairs of the datasets to ingest.
+        data_dir (str): The directory where workbooks are saved (default is './data').
+        max_workers (int): The number of worker threads (default is 8).
+        per_host_limit (int): The maximum number of concurrent requests per host (default is 4).
+
+    Returns:
+        list[DownloadResult]: One result per target, in the order of `targets`.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    with create_session(pool_size=max(max_workers, per_host_limit)) as session, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        limiter = HostLimiter(per_host_limit)
+
+        # Fetch every distinct page once
+        pages = list(dict.fromkeys(target.url for target in targets))
+        page_indexes = dict(zip(pages, executor.map(lambda page: _fetch_page_index(page, session, limiter), pages)))
+
+        # Resolve targets to workbook links and download every distinct workbook once
+        target_links = {target: page_indexes[target.url].find(target.html_name) for target in targets
+                        if isinstance(page_indexes[target.url], LinkIndex)}
+        links = list(dict.fromkeys(link for link in target_links.values() if link))
+        filenames = local_filenames(links)
+        downloads = dict(zip(links, executor.map(
+            lambda link: _download_target(link, filenames[link], data_dir, session, limiter), links)))
+
+    results = []
+    for target in targets:
+        if target not in target_links:
+            results.append(DownloadResult(target, status='failed', error=page_indexes[target.url]))
+            continue
+        link = target_links[target]
+        if not link:
+            logger.info("Excel file '%s' not found on %s.", target.html_name, target.url)
+            results.append(DownloadResult(target))
+            continue
+        status, size, seconds, error = downloads[link]
+        results.append(DownloadResult(target, filenames[link], status, size, seconds, error))
+
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(size for _, size, _, _ in downloads.values())
+    logger.info(
+        "Catalogue ingestion complete: %s target(s), %s page(s), %s file(s), "
+        "%s bytes in %.3fs (%.2f MB/s, %.2f files/s)",
+        len(targets), len(pages), len(links),
+        total_bytes, elapsed, total_bytes / max(elapsed, 1e-9) / 1e6, len(links) / max(elapsed, 1e-9)
+    )
+    return results
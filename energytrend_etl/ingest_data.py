@@ -1,11 +1,13 @@
 import os
-import time
+import json
 import logging
 import requests
+import contextlib
+from typing import Callable, ContextManager
+from email.utils import formatdate
 from prefect import task
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
 from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.link_index import LinkIndex, PageIndexCache
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 
@@ -17,50 +19,203 @@ logger = setup_logger(
     log_format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Link indexes of the statistics pages, shared by all ingestion paths in this process
+page_index_cache = PageIndexCache()
+
+
+# Size of the blocks streamed from the response body to disk
+CHUNK_SIZE = 64 * 1024  # 64 KB
+
+
+def _metadata_path(path: str) -> str:
+    """Returns the path of the JSON file holding the HTTP validators of a downloaded file."""
+    return f"{path}.http.json"
+
+
+def load_http_metadata(path: str) -> dict:
+    """
+    Loads the stored HTTP validators (ETag and Last-Modified) of a downloaded file.
+
+    Args:
+        path (str): The local path of the downloaded (or partially downloaded) file.
+
+    Returns:
+        dict: The stored validators, or an empty dict if none are stored.
+    """
+    try:
+        with open(_metadata_path(path)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_http_metadata(path: str, response: requests.Response) -> None:
+    """Stores the validators of a response next to the file it was written to."""
+    metadata = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    tmp_path = f"{_metadata_path(path)}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(metadata, file)
+    os.replace(tmp_path, _metadata_path(path))
+
+
+def _remove_partial(part_path: str) -> None:
+    """Removes a partial download and its validators."""
+    for path in (part_path, _metadata_path(part_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _request_headers(save_path: str, part_path: str) -> dict:
+    """Builds the conditional and range headers for a download."""
+    # Resume an interrupted download of the same remote version with a range request
+    partial = load_http_metadata(part_path)
+    validator = partial.get('etag') or partial.get('last_modified')
+    if validator and os.path.exists(part_path) and os.path.getsize(part_path) > 0:
+        return {'Range': f'bytes={os.path.getsize(part_path)}-', 'If-Range': validator}
+
+    # Otherwise only transfer the body if the remote file changed since the local copy
+    headers = {}
+    if os.path.exists(save_path):
+        stored = load_http_metadata(save_path)
+        if stored.get('etag'):
+            headers['If-None-Match'] = stored['etag']
+        # HTTP dates are always GMT, so fall back to formatting the local mtime as such
+        headers['If-Modified-Since'] = stored.get('last_modified') or formatdate(os.path.getmtime(save_path), usegmt=True)
+    return headers
+
 
 # Retry logic for download
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def download_file(url: str, save_path: str) -> None:
+def download_file(
+        url: str, 
+        save_path: str, 
+        session: requests.Session | None = None, 
+        limiter: Callable[[str], ContextManager] | None = None
+) -> int | None:
     """
     Downloads a file from the specified URL and saves it to the provided path.
 
+    A single conditional GET is sent using the ETag/Last-Modified validators stored from the
+    previous download, so an unchanged file costs one round trip and no body. The body is
+    streamed to a partial file in fixed-size chunks and atomically renamed into place; if a
+    previous attempt was interrupted, the partial file is resumed with an HTTP range request.
+
     Args:
         url (str): The URL of the file to download.
         save_path (str): The local path to save the downloaded file.
+        session (requests.Session | None): Optional pooled session to reuse connections (default is None).
+        limiter (Callable[[str], ContextManager] | None): Optional per-host limit, held for each attempt
+            while its request and body are in flight but not between retries (default is None).
 
     Returns:
-        None
+        int | None: The number of bytes transferred, or None if the local file is already up to date.
     """
-    response = requests.get(url)
-    response.raise_for_status()
-    with open(save_path, 'wb') as file:
-        file.write(response.content)
-    logger.info(f'File {save_path} downloaded successfully.')
+    part_path = f"{save_path}.part"
+    with limiter(url) if limiter else contextlib.nullcontext():
+        return _download_attempt(url, save_path, part_path, session)
+
+
+def _download_attempt(url: str, save_path: str, part_path: str, session: requests.Session | None) -> int | None:
+    """Sends one conditional or range request for a file and streams its body into place."""
+    response = (session or requests).get(url, headers=_request_headers(save_path, part_path), stream=True, timeout=60)
+    try:
+        if response.status_code == 304:
+            _remove_partial(part_path)
+            logger.info("File %s is not modified on the server.", save_path)
+            return None
+        if response.status_code == 416:
+            # The partial file no longer matches the remote file; the retry starts over
+            _remove_partial(part_path)
+        response.raise_for_status()
+
+        # A 200 in reply to a range request means the remote file changed, so start over
+        resumed = response.status_code == 206
+        if not resumed:
+            _remove_partial(part_path)
+            _save_http_metadata(part_path, response)
+
+        transferred = 0
+        with open(part_path, 'ab' if resumed else 'wb') as file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                file.write(chunk)
+                transferred += len(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+    finally:
+        response.close()
+
+    os.replace(part_path, save_path)
+    os.replace(_metadata_path(part_path), _metadata_path(save_path))
+    logger.info("File %s downloaded successfully (%s bytes%s).", save_path, transferred, ", resumed" if resumed else "")
+    return transferred
 
 
 # Retry logic for initial HTML request
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def fetch_html(url: str) -> requests.Response:
+def fetch_html(
+        url: str, 
+        session: requests.Session | None = None, 
+        headers: dict | None = None, 
+        limiter: Callable[[str], ContextManager] | None = None
+) -> requests.Response:
     """
     Fetches the HTML content from the specified URL.
 
     Args:
         url (str): The URL of the webpage to fetch.
+        session (requests.Session | None): Optional pooled session to reuse connections (default is None).
+        headers (dict | None): Optional extra request headers, e.g. for a conditional request (default is None).
+        limiter (Callable[[str], ContextManager] | None): Optional per-host limit, held for each attempt
+            but not between retries (default is None).
 
     Returns:
         requests.Response: The response object containing the HTML content.
     """
-    response = requests.get(url)
+    with limiter(url) if limiter else contextlib.nullcontext():
+        response = (session or requests).get(url, headers=headers)
     response.raise_for_status()
     return response
 
 
+def fetch_link_index(
+        url: str, 
+        session: requests.Session | None = None, 
+        limiter: Callable[[str], ContextManager] | None = None
+) -> LinkIndex:
+    """
+    Fetches the index of Excel links on a webpage, reusing the cached index while the page's ETag is unchanged.
+
+    Args:
+        url (str): The URL of the webpage containing links to Excel files.
+        session (requests.Session | None): Optional pooled session to reuse connections (default is None).
+        limiter (Callable[[str], ContextManager] | None): Optional per-host limit, as for fetch_html (default is None).
+
+    Returns:
+        LinkIndex: The index of the page's Excel links.
+    """
+    etag = page_index_cache.etag(url)
+    response = fetch_html(url, session, headers={'If-None-Match': etag} if etag else None, limiter=limiter)
+    if response.status_code == 304:
+        cached = page_index_cache.get(url, etag)
+        if cached is not None:
+            logger.info("Page %s not modified, reusing its link index.", url)
+            return cached
+        response = fetch_html(url, session, limiter=limiter)
+
+    index = LinkIndex.from_html(response.content, url)
+    page_index_cache.put(url, response.headers.get('ETag'), index)
+    return index
+
+
 # Prefect task
 @task(log_prints=True, tags=["ingest_data"])
 def ingest_excel_files(url: str, html_name: str) -> str:
     """
-    Ingests Excel data by scraping the provided URL for a specific Excel file, checking if it's updated, 
-    and downloading it if necessary.
+    Ingests Excel data by scraping the provided URL for a specific Excel file and downloading it
+    with a conditional request, so an up-to-date local copy is not transferred again.
 
     Args:
         url (str): The URL of the webpage containing links to Excel files.
@@ -70,25 +225,8 @@ def ingest_excel_files(url: str, html_name: str) -> str:
         str: The filename of the downloaded Excel file.
     """
     try:
-        # Get the webpage HTML with retry logic
-        response = fetch_html(url)
-
-        # Parse the HTML using BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find all links that end with .xls or .xlsx
-        file_links = [
-            (urljoin(url, link.get('href')), link.text) 
-            for link in soup.find_all('a') 
-            if link.get('href') and link.get('href').endswith(('.xls', '.xlsx'))
-        ]
-
         # Find the link to the Excel file with the HTML name on the site.
-        target_link = None
-        for link, text in file_links:
-            if html_name in text:
-                target_link = link
-                break
+        target_link = fetch_link_index(url).find(html_name)
 
         if target_link:
             filename = os.path.basename(target_link)
@@ -97,26 +235,16 @@ def ingest_excel_files(url: str, html_name: str) -> str:
             # Create directory if it does not exist
             os.makedirs('./data', exist_ok=True)
 
-            # Check if file exists and is up to date
-            if os.path.exists(file_path):
-                local_mod_time = os.path.getmtime(file_path)
-                response = requests.head(target_link)
-                response.raise_for_status()
-                website_mod_time = time.mktime(time.strptime(response.headers['Last-Modified'], '%a, %d %b %Y %H:%M:%S %Z'))
-                
-                if website_mod_time <= local_mod_time:
-                    logger.info(f'{filename} is already up-to-date.')
-                    return filename
-            
-            # Download file if not up-to-date
-            download_file(target_link, file_path)
+            # Download file if it is missing or the server has a newer version
+            if download_file(target_link, file_path) is None:
+                logger.info("%s is already up-to-date.", filename)
             return filename
 
         else:
             logger.info('Excel file not found on the provided URL.')
 
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error during requests to {url}: {str(e)}")
+        logger.error("Error during requests to %s: %s", url, e)
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {str(e)}")
+        logger.error("An unexpected error occurred: %s", e)
     return ""
@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+import contextlib
+import contextvars
+import tracemalloc
+import pandas as pd
+from typing import Any, Iterator
+from datetime import datetime, timezone
+from dataclasses import dataclass, asdict
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.stage_cache import succeeded
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/instrumentation.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_METRICS_DIR = './metrics'
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = 'energytrend_etl'
+
+
+def _peak_rss_mb() -> float | None:
+    """The peak resident memory of the process so far, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _io_counters() -> tuple[int, int] | None:
+    """
+    The bytes the process has passed to read and write system calls so far, or None where
+    /proc is not available. This counts files, sockets and pipes alike, so it covers downloads.
+    """
+    try:
+        with open('/proc/self/io') as file:
+            counters = dict(line.split(': ') for line in file.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _cpu_seconds() -> float:
+    # Includes the CPU time of finished worker processes, e.g. those of process_workbook
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _frames(value: Any) -> list[pd.DataFrame]:
+    if isinstance(value, pd.DataFrame):
+        return [value]
+    if isinstance(value, dict):
+        return [frame for frame in value.values() if isinstance(frame, pd.DataFrame)]
+    return []
+
+
+@dataclass
+class StageMetrics:
+    """Resource usage of one run of a pipeline stage."""
+    stage: str
+    dataset: str = ''
+    status: str = 'running'
+    cached: bool = False
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_traced_mb: float | None = None
+    peak_rss_mb: float | None = None
+    rows: int | None = None
+    cells: int | None = None
+    bytes_read: int | None = None
+    bytes_written: int | None = None
+
+    def observe(self, value: Any, *inputs: Any) -> None:
+        """
+        Records the outcome of the stage and the size of the data it handled.
+
+        Args:
+            value (Any): The value returned by the stage; failures follow the pipeline's empty-result convention.
+            *inputs (Any): The stage's arguments, sized instead when the value holds no DataFrame.
+        """
+        self.status = 'succeeded' if succeeded(value) else 'failed'
+        frames = _frames(value) or [frame for arg in inputs for frame in _frames(arg)]
+        if frames:
+            self.rows = sum(len(frame) for frame in frames)
+            self.cells = sum(frame.size for frame in frames)
+
+
+class RunMetrics:
+    """
+    Collects the wall time, CPU time, peak memory, data size and I/O of every stage of a pipeline
+    run, and writes them as a JSON-lines record and a Prometheus textfile-collector file.
+
+    CPU time and I/O are those of the whole process while the stage runs, so they include any
+    stages running concurrently. Peak resident memory is the high-water mark of the process so
+    far. `trace_memory` additionally traces Python allocations from the start of the run until it
+    is written, at some cost in speed; as tracemalloc cannot tell threads apart, a stage's peak
+    is only recorded if no other stage ran while it did.
+    """
+
+    def __init__(self, metrics_dir: str = DEFAULT_METRICS_DIR, trace_memory: bool = False):
+        """
+        Args:
+            metrics_dir (str): The directory to write 'runs.jsonl' and 'energytrend_etl.prom' to (default is './metrics').
+            trace_memory (bool): Whether to trace the peak of Python allocations in each stage (default is False).
+        """
+        self.metrics_dir = metrics_dir
+        self.trace_memory = trace_memory
+        self.run_id = uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: list[StageMetrics] = []
+        # A context variable, so stages running concurrently for different datasets keep their own label
+        self._dataset = contextvars.ContextVar(f"dataset_{self.run_id}", default='')
+        # Stages being measured, and those that ran alongside another, whose traced peak is shared
+        self._active: list[StageMetrics] = []
+        self._overlapped: set[int] = set()
+        self._lock = threading.Lock()
+        # Keep tracing if something else, such as a benchmark, already traces allocations
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def dataset(self, name: str) -> Iterator[None]:
+        """Labels the stages measured within the block with the dataset they process."""
+        token = self._dataset.set(name)
+        try:
+            yield
+        finally:
+            self._dataset.reset(token)
+
+    @contextlib.contextmanager
+    def measure(self, stage: str) -> Iterator[StageMetrics]:
+        """
+        Measures the stage run within the block.
+
+        Args:
+            stage (str): The name of the stage.
+
+        Yields:
+            StageMetrics: The record of the stage; call its `observe` with the stage's result.
+        """
+        record = StageMetrics(stage, self._dataset.get())
+        with self._lock:
+            self.stages.append(record)
+            if self._active:
+                self._overlapped.update(id(active) for active in (*self._active, record))
+            elif tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            self._active.append(record)
+        io_before = _io_counters()
+        cpu_before = _cpu_seconds()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.status = 'error'
+            raise
+        finally:
+            record.wall_s = time.perf_counter() - start
+            record.cpu_s = _cpu_seconds() - cpu_before
+            io_after = _io_counters()
+            if io_before and io_after:
+                record.bytes_read = io_after[0] - io_before[0]
+                record.bytes_written = io_after[1] - io_before[1]
+            with self._lock:
+                self._active.remove(record)
+                if tracemalloc.is_tracing() and id(record) not in self._overlapped:
+                    record.peak_traced_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                self._overlapped.discard(id(record))
+            record.peak_rss_mb = _peak_rss_mb()
+
+    def summary(self) -> dict:
+        """
+        Summarizes the run so far.
+
+        Returns:
+            dict: The run id, start time, total wall time, overall status and the metrics of every stage.
+        """
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.isoformat(),
+            'wall_s': time.perf_counter() - self._start,
+            'status': 'succeeded' if self.stages and all(s.status == 'succeeded' for s in self.stages) else 'failed',
+            'stages': [asdict(stage) for stage in self.stages],
+        }
+
+    def prometheus(self) -> str:
+        """
+        Renders the run in the Prometheus text exposition format.
+
+        Returns:
+            str: Gauges for the run and for each stage, labelled by stage and dataset.
+        """
+        summary = self.summary()
+        lines = []
+
+        def gauge(name: str, help_text: str, samples: list[tuple[dict, float | None]]) -> None:
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                return
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{rendered}}} {float(value)!r}" if rendered
+                             else f"{METRIC_PREFIX}_{name} {float(value)!r}")
+
+        gauge('last_run_timestamp_seconds', 'Start time of the last pipeline run.', [({}, self.started_at.timestamp())])
+        gauge('last_run_wall_seconds', 'Wall time of the last pipeline run.', [({}, summary['wall_s'])])
+        gauge('last_run_success', 'Whether every stage of the last pipeline run succeeded.',
+              [({}, summary['status'] == 'succeeded')])
+
+        stages = [({'stage': s.stage, 'dataset': s.dataset}, s) for s in self.stages]
+        for name, attribute, help_text in (
+                ('stage_success', 'status', 'Whether the stage succeeded in the last run.'),
+                ('stage_cached', 'cached', 'Whether the stage reused a cached result in the last run.'),
+                ('stage_wall_seconds', 'wall_s', 'Wall time of the stage in the last run.'),
+                ('stage_cpu_seconds', 'cpu_s', 'CPU time of the process during the stage in the last run.'),
+                ('stage_peak_traced_bytes', 'peak_traced_mb', 'Peak of Python allocations traced during the stage.'),
+                ('stage_peak_rss_bytes', 'peak_rss_mb', 'Peak resident memory of the process after the stage.'),
+                ('stage_rows', 'rows', 'Rows of data handled by the stage in the last run.'),
+                ('stage_cells', 'cells', 'Cells of data handled by the stage in the last run.'),
+                ('stage_read_bytes', 'bytes_read', 'Bytes read by the process during the stage.'),
+                ('stage_written_bytes', 'bytes_written', 'Bytes written by the process during the stage.')):
+            samples = []
+            for labels, stage in stages:
+                value = getattr(stage, attribute)
+                if attribute == 'status':
+                    value = value == 'succeeded'
+                elif attribute.endswith('_mb') and value is not None:
+                    value = value * 2 ** 20
+                samples.append((labels, value))
+            gauge(name, help_text, samples)
+        return '\n'.join(lines) + '\n'
+
+    def write(self) -> None:
+        """
+        Appends the run to 'runs.jsonl' and replaces 'energytrend_etl.prom' in the metrics directory,
+        and stops tracing allocations if the run started it.
+
+        Failures are logged rather than raised, so metrics never fail a pipeline run.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with open(os.path.join(self.metrics_dir, 'runs.jsonl'), 'a') as file:
+                file.write(json.dumps(self.summary()) + '\n')
+
+            # The textfile collector may read at any time, so the file is replaced atomically
+            prom_path = os.path.join(self.metrics_dir, f"{METRIC_PREFIX}.prom")
+            with open(f"{prom_path}.tmp", 'w') as file:
+                file.write(self.prometheus())
+            os.replace(f"{prom_path}.tmp", prom_path)
+            logger.info("Run metrics written to %s", self.metrics_dir)
+        except OSError as e:
+            logger.error("Could not write run metrics: %s", e)
+
+
+def _escape(label: str) -> str:
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,90 @@
+import re
+import threading
+import importlib.util
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+# Use the C-accelerated lxml parser when it is installed
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Only anchors linking to Excel workbooks are built into the tree
+EXCEL_ANCHORS = SoupStrainer('a', href=re.compile(r'\.xlsx?$'))
+
+
+class LinkIndex:
+    """
+    An index of the Excel links on one webpage, answering many link-text lookups from one parse.
+    """
+
+    def __init__(self, links: list[tuple[str, str]]):
+        """
+        Args:
+            links (list[tuple[str, str]]): The (absolute URL, link text) pairs in document order.
+        """
+        self.links = links
+        # Memoised lookups, so repeated names are answered without rescanning the page's links
+        self._matches: dict[str, str | None] = {}
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def find(self, html_name: str) -> str | None:
+        """
+        Finds the link whose text contains the HTML name.
+
+        Args:
+            html_name (str): The name or part of the name of the link text of the target Excel file.
+
+        Returns:
+            str | None: The URL of the first matching link in document order, or None if there is no match.
+        """
+        if html_name not in self._matches:
+            self._matches[html_name] = next((link for link, text in self.links if html_name in text), None)
+        return self._matches[html_name]
+
+    @classmethod
+    def from_html(cls, content: bytes, url: str) -> 'LinkIndex':
+        """
+        Builds an index from a webpage, parsing only the anchors that link to .xls or .xlsx files.
+
+        Args:
+            content (bytes): The HTML content of the webpage.
+            url (str): The URL of the webpage, used to resolve relative links.
+
+        Returns:
+            LinkIndex: The index of the page's Excel links.
+        """
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=EXCEL_ANCHORS)
+        return cls([(urljoin(url, anchor['href']), anchor.text) for anchor in soup.find_all('a')])
+
+
+class PageIndexCache:
+    """A thread-safe cache of link indexes keyed on page URL and validated by the page's ETag."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[str, LinkIndex]] = {}
+        self._lock = threading.Lock()
+
+    def etag(self, url: str) -> str | None:
+        """Returns the ETag the cached index of a page was built from, if any."""
+        with self._lock:
+            entry = self._entries.get(url)
+        return entry[0] if entry else None
+
+    def get(self, url: str, etag: str | None) -> LinkIndex | None:
+        """Returns the cached index of a page if it was built from the given ETag."""
+        with self._lock:
+            entry = self._entries.get(url)
+        return entry[1] if entry and etag and entry[0] == etag else None
+
+    def put(self, url: str, etag: str | None, index: LinkIndex) -> None:
+        """Caches the index of a page; pages without an ETag are not cached."""
+        if etag:
+            with self._lock:
+                self._entries[url] = (etag, index)
+
+    def clear(self) -> None:
+        """Drops all cached indexes."""
+        with self._lock:
+            self._entries.clear()
@@ -1,6 +1,73 @@
 import os
+import json
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class DeferredRotatingFileHandler(RotatingFileHandler):
+    """A rotating file handler that creates its directory and opens its file on the first record."""
+
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, with the time, level, logger, process and message."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records unformatted, so messages and their arguments are only formatted by the
+    listener thread. Only for queues within one process, as arguments are not pickled.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _QueueLogging:
+    """The state of queue logging in this process: the handler loggers write to, and any listeners."""
+
+    def __init__(self, handler: logging.Handler, level: int, listeners: list[QueueListener], handlers: list[logging.Handler]):
+        self.handler = handler
+        self.level = level
+        self.listeners = listeners
+        self.handlers = handlers
+        self.worker_queue = None
+
+
+# Loggers set up by setup_logger, mapped to their own handlers, so queue logging can reroute them
+_loggers: dict[str, list[logging.Handler]] = {}
+
+# Queue logging of this process, if started
+_queue_logging: _QueueLogging | None = None
+
+
+def _route_loggers(handler: logging.Handler | None) -> None:
+    """Points every logger set up by setup_logger at `handler`, or back at its own handlers if None."""
+    for name, handlers in _loggers.items():
+        logging.getLogger(name).handlers = [handler] if handler else list(handlers)
+
 
 def setup_logger(
     name: str,
@@ -13,6 +80,10 @@ def setup_logger(
     """
     Sets up a logger for the application with file and console handlers, including log rotation.
 
+    The log directory and file are only created when the first record is written, so importing
+    a module that sets up a logger has no filesystem side effects. While queue logging is
+    started (see start_queue_logging), the logger writes to the shared queue instead.
+
     Args:
         name (str): The name of the logger.
         log_file (str): The file path for logging output.
@@ -24,16 +95,12 @@ def setup_logger(
     Returns:
         logging.Logger: A configured logger instance.
     """
-    # Create log directory if it does not exist
-    if not os.path.exists(os.path.dirname(log_file)):
-        os.makedirs(os.path.dirname(log_file))
-
     # Create a logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
     # Rotating file handler for logging to file with rotation
-    rotating_file_handler = RotatingFileHandler(
+    rotating_file_handler = DeferredRotatingFileHandler(
         log_file, maxBytes=max_bytes, backupCount=backup_count
     )
     rotating_file_handler.setLevel(level)
@@ -48,8 +115,105 @@ def setup_logger(
     console_handler.setFormatter(formatter)
 
     # Add handlers to the logger if they are not already added
-    if not logger.handlers:
-        logger.addHandler(rotating_file_handler)
-        logger.addHandler(console_handler)
+    if name not in _loggers:
+        _loggers[name] = [rotating_file_handler, console_handler]
+        if _queue_logging is not None:
+            logger.handlers = [_queue_logging.handler]
+        elif not logger.handlers:
+            logger.addHandler(rotating_file_handler)
+            logger.addHandler(console_handler)
 
     return logger
+
+
+def start_queue_logging(
+    log_file: str = './logs/pipeline.jsonl',
+    level: int = logging.INFO,
+    console: bool = True,
+    max_bytes: int = 50 * 1024 * 1024,  # 50 MB
+    backup_count: int = 5
+) -> None:
+    """
+    Routes every logger set up by setup_logger through a queue to one background listener thread
+    that writes JSON lines to a single file, so logging calls never wait on disk I/O.
+
+    Records are enqueued unformatted and formatted by the listener, so pass values as logging
+    arguments (logger.info("... %s", value)) rather than in f-strings to defer their formatting.
+    Worker processes started with queue_logging_initializer log to the same file through a
+    multiprocessing queue.
+
+    Args:
+        log_file (str): The file path for the JSON-lines log (default is './logs/pipeline.jsonl').
+        level (int): The logging level (default is logging.INFO).
+        console (bool): Whether to also log to the console in the usual text format (default is True).
+        max_bytes (int): The maximum size of the log file before rotating (default is 50 MB).
+        backup_count (int): The number of backup log files to keep (default is 5).
+    """
+    global _queue_logging
+    if _queue_logging is not None:
+        return
+
+    file_handler = DeferredRotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+    for handler in handlers:
+        handler.setLevel(level)
+
+    record_queue = queue.SimpleQueue()
+    listener = QueueListener(record_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _queue_logging = _QueueLogging(DeferredQueueHandler(record_queue), level, [listener], handlers)
+    _route_loggers(_queue_logging.handler)
+
+
+def stop_queue_logging() -> None:
+    """
+    Writes out every queued record, stops the listeners and points the loggers back at their own files.
+    """
+    global _queue_logging
+    if _queue_logging is None:
+        return
+    state, _queue_logging = _queue_logging, None
+    _route_loggers(None)
+    for listener in state.listeners:
+        listener.stop()
+    for handler in state.handlers:
+        handler.close()
+    if state.worker_queue is not None:
+        state.worker_queue.close()
+        state.worker_queue.join_thread()
+
+
+def queue_logging_initializer() -> tuple:
+    """
+    Returns the initializer and arguments with which worker processes join queue logging, e.g.
+    ProcessPoolExecutor(..., initializer=initializer, initargs=initargs).
+
+    Workers format their messages before sending them, so arguments need not be picklable, and
+    the listener thread in this process writes them out, so processes never write to the log
+    file concurrently.
+
+    Returns:
+        tuple: (initializer, initargs), or (None, ()) if queue logging is not started.
+    """
+    if _queue_logging is None or not _queue_logging.listeners:
+        return None, ()
+    if _queue_logging.worker_queue is None:
+        import multiprocessing
+        _queue_logging.worker_queue = multiprocessing.get_context('spawn').Queue()
+        listener = QueueListener(_queue_logging.worker_queue, *_queue_logging.handlers, respect_handler_level=True)
+        listener.start()
+        _queue_logging.listeners.append(listener)
+    return _start_worker_logging, (_queue_logging.worker_queue, _queue_logging.level)
+
+
+def _start_worker_logging(worker_queue, level: int) -> None:
+    """Runs in a worker process: routes its loggers to the parent's listener."""
+    global _queue_logging
+    handler = QueueHandler(worker_queue)
+    _queue_logging = _QueueLogging(handler, level, [], [])
+    _route_loggers(handler)
@@ -1,11 +1,23 @@
+import os
 import logging
 import argparse
+import contextlib
+import pandas as pd
+from concurrent.futures import Executor
 from prefect import flow
-from energytrend_etl.logger_config import setup_logger
-from energytrend_etl.validation import validate_data
-from energytrend_etl.save_to_csv import save_data_to_csv
+from energytrend_etl.orchestration import SequentialExecutor, cancel, submit, task_runner
+from energytrend_etl.logger_config import setup_logger, start_queue_logging, stop_queue_logging
+from energytrend_etl.validation import revisions_path, validate_data
+from energytrend_etl.revisions import publish_snapshot, snapshot_path
+from energytrend_etl.save_to_csv import save_data
+from energytrend_etl.warehouse import save_data_to_warehouse, sheet_filename
+from energytrend_etl.category_tree import dataset_layout
+from energytrend_etl.vintages import save_data_to_vintage_store
+from energytrend_etl.stage_cache import StageCache, frame_digest, path_digest
+from energytrend_etl.instrumentation import DEFAULT_METRICS_DIR, RunMetrics
+from energytrend_etl.energy_table import METADATA_COLUMNS, EnergyTable
 from energytrend_etl.ingest_data import ingest_excel_files
-from energytrend_etl.preprocess_data import process_excel_data
+from energytrend_etl.preprocess_data import process_workbook, reshape_to_long
 from energytrend_etl.validation_report import generate_data_profiling_report, generate_data_consistency_report
 
 
@@ -17,60 +29,331 @@ logger = setup_logger(
 )
 
 
+# Sheets of the ET 3.1 workbook and the row (0-indexed) holding their column labels
+DEFAULT_SHEETS = {'Quarter': 4}
+WORKBOOK_SHEETS = {'Quarter': 4, 'Annual': 4, 'Main Table': 3}
+
+def profiling_outputs(save_path_html: str) -> list[str]:
+    """Lists the files written by generate_data_profiling_report: its HTML report and CSV statistics."""
+    return [save_path_html, save_path_html.replace('_data_profiling.html', '_data_profiling.csv')]
+
+
+def _save_to_warehouse(
+        cache: StageCache, 
+        sheet_name: str, 
+        long_df: pd.DataFrame, 
+        output_name: str, 
+        warehouse: str
+) -> bool:
+    """
+    Upserts a sheet into the warehouse, then records it in the vintage store; both write one database, so in turn.
+
+    Neither is cached, as the cache cannot tell whether the database still holds the rows; both
+    only write the rows that changed.
+    """
+    # Upsert changed rows into the warehouse
+    if cache.run('save_data_to_warehouse', None, save_data_to_warehouse, long_df, output_name, warehouse) < 0:
+        logger.error("Failed to save sheet '%s' to the warehouse. Exiting pipeline.", sheet_name)
+        return False
+
+    # Record the release in the vintage store, so every earlier release stays queryable
+    if cache.run('save_data_to_vintage_store', None, save_data_to_vintage_store, long_df, output_name, warehouse) < 0:
+        logger.error("Failed to record sheet '%s' in the vintage store. Exiting pipeline.", sheet_name)
+        return False
+    return True
+
+
+def process_sheet(
+        cache: StageCache, 
+        filename: str, 
+        sheet_name: str, 
+        header: int, 
+        df: pd.DataFrame, 
+        output_path: str, 
+        layout: str, 
+        formats: list[str] | None, 
+        warehouse: str | None, 
+        compression: str | None = None, 
+        executor: Executor | None = None
+) -> bool:
+    """
+    Runs the stages after preprocessing for one sheet: validation, saving, publishing and reports.
+
+    The stages form a graph: validation and reshaping run side by side; once both succeed, the
+    warehouse, the save and both reports, which only read the processed frame and the previous
+    release, overlap; the snapshot is published once the data is stored and saved. Failures are
+    reported in stage order, and stages that have not started by then are cancelled.
+
+    Args:
+        cache (StageCache): The stage cache of the run.
+        filename (str): The name of the ingested workbook.
+        sheet_name (str): The name of the sheet.
+        header (int): The row (0-indexed) holding the sheet's column labels.
+        df (pd.DataFrame): The preprocessed sheet.
+        output_path (str): The directory path where the output files will be saved.
+        layout (str): 'wide' or 'long', as for main.
+        formats (list[str] | None): Output formats to write, as for main.
+        warehouse (str | None): Path of a SQLite warehouse to upsert the data into, as for main.
+        compression (str | None): Compression of the CSV output, as for main.
+        executor (Executor | None): Runs the stages (default is None, each stage in turn).
+
+    Returns:
+        bool: True if every stage succeeded; False after logging the stage that failed.
+    """
+    executor = executor or SequentialExecutor()
+    output_name = sheet_filename(filename, sheet_name)
+    save_filename = os.path.splitext(output_name)[0]
+    # Stages are keyed on the sheet's data, as its processed_date changes on every run
+    df_digest = frame_digest(df.drop(columns=METADATA_COLUMNS, errors='ignore'))
+    # The sheet's numbers are converted once, for validation, the reshape and the consistency rules
+    table = EnergyTable.from_frame(df)
+
+    # Validate data, and reshape to tidy rows if requested or needed by the warehouse
+    snapshot_dir = os.path.join(output_path, 'snapshots')
+    snapshot_digests = (path_digest(snapshot_path(output_name, snapshot_dir)), 
+                        path_digest(snapshot_path(output_name, snapshot_dir, previous=True)))
+    validated = submit(executor, cache.run, 'validate_data', (df_digest, output_name, *snapshot_digests), 
+                       validate_data, filename, df, sheet_name, header, snapshot_dir, dataset=output_name, 
+                       table=table, outputs=lambda _: [revisions_path(output_name)])
+    reshaped = None
+    if layout == 'long' or warehouse:
+        # Not cached: every long row carries the run's processed_date
+        reshaped = submit(executor, cache.run, 'reshape_to_long', None, reshape_to_long, df, table)
+
+    previous_df = validated.result()
+    if previous_df.empty:
+        cancel(reshaped)
+        logger.error("Data validation failed for sheet '%s'. Exiting pipeline.", sheet_name)
+        return False
+
+    long_df = None
+    if reshaped is not None:
+        long_df = reshaped.result()
+        if long_df.empty:
+            logger.error("Failed to reshape sheet '%s' to long format. Exiting pipeline.", sheet_name)
+            return False
+    output_df = long_df if layout == 'long' else df
+
+    # Store, save and report on the validated data at once
+    stored = None
+    if warehouse:
+        stored = submit(executor, _save_to_warehouse, cache, sheet_name, long_df, output_name, warehouse)
+    # Saving is not cached: its manifest already skips outputs whose content and file are unchanged
+    saved = submit(executor, cache.run, 'save_data', None, 
+                   save_data, output_df, output_name, output_path, formats, compression)
+    profiled = submit(executor, cache.run, 'generate_data_profiling_report', (df_digest, save_filename), 
+                      generate_data_profiling_report, df, save_filename, outputs=profiling_outputs)
+    checked = submit(executor, cache.run, 'generate_data_consistency_report', 
+                     (df_digest, frame_digest(previous_df), save_filename), 
+                     generate_data_consistency_report, df, previous_df, save_filename, table=table, 
+                     outputs=lambda path: [path])
+
+    if stored is not None and not stored.result():
+        cancel(saved, profiled, checked)
+        return False
+
+    if not saved.result():
+        cancel(profiled, checked)
+        logger.error("Failed to save sheet '%s'. Exiting pipeline.", sheet_name)
+        return False
+
+    # Publish the saved data as the baseline for revision detection in the next release
+    if not cache.run('publish_snapshot', (df_digest, output_name, snapshot_dir), 
+                     publish_snapshot, df, output_name, snapshot_dir, outputs=lambda path: [path]):
+        cancel(profiled, checked)
+        logger.error("Failed to publish snapshot of sheet '%s'. Exiting pipeline.", sheet_name)
+        return False
+
+    # Wait for the data profiling report and consistency report
+    if not profiled.result():
+        cancel(checked)
+        logger.error("Failed to generate data profiling report for sheet '%s'. Exiting pipeline.", sheet_name)
+        return False
+
+    if not checked.result():
+        logger.error("Failed to generate data consistency report for sheet '%s'. Exiting pipeline.", sheet_name)
+        return False
+
+    return True
+
+
+def process_sheets(
+        cache: StageCache, 
+        filename: str, 
+        frames: dict[str, pd.DataFrame], 
+        sheets: dict[str, int], 
+        output_path: str, 
+        layout: str, 
+        formats: list[str] | None, 
+        warehouse: str | None, 
+        compression: str | None = None, 
+        max_workers: int = 1, 
+        metrics: RunMetrics | None = None
+) -> bool:
+    """
+    Maps process_sheet over the sheets of a workbook, running up to `max_workers` stages at once.
+
+    Args:
+        cache (StageCache): The stage cache of the run.
+        filename (str): The name of the ingested workbook.
+        frames (dict[str, pd.DataFrame]): The preprocessed sheets, keyed by sheet name.
+        sheets (dict[str, int]): The sheets to process, mapped to the row (0-indexed) holding their column labels.
+        output_path (str): The directory path where the output files will be saved.
+        layout (str): 'wide' or 'long', as for main.
+        formats (list[str] | None): Output formats to write, as for main.
+        warehouse (str | None): Path of a SQLite warehouse to upsert the data into, as for main.
+        compression (str | None): Compression of the CSV output, as for main.
+        max_workers (int): The number of stages run at once; 1 runs every stage in turn, sheet by sheet (default is 1).
+        metrics (RunMetrics | None): Labels the stages of each sheet with its dataset (default is None).
+
+    Returns:
+        bool: True if every sheet succeeded; False once a sheet failed, in sheet order.
+    """
+    # Sheets wait on their stages, so they get their own runner rather than taking workers from
+    # the stages, and finish before the stage runner shuts down
+    sheet_workers = len(sheets) if max_workers > 1 else 1
+    with task_runner(max_workers) as stage_runner, task_runner(sheet_workers) as sheet_runner:
+        processed = {}
+        for sheet_name, header in sheets.items():
+            with metrics.dataset(sheet_filename(filename, sheet_name)) if metrics else contextlib.nullcontext():
+                processed[sheet_name] = submit(sheet_runner, process_sheet, cache, filename, sheet_name, header, 
+                                               frames[sheet_name], output_path, layout, formats, warehouse, 
+                                               compression, stage_runner)
+        for future in processed.values():
+            if not future.result():
+                cancel(*processed.values())
+                return False
+    return True
+
+
 # Prefect flow
 @flow(name="Energy Trend Data ETL")
-def main(output_path: str) -> None:
+def main(
+        output_path: str, 
+        layout: str = 'wide', 
+        formats: list[str] | None = None, 
+        warehouse: str | None = None, 
+        use_cache: bool = True, 
+        sheets: dict[str, int] | None = None, 
+        metrics_dir: str = DEFAULT_METRICS_DIR, 
+        trace_memory: bool = False, 
+        json_log: str | None = None, 
+        compression: str | None = None, 
+        max_workers: int = 1
+) -> None:
     """
     Main function for the data pipeline.
 
     Args:
         output_path (str): The directory path where the output file will be saved.
+        layout (str): 'wide' to save one column per period, or 'long' to save tidy
+            (category, year, quarter, value) rows (default is 'wide').
+        formats (list[str] | None): Output formats to write, any of 'csv', 'parquet'
+            and 'feather' (default is ['csv']).
+        warehouse (str | None): Path of a SQLite warehouse to upsert the data into (default is None, no warehouse).
+        use_cache (bool): Skip stages whose inputs are unchanged since a previous successful run (default is True).
+        sheets (dict[str, int] | None): The sheets to process, mapped to the row (0-indexed) holding their
+            column labels (default is {'Quarter': 4}). Sheets other than 'Quarter' are saved under the
+            workbook name suffixed with the sheet name.
+        metrics_dir (str): The directory to write the run's per-stage metrics to, as a JSON-lines
+            record and a Prometheus textfile (default is './metrics').
+        trace_memory (bool): Also trace the peak of Python allocations in each stage, which slows
+            the run down; only with one worker, as stages running at once share one trace (default is False).
+        json_log (str | None): Path of a JSON-lines log that every module logs to through a background
+            thread, instead of each writing its own file (default is None, per-module log files).
+        compression (str | None): Compress the CSV output with 'gzip' or 'zstd' (default is None, uncompressed).
+        max_workers (int): The number of stages run at once, across and within sheets; 1 runs
+            every stage in turn (default is 1, as the stages barely overlap in practice; see
+            benchmarks/bench_flow.py).
+
+    Raises:
+        ValueError: If `trace_memory` is set with more than one worker.
     """
-    
-    sheet_name = 'Quarter'
-    header = 4
+    if trace_memory and max_workers > 1:
+        raise ValueError("trace_memory needs max_workers=1: stages running at once share one allocation trace")
+    if json_log:
+        start_queue_logging(json_log)
+    metrics = RunMetrics(metrics_dir, trace_memory)
+    try:
+        _run_pipeline(metrics, output_path, layout, formats, warehouse, use_cache, sheets or DEFAULT_SHEETS, 
+                      compression, max_workers)
+    finally:
+        metrics.write()
+        if json_log:
+            stop_queue_logging()
+
+
+def _run_pipeline(
+        metrics: RunMetrics, 
+        output_path: str, 
+        layout: str, 
+        formats: list[str] | None, 
+        warehouse: str | None, 
+        use_cache: bool, 
+        sheets: dict[str, int], 
+        compression: str | None = None, 
+        max_workers: int = 1
+) -> None:
     url = 'https://www.gov.uk/government/statistics/oil-and-oil-products-section-3-energy-trends'
     html_name = "Supply and use of crude oil, natural gas liquids and feedstocks (ET 3.1 - quarterly)"
     
     # Ingest data
-    filename = ingest_excel_files(url, html_name)
+    with metrics.measure('ingest_excel_files') as record:
+        filename = ingest_excel_files(url, html_name)
+        record.observe(filename)
     if not filename:
         logger.error("Failed to ingest data. Exiting pipeline.")
         return
 
-    # Preprocess data
-    df = process_excel_data(filename, sheet_name, header)
-    if df.empty:
+    # Stage results are keyed on the content of their inputs, so unchanged stages are skipped
+    cache = StageCache(enabled=use_cache, metrics=metrics)
+    workbook_digest = path_digest(f"./data/{filename}")
+
+    # Preprocess data: the workbook is opened once and its sheets are processed in parallel
+    category_layout = dataset_layout(filename)
+    frames = cache.run('process_workbook', (workbook_digest, sorted(sheets.items()), repr(category_layout)), 
+                       process_workbook, filename, sheets, layout=category_layout)
+    if not frames:
         logger.error("Failed to process data. Exiting pipeline.")
         return
+    # A cached result carries the processed_date of the run that stored it, so each run stamps its own
+    processed_date = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+    for df in frames.values():
+        df['processed_date'] = processed_date
 
-    # Validate data
-    previous_df = validate_data(filename, df, sheet_name, header)
-    if previous_df.empty:
-        logger.error("Data validation failed. Exiting pipeline.")
-        return
+    process_sheets(cache, filename, frames, sheets, output_path, layout, formats, warehouse, compression, 
+                   max_workers, metrics)
 
-    # Save processed data as CSV file
-    csv_filename = save_data_to_csv(df, filename, output_path)
-    if not csv_filename:
-        logger.error("Failed to save data to CSV. Exiting pipeline.")
-        return
 
-    # Generate data profiling report and consistency report
-    if not generate_data_profiling_report(df, csv_filename):
-        logger.error("Failed to generate data profiling report. Exiting pipeline.")
-        return
+def parse_sheet(value: str) -> tuple[str, int]:
+    """Parses a 'NAME:HEADER' command-line argument, e.g. 'Main Table:3'."""
+    sheet_name, _, header = value.rpartition(':')
+    if not sheet_name or not header.isdigit():
+        raise argparse.ArgumentTypeError(f"Expected NAME:HEADER, got '{value}'")
+    return sheet_name, int(header)
 
-    if not generate_data_consistency_report(df, previous_df, csv_filename):
-        logger.error("Failed to generate data consistency report. Exiting pipeline.")
-        return
 
 if __name__ == '__main__':
     # Set up argument parsing
     parser = argparse.ArgumentParser(description='Process and analyze energy trend data.')
     parser.add_argument('--output-path', type=str, default='./output', help='The directory to save output files to.')
+    parser.add_argument('--layout', choices=['wide', 'long'], default='wide', help='Save one column per period (wide) or tidy rows (long).')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'parquet', 'feather'], default=['csv'], help='Output formats to write.')
+    parser.add_argument('--warehouse', type=str, default=None, help='Path of a SQLite warehouse to upsert the data into.')
+    parser.add_argument('--no-cache', action='store_true', help='Run every stage even if its inputs are unchanged.')
+    parser.add_argument('--sheets', nargs='+', type=parse_sheet, default=None, metavar='NAME:HEADER', help='Sheets to process with their header rows, e.g. Quarter:4 "Main Table":3.')
+    parser.add_argument('--all-sheets', action='store_true', help=f"Process every data sheet of the workbook: {', '.join(WORKBOOK_SHEETS)}.")
+    parser.add_argument('--metrics-dir', type=str, default=DEFAULT_METRICS_DIR, help='The directory to write per-stage run metrics to.')
+    parser.add_argument('--trace-memory', action='store_true', help='Also trace the peak of Python allocations in each stage (slower).')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None, help='Compress the CSV output.')
+    parser.add_argument('--max-workers', type=int, default=1, help='Number of stages run at once; 1 runs them in turn.')
+    parser.add_argument('--json-log', type=str, default=None, metavar='PATH', help='Log every module to one JSON-lines file through a background thread.')
     
     args = parser.parse_args()
+    if args.trace_memory and args.max_workers > 1:
+        parser.error('--trace-memory needs --max-workers 1')
+    sheets = WORKBOOK_SHEETS if args.all_sheets else dict(args.sheets) if args.sheets else None
 
     # Run main with the provided output path
-    main(args.output_path)
+    main(args.output_path, args.layout, args.formats, args.warehouse, not args.no_cache, sheets, 
+         args.metrics_dir, args.trace_memory, args.json_log, args.compression, args.max_workers)
@@ -0,0 +1,144 @@
+import threading
+import contextvars
+from typing import Any, Callable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+
+class LazyTasks:
+    """
+    Declares the Prefect tasks of a module, building each task, and importing Prefect, on first access.
+
+    Worker processes import some modules only for their helpers, e.g. preprocess_frame, and Prefect
+    takes about 3 s to import. Such modules declare their stages with `task` and end with
+    `__getattr__ = tasks.getattr()`: the plain functions then leave the module namespace, and
+    reading one, e.g. `from energytrend_etl.preprocess_data import process_workbook`, returns the
+    task that prefect.task builds from it, as the decorator would have.
+    """
+
+    def __init__(self, namespace: dict[str, Any]):
+        """
+        Args:
+            namespace (dict[str, Any]): The globals() of the module declaring the tasks.
+        """
+        self._namespace = namespace
+        self._functions: dict[str, tuple[Callable[..., Any], dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def task(self, **options: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Declares a function as a task, with the keyword arguments of prefect.task."""
+        def declare(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self._functions[fn.__name__] = (fn, options)
+            return fn
+        return declare
+
+    def getattr(self) -> Callable[[str], Any]:
+        """
+        Removes the declared functions from the module namespace.
+
+        Returns:
+            Callable[[str], Any]: The module's `__getattr__`, building a declared task when it is first read.
+        """
+        for name in self._functions:
+            self._namespace.pop(name, None)
+        module = self._namespace['__name__']
+
+        def __getattr__(name: str) -> Any:
+            if name not in self._functions:
+                raise AttributeError(f"module {module!r} has no attribute {name!r}")
+            with self._lock:
+                if name not in self._namespace:
+                    from prefect import task
+                    fn, options = self._functions[name]
+                    self._namespace[name] = task(**options)(fn)
+            return self._namespace[name]
+        return __getattr__
+
+
+class _DeferredFuture(Future):
+    """A future that runs its call in the calling thread when its result is first asked for."""
+
+    def __init__(self, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        super().__init__()
+        self._call = (fn, args, kwargs)
+
+    def run(self) -> None:
+        """Runs the call unless it already ran or was cancelled."""
+        if self.done() or self.running() or not self.set_running_or_notify_cancel():
+            return
+        fn, args, kwargs = self._call
+        try:
+            self.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            self.set_exception(e)
+
+    def result(self, timeout: float | None = None) -> Any:
+        self.run()
+        return super().result(timeout)
+
+    def exception(self, timeout: float | None = None) -> BaseException | None:
+        self.run()
+        return super().exception(timeout)
+
+
+class SequentialExecutor(Executor):
+    """
+    Runs each submitted stage in the calling thread when its result is first needed.
+
+    Stages therefore run in the order the flow asks for their results, and a stage that is
+    cancelled after an earlier one failed never runs: the flow behaves exactly as if every
+    stage were called in turn.
+    """
+
+    def __init__(self):
+        self._futures: list[_DeferredFuture] = []
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future = _DeferredFuture(fn, args, kwargs)
+        self._futures.append(future)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        for future in self._futures:
+            future.cancel() if cancel_futures else future.run()
+        self._futures.clear()
+
+
+def task_runner(max_workers: int) -> Executor:
+    """
+    Creates the executor that runs the stages of a flow.
+
+    Args:
+        max_workers (int): The number of stages run at once; 1 runs them one after another in the calling thread.
+
+    Returns:
+        Executor: A thread pool, or a SequentialExecutor for a single worker.
+    """
+    if max_workers <= 1:
+        return SequentialExecutor()
+    return ThreadPoolExecutor(max_workers, thread_name_prefix='stage')
+
+
+def submit(executor: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    Submits a stage to an executor, running it in a copy of the caller's context.
+
+    Context variables, such as Prefect's flow run and the dataset that run metrics label stages
+    with, are thus seen by the stage even in a worker thread.
+
+    Args:
+        executor (Executor): The executor, as created by task_runner.
+        fn (Callable[..., Any]): The stage, or a function running stages.
+        *args (Any): Positional arguments for `fn`.
+        **kwargs (Any): Keyword arguments for `fn`.
+
+    Returns:
+        Future: The future result of the stage.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def cancel(*futures: Future | None) -> None:
+    """Cancels stages that have not started, e.g. after an earlier stage failed."""
+    for future in futures:
+        if future is not None:
+            future.cancel()
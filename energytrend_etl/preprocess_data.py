@@ -1,7 +1,15 @@
+import os
 import logging
+import multiprocessing
+import numpy as np
 import pandas as pd
-from prefect import task
-from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.orchestration import LazyTasks
+from energytrend_etl.logger_config import queue_logging_initializer, setup_logger
+from concurrent.futures import ProcessPoolExecutor
+from energytrend_etl.energy_table import METADATA_COLUMNS, EnergyTable
+from energytrend_etl.arrow_handoff import SharedFrame, receive_frame, share_frame
+from energytrend_etl.sheet_cache import read_excel_cached, read_excel_sheets_cached
+from energytrend_etl.category_tree import NOTE_PATTERN, CategoryLayout, CategoryTree, check_identities
 
 
 # Set up logging
@@ -12,16 +20,136 @@ logger = setup_logger(
     log_format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Prefect tasks, built on first access (see LazyTasks)
+_tasks = LazyTasks(globals())
+
+# Workbooks from which parsing and preprocessing their sheets in worker processes pays for
+# spawning the workers (about 0.75 s with their imports, which leave out Prefect). Sheets take
+# about 0.3 s per MB of workbook inline, so below this size the pool costs more than it saves
+# (the ET 3.1 workbook is 0.12 MB)
+MIN_POOL_BYTES = 4 * 2 ** 20  # 4 MB
+
+# Period headers look like '1999__1st_quarter', '2021_3rd_quarter' or '2023_[provisional]' once cleaned
+PERIOD_PATTERN = r'^(?P<year>\d{4})(?:\D*?(?P<quarter>[1-4])(?:st|nd|rd|th)_*quarter)?'
+
+
+def preprocess_frame(
+        df: pd.DataFrame, 
+        filename: str, 
+        min_rows: int = 5, 
+        max_missing_percentage: float = 20.0, 
+        layout: CategoryLayout | None = None, 
+        identity_tolerance: float = 0.1
+) -> pd.DataFrame:
+    """
+    Cleans a parsed sheet and performs integrity checks.
+
+    Args:
+        df (pd.DataFrame): The sheet as parsed from the workbook.
+        filename (str): The name of the Excel file the sheet was read from.
+        min_rows (int): Minimum number of rows required in the DataFrame for integrity (default is 5).
+        max_missing_percentage (float): Maximum allowed percentage of missing values (default is 20%).
+        layout (CategoryLayout | None): The category hierarchy and identities of the table, e.g.
+            category_tree.ET_3_1_LAYOUT (default is None, no identity checks).
+        identity_tolerance (float): Largest absolute residual accepted by identity checks (default is 0.1).
+
+    Returns:
+        pd.DataFrame: Preprocessed DataFrame, or an empty DataFrame if an integrity check fails.
+    """
+    # Basic cleaning: replace spaces and newline characters in column names, relabelling without copying the data
+    df = df.set_axis([x.strip().replace(' ', '_').replace('\n', '_') for x in df.columns], axis=1, copy=False)
+    
+    # Integrity Check 1: Ensure key columns are present
+    # We can replace with actual key columns if more than 'Column1' is required.
+    required_columns = ['Column1']
+    if not all(column in df.columns for column in required_columns):
+        logger.error("Missing one or more required columns: %s", required_columns)
+        return pd.DataFrame()
+    
+    # Integrity Check 2: Ensure the DataFrame has a minimum number of rows
+    if len(df) < min_rows:
+        logger.error("DataFrame has less than the required minimum number of rows (%s).", min_rows)
+        return pd.DataFrame()
+
+    # Integrity Check 3: Ensure the percentage of missing values is within acceptable limits
+    total_cells = df.size
+    missing_cells = df.isna().sum().sum()
+    missing_percentage = (missing_cells / total_cells) * 100
+    if missing_percentage > max_missing_percentage:
+        logger.error("DataFrame has %.2f%% missing values, which exceeds the maximum allowed %s%%.", missing_percentage, max_missing_percentage)
+        return pd.DataFrame()
+    
+    # Set index and clean up the index name
+    df.set_index('Column1', inplace=True)
+    df.index.name = None
+
+    # Handle missing values explicitly if needed.
+    # Replace NaNs with empty strings, replacing only the columns that have any, as the others
+    # still share their memory with the parsed sheet
+    for column in df.columns[df.isna().any().to_numpy()]:
+        df[column] = df[column].fillna('')
+    
+    # Add metadata columns
+    df['processed_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+    df['filename'] = filename
+
+    # Integrity Check 4: Ensure roll-ups and accounting identities hold in every period
+    if layout is not None:
+        try:
+            tree = CategoryTree.from_labels(df.index, layout)
+            # Only period columns are additive, per cent changes are not
+            periods = EnergyTable.from_frame(df, columns=parse_period_columns(df.columns)['year'].notna().to_numpy())
+            failures = check_identities(periods.values, pd.Index(periods.periods), tree, layout, identity_tolerance)
+        except KeyError as e:
+            logger.warning("Rows do not match the %s layout (no %s row); skipping identity checks.", layout.name, e)
+        else:
+            if not failures.empty:
+                logger.error("%d identity check(s) failed, e.g.:\n%s", len(failures), failures.head())
+                return pd.DataFrame()
+    
+    # Rendering the head is deferred to the log handler, and skipped unless debugging
+    logger.info("Data processing complete: %d rows, %d columns.", *df.shape)
+    logger.debug("Processed DataFrame head:\n%s", df.head())
+    return df
+
+
+def _preprocess_sheet(df: pd.DataFrame, filename: str, sheet_name: str, checks: dict) -> pd.DataFrame:
+    """Runs preprocess_frame on one sheet, logging and returning an empty DataFrame on error."""
+    try:
+        return preprocess_frame(df, filename, **checks)
+    except Exception as e:
+        logger.error("Error processing sheet '%s' of %s: %s", sheet_name, filename, e)
+        return pd.DataFrame()
+
+
+def _process_sheet_in_worker(
+        filename: str, 
+        sheet_name: str, 
+        header: int, 
+        engine: str | None, 
+        checks: dict
+) -> 'SharedFrame | pd.DataFrame':
+    """Parses (or loads from its sheet cache) and preprocesses one sheet in a worker process, returning it through shared memory."""
+    try:
+        df = read_excel_cached(f"./data/{filename}", sheet_name, header, engine)
+    except Exception as e:
+        logger.error("Error reading sheet '%s' of %s: %s", sheet_name, filename, e)
+        return pd.DataFrame()
+    return share_frame(_preprocess_sheet(df, filename, sheet_name, checks))
+
 
 # Prefect task
-@task(log_prints=True, tags=["preprocess_data"])
+@_tasks.task(log_prints=True, tags=["preprocess_data"])
 def process_excel_data(
         filename: str, 
         sheet_name: str, 
         header: int, 
         min_rows: int = 5, 
         max_missing_percentage: 
-        float = 20.0
+        float = 20.0, 
+        layout: CategoryLayout | None = None, 
+        identity_tolerance: float = 0.1, 
+        engine: str | None = None
 ) -> pd.DataFrame:
     """
     Function to preprocess Excel data and perform integrity checks.
@@ -32,52 +160,190 @@ def process_excel_data(
         header (int): Row (0-indexed) to use for the column labels of the parsed DataFrame.
         min_rows (int): Minimum number of rows required in the DataFrame for integrity (default is 10).
         max_missing_percentage (float): Maximum allowed percentage of missing values (default is 20%).
+        layout (CategoryLayout | None): The category hierarchy and identities of the table, e.g.
+            category_tree.ET_3_1_LAYOUT (default is None, no identity checks).
+        identity_tolerance (float): Largest absolute residual accepted by identity checks (default is 0.1).
+        engine (str | None): The Excel reader backend (default is the fastest installed backend).
 
     Returns:
         pd.DataFrame: Preprocessed DataFrame.
     """
     try:
-        # Read and preprocess raw data
-        df = pd.read_excel(f"./data/{filename}", sheet_name=sheet_name, header=header)
-        
-        # Basic cleaning: replace spaces and newline characters in column names
-        df.rename(columns=lambda x: x.strip().replace(' ', '_').replace('\n', '_'), inplace=True)
-        
-        # Integrity Check 1: Ensure key columns are present
-        # We can replace with actual key columns if more than 'Column1' is required.
-        required_columns = ['Column1']
-        if not all(column in df.columns for column in required_columns):
-            logger.error(f"Missing one or more required columns: {required_columns}")
-            return pd.DataFrame()
-        
-        # Integrity Check 2: Ensure the DataFrame has a minimum number of rows
-        if len(df) < min_rows:
-            logger.error(f"DataFrame has less than the required minimum number of rows ({min_rows}).")
-            return pd.DataFrame()
-
-        # Integrity Check 3: Ensure the percentage of missing values is within acceptable limits
-        total_cells = df.size
-        missing_cells = df.isna().sum().sum()
-        missing_percentage = (missing_cells / total_cells) * 100
-        if missing_percentage > max_missing_percentage:
-            logger.error(f"DataFrame has {missing_percentage:.2f}% missing values, which exceeds the maximum allowed {max_missing_percentage}%.")
-            return pd.DataFrame()
-        
-        # Set index and clean up the index name
-        df.set_index('Column1', inplace=True)
-        df.index.name = None
-        
-        # Handle missing values explicitly if needed.
-        # Replace NaNs with empty strings
-        df.fillna('', inplace=True)
-        
-        # Add metadata columns
-        df['processed_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-        df['filename'] = filename
-        
-        logger.info(f"Data processing complete. Processed DataFrame head:\n{df.head()}")
-        return df
+        # Read raw data, reusing the parsed sheet if the workbook is unchanged
+        df = read_excel_cached(f"./data/{filename}", sheet_name=sheet_name, header=header, engine=engine)
+        return preprocess_frame(df, filename, min_rows, max_missing_percentage, layout, identity_tolerance)
+
+    except Exception as e:
+        logger.error("Error processing Excel data from %s: %s", filename, e)
+        return pd.DataFrame()
+
+
+# Prefect task
+@_tasks.task(log_prints=True, tags=["preprocess_data"])
+def process_workbook(
+        filename: str, 
+        sheets: dict[str, int], 
+        max_workers: int | None = None, 
+        engine: str | None = None, 
+        **checks
+) -> dict[str, pd.DataFrame]:
+    """
+    Function to preprocess several sheets of one workbook.
+
+    Sheets are processed in this process by default: all of them are parsed from the same open
+    workbook (or loaded from their sheet caches), then cleaned and checked in turn. Workbooks of
+    at least MIN_POOL_BYTES on a machine with several CPUs are instead split across worker
+    processes, each of which parses and cleans its own sheet, so that the stage takes about as long
+    as the slowest sheet; below that size spawning the workers costs more than it saves.
+
+    Args:
+        filename (str): The name of the Excel file.
+        sheets (dict[str, int]): The sheets to process, mapped to the row (0-indexed) holding their column labels.
+        max_workers (int | None): The number of worker processes (default is one per sheet, up to the CPU
+            count, for workbooks of at least MIN_POOL_BYTES, and none otherwise). With a single worker
+            the sheets are processed in this process.
+        engine (str | None): The Excel reader backend (default is the fastest installed backend).
+        **checks: Integrity check parameters passed to preprocess_frame.
+
+    Returns:
+        dict[str, pd.DataFrame]: The preprocessed DataFrame of each sheet, or an empty dict if any sheet failed.
+    """
+    try:
+        file_path = f"./data/{filename}"
+        if max_workers is None:
+            pays = os.path.getsize(file_path) >= MIN_POOL_BYTES
+            max_workers = min(len(sheets), os.cpu_count() or 1) if pays else 1
+
+        if max_workers <= 1 or len(sheets) == 1:
+            max_workers = 1
+            raw_frames = read_excel_sheets_cached(file_path, sheets, engine)
+            frames = {name: _preprocess_sheet(df, filename, name, checks) for name, df in raw_frames.items()}
+        else:
+            # Workers are spawned rather than forked, as the flow runs alongside Prefect's threads.
+            # Large sheets come back as Arrow files in shared memory rather than pickles
+            initializer, initargs = queue_logging_initializer()
+            futures = {}
+            try:
+                with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'), 
+                                         initializer=initializer, initargs=initargs) as pool:
+                    futures = {name: pool.submit(_process_sheet_in_worker, filename, name, header, engine, checks)
+                               for name, header in sheets.items()}
+                    frames = {name: receive_frame(future.result()) for name, future in futures.items()}
+            finally:
+                # Sheets are removed from shared memory once received; the pool has finished every
+                # sheet by now, so remove those left after another sheet failed
+                for future in futures.values():
+                    if not future.cancelled() and future.exception() is None:
+                        result = future.result()
+                        if isinstance(result, SharedFrame) and os.path.exists(result.path):
+                            os.remove(result.path)
+
+        failed = [name for name, df in frames.items() if df.empty]
+        if failed:
+            logger.error("Failed to process sheet(s) %s of %s.", failed, filename)
+            return {}
+        logger.info("Processed %s sheet(s) of %s with %s worker(s).", len(frames), filename, max_workers)
+        return frames
 
     except Exception as e:
-        logger.error(f"Error processing Excel data from {filename}: {str(e)}")
+        logger.error("Error processing workbook %s: %s", filename, e)
+        return {}
+
+
+def parse_period_columns(columns: pd.Index) -> pd.DataFrame:
+    """
+    Parses period headers into a year/quarter index in one vectorized pass.
+
+    Args:
+        columns (pd.Index): The cleaned column labels of a processed DataFrame.
+
+    Returns:
+        pd.DataFrame: One row per column with nullable 'year' and 'quarter' (NA for annual
+            columns and for columns that are not periods) and a boolean 'provisional' flag.
+    """
+    labels = columns.astype(str).to_series(index=range(len(columns)))
+    parts = labels.str.extract(PERIOD_PATTERN)
+    return pd.DataFrame({
+        'year': pd.to_numeric(parts['year']).astype('Int16'),
+        'quarter': pd.to_numeric(parts['quarter']).astype('Int8'),
+        'provisional': labels.str.contains('provisional', case=False).to_numpy(),
+    })
+
+
+def clean_category_labels(labels: pd.Index) -> pd.Series:
+    """
+    Strips note references from category labels and qualifies repeated labels.
+
+    Repeated labels (e.g. the 'Feedstocks' rows under production, imports and exports) are
+    suffixed with their occurrence number so that every category is unique within a sheet.
+
+    Args:
+        labels (pd.Index): The row labels of a processed DataFrame.
+
+    Returns:
+        pd.Series: The cleaned, unique category labels in row order.
+    """
+    cleaned = labels.astype(str).to_series(index=range(len(labels)))
+    cleaned = cleaned.str.replace(NOTE_PATTERN, '', regex=True).str.split().str.join(' ')
+    occurrence = cleaned.groupby(cleaned.str.lower()).cumcount() + 1
+    return cleaned.where(occurrence == 1, cleaned + ' (' + occurrence.astype(str) + ')')
+
+
+# Prefect task
+@_tasks.task(log_prints=True, tags=["preprocess_data"])
+def reshape_to_long(df: pd.DataFrame, table: EnergyTable | None = None) -> pd.DataFrame:
+    """
+    Function to reshape a processed wide DataFrame into a tidy (category, year, quarter, value) table.
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame with one row per category and one column per period.
+        table (EnergyTable | None): The table of `df`, if the flow already converted it (default is None).
+
+    Returns:
+        pd.DataFrame: Long-format DataFrame with categorical 'category', 'processed_date' and 'filename',
+            nullable integer 'year' and 'quarter', boolean 'provisional' and float64 'value' columns.
+    """
+    try:
+        metadata = {col: df[col].iloc[0] if len(df) else None for col in METADATA_COLUMNS if col in df.columns}
+
+        # Keep only the columns with a parseable period header; metadata headers never parse
+        periods = parse_period_columns(df.columns)
+        is_period = periods['year'].notna().to_numpy()
+        dropped = df.columns[~is_period & ~df.columns.isin(METADATA_COLUMNS)]
+        if len(dropped):
+            logger.warning("Dropping non-period columns: %s", list(dropped))
+        periods = periods[is_period]
+
+        # Blank strings left by fillna('') are NaN in the sheet's float64 table
+        table = (table or EnergyTable.from_frame(df)).view(periods=is_period[~df.columns.isin(METADATA_COLUMNS)])
+        values = table.values
+
+        n_rows, n_periods = values.shape
+        categories = clean_category_labels(pd.Index(table.categories))
+        codes, unique_categories = pd.factorize(categories)
+
+        def tile(column: pd.Series, dtype: str) -> pd.arrays.IntegerArray:
+            # Tiles the values and missing mask of a nullable column, rather than boxed objects
+            return pd.arrays.IntegerArray(np.tile(column.to_numpy(dtype=dtype, na_value=0), n_rows),
+                                          np.tile(column.isna().to_numpy(), n_rows))
+
+        # Columns are built from codes and plain arrays, and the frame takes them without copying
+        long_df = pd.DataFrame({
+            'category': pd.Categorical.from_codes(np.repeat(codes, n_periods), categories=unique_categories),
+            'year': tile(periods['year'], 'int16'),
+            'quarter': tile(periods['quarter'], 'int8'),
+            'provisional': np.tile(periods['provisional'].to_numpy(), n_rows),
+            'value': values.ravel(),
+        }, copy=False)
+        for col, value in metadata.items():
+            long_df[col] = pd.Categorical.from_codes(np.zeros(len(long_df), dtype=np.int8), categories=[value])
+
+        logger.info("Reshaped %s categories x %s periods into %s long-format rows.", n_rows, n_periods, len(long_df))
+        return long_df
+
+    except Exception as e:
+        logger.error("Error reshaping data to long format: %s", e)
         return pd.DataFrame()
+
+
+__getattr__ = _tasks.getattr()
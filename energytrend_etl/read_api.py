@@ -0,0 +1,399 @@
+import os
+import re
+import json
+import logging
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from urllib.parse import parse_qs, unquote, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.warehouse import ANNUAL_QUARTER, dataset_name
+from energytrend_etl.vintages import release_date
+from energytrend_etl.writers import read_output
+from energytrend_etl.preprocess_data import reshape_to_long
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/read_api.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Output formats in order of preference: Arrow IPC is memory-mapped, CSV has to be parsed
+OUTPUT_EXTENSIONS = ['.arrow', '.parquet', '.csv', '.csv.gz', '.csv.zst']
+
+
+def _split_output(name: str) -> tuple[str, str]:
+    """Splits an output filename into its stem and extension, e.g. ('ET_3.1_JUL_24', '.csv.gz')."""
+    for extension in sorted(OUTPUT_EXTENSIONS, key=len, reverse=True):
+        if name.endswith(extension) and not name.startswith('.'):
+            return name[:-len(extension)], extension
+    return name, ''
+
+
+def period_key(period: str, end: bool = False) -> int:
+    """
+    Converts a period bound to a sortable key.
+
+    Args:
+        period (str): A year, e.g. '2019', or a quarter, e.g. '2019Q3'.
+        end (bool): Whether the bound is the end of a range, so a year includes all its quarters (default is False).
+
+    Returns:
+        int: The key, year * 10 + quarter, with 0 for annual values.
+
+    Raises:
+        ValueError: If the period is not a year or a quarter.
+    """
+    match = re.fullmatch(r'(\d{4})(?:[Qq]([1-4]))?', period.strip())
+    if not match:
+        raise ValueError(f"Expected a period such as '2019' or '2019Q3', got '{period}'")
+    year, quarter = int(match.group(1)), match.group(2)
+    if quarter is None:
+        return year * 10 + (4 if end else ANNUAL_QUARTER)
+    return year * 10 + int(quarter)
+
+
+@dataclass
+class CachedOutput:
+    """A processed output held in memory as long-format rows sorted by category and period."""
+    path: str
+    signature: tuple
+    frame: pd.DataFrame
+    keys: np.ndarray
+    offsets: dict[str, tuple[int, int]]
+    table: pa.Table = field(init=False)
+    nbytes: int = field(init=False)
+    responses: OrderedDict = field(init=False, default_factory=OrderedDict)
+    max_responses: int = 256
+
+    def __post_init__(self):
+        self.table = pa.Table.from_pandas(self.frame, preserve_index=False)
+        self.nbytes = int(self.frame.memory_usage(deep=True).sum()) + self.keys.nbytes + self.table.nbytes
+
+    @classmethod
+    def load(cls, path: str, signature: tuple) -> 'CachedOutput':
+        """Reads an output file, in wide or long layout, into sorted long-format rows."""
+        df = read_output(path)
+        if not {'category', 'year', 'value'}.issubset(df.columns):
+            df = reshape_to_long.fn(df)
+            if df.empty:
+                raise ValueError(f"{path} has no period columns")
+        frame = pd.DataFrame({
+            'category': df['category'].astype(str).to_numpy(),
+            'year': df['year'].astype('Int64'),
+            'quarter': df['quarter'].astype('Int64'),
+            'provisional': df['provisional'].astype(bool) if 'provisional' in df else False,
+            'value': df['value'].astype(np.float64),
+        })
+        keys = frame['year'].to_numpy(np.int64) * 10 + frame['quarter'].fillna(ANNUAL_QUARTER).to_numpy(np.int64)
+        order = np.lexsort((keys, frame['category'].to_numpy()))
+        frame, keys = frame.iloc[order].reset_index(drop=True), keys[order]
+
+        # Start and stop row of every category, whose rows are contiguous after sorting
+        categories = frame['category'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, categories[1:] != categories[:-1]])
+        stops = np.r_[starts[1:], len(frame)]
+        offsets = {categories[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+        return cls(path, signature, frame, keys, offsets)
+
+    def positions(self, categories: list[str] | None = None, start: str | None = None, end: str | None = None) -> np.ndarray:
+        """Finds the rows of a category and inclusive period range with binary searches on the sorted rows."""
+        low = period_key(start) if start else None
+        high = period_key(end, end=True) if end else None
+        if not categories:
+            mask = np.ones(len(self.keys), dtype=bool)
+            if low is not None:
+                mask &= self.keys >= low
+            if high is not None:
+                mask &= self.keys <= high
+            return np.flatnonzero(mask)
+
+        positions = []
+        for first, last in (self.offsets[c] for c in categories if c in self.offsets):
+            # Periods are sorted within a category
+            keys = self.keys[first:last]
+            lo = int(np.searchsorted(keys, low, 'left')) if low is not None else 0
+            hi = int(np.searchsorted(keys, high, 'right')) if high is not None else len(keys)
+            positions.append(np.arange(first + lo, first + hi))
+        return np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+
+    def render(self, output_format: str, categories: list[str] | None, start: str | None, end: str | None) -> bytes:
+        """Serializes a slice, remembering the most recent responses so repeat requests are dictionary lookups."""
+        request = (output_format, tuple(categories) if categories else None, start, end)
+        body = self.responses.get(request)
+        if body is not None:
+            self.responses.move_to_end(request)
+            return body
+
+        positions = self.positions(categories, start, end)
+        body = FORMATS[output_format][1](self, positions)
+        self.responses[request] = body
+        self.nbytes += len(body)
+        if len(self.responses) > self.max_responses:
+            _, evicted = self.responses.popitem(last=False)
+            self.nbytes -= len(evicted)
+        return body
+
+
+def _to_json(entry: CachedOutput, positions: np.ndarray) -> bytes:
+    """Serializes rows as a JSON array of records."""
+    return entry.frame.iloc[positions].to_json(orient='records').encode()
+
+
+def _to_arrow(entry: CachedOutput, positions: np.ndarray) -> bytes:
+    """Serializes rows as an Arrow IPC stream."""
+    sink = pa.BufferOutputStream()
+    table = entry.table.take(pa.array(positions, type=pa.int64()))
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# Response formats: content type and serializer
+FORMATS = {
+    'json': ('application/json', _to_json),
+    'arrow': ('application/vnd.apache.arrow.stream', _to_arrow),
+}
+
+
+class OutputReader:
+    """
+    Serves slices of the processed outputs from a size-bounded, least-recently-used in-memory cache.
+
+    Each output is read once and kept as sorted long-format rows, so repeat lookups are binary
+    searches rather than file reads. Before every lookup the file's modification time, size and
+    inode are compared with those it was loaded from, so a new version written by the pipeline,
+    in this or another process, replaces the cached one.
+    """
+
+    def __init__(self, output_path: str = './output', max_bytes: int = 256 * 2 ** 20):
+        """
+        Args:
+            output_path (str): The directory holding the processed outputs (default is './output').
+            max_bytes (int): The memory budget of the cache; least recently used outputs are dropped
+                beyond it (default is 256 MB).
+        """
+        self.output_path = output_path
+        self.max_bytes = max_bytes
+        self._cache: OrderedDict[str, CachedOutput] = OrderedDict()
+        self._lock = threading.Lock()
+        self._listing: tuple[int, dict[str, str]] = (-1, {})
+
+    @property
+    def cached_bytes(self) -> int:
+        """The memory held by cached outputs."""
+        return sum(entry.nbytes for entry in self._cache.values())
+
+    def datasets(self) -> dict[str, str]:
+        """
+        Lists the processed outputs.
+
+        Returns:
+            dict[str, str]: The path of each output, keyed by its filename without extension,
+                preferring Arrow, then Parquet, then CSV, then compressed CSV when an output is
+                saved in several formats.
+        """
+        directory_mtime = os.stat(self.output_path).st_mtime_ns
+        if directory_mtime != self._listing[0]:
+            paths = {}
+            for entry in os.scandir(self.output_path):
+                stem, extension = _split_output(entry.name)
+                if extension in OUTPUT_EXTENSIONS:
+                    paths.setdefault(stem, []).append(entry.path)
+            preference = {extension: rank for rank, extension in enumerate(OUTPUT_EXTENSIONS)}
+            best = {stem: min(candidates, key=lambda path: preference[_split_output(os.path.basename(path))[1]])
+                    for stem, candidates in paths.items()}
+            self._listing = (directory_mtime, best)
+        return self._listing[1]
+
+    def resolve(self, dataset: str) -> str:
+        """
+        Finds the output of a dataset.
+
+        Args:
+            dataset (str): An output name, e.g. 'ET_3.1_JUL_24', or a dataset name shared by every
+                release, e.g. 'ET_3.1', for the latest release by the release tag in its name. Names
+                without a release tag rank below tagged ones, by when they were written.
+
+        Returns:
+            str: The path of the output.
+
+        Raises:
+            KeyError: If there is no such output.
+        """
+        datasets = self.datasets()
+        if dataset in datasets:
+            return datasets[dataset]
+        # Output names carry the workbook's name, so they are matched as workbook filenames
+        releases = {stem: path for stem, path in datasets.items() if dataset_name(f"{stem}.xlsx") == dataset}
+        if not releases:
+            raise KeyError(dataset)
+        # A re-run of an older release rewrites its output, so write times alone do not order releases
+        latest = max(releases, key=lambda stem: (release_date(f"{stem}.xlsx") or '', os.path.getmtime(releases[stem])))
+        return releases[latest]
+
+    def get(self, dataset: str) -> CachedOutput:
+        """Returns the cached output of a dataset, loading it if it is missing or was rewritten."""
+        path = self.resolve(dataset)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is not None and entry.signature == signature:
+                self._cache.move_to_end(path)
+                return entry
+
+            entry = CachedOutput.load(path, signature)
+            logger.info("Loaded %s into the read cache (%.1f MB).", path, entry.nbytes / 2 ** 20)
+            self._cache[path] = entry
+            self._cache.move_to_end(path)
+            self._evict()
+            return entry
+
+    def _evict(self) -> None:
+        """Drops the least recently used outputs until the cache fits its budget, keeping the latest."""
+        while len(self._cache) > 1 and self.cached_bytes > self.max_bytes:
+            evicted, _ = self._cache.popitem(last=False)
+            logger.info("Evicted %s from the read cache.", evicted)
+
+    def invalidate(self, dataset: str | None = None) -> None:
+        """Drops one dataset, or every dataset, from the cache."""
+        with self._lock:
+            if dataset is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self.resolve(dataset), None)
+
+    def query(
+            self,
+            dataset: str,
+            categories: list[str] | None = None,
+            start: str | None = None,
+            end: str | None = None
+    ) -> pd.DataFrame:
+        """
+        Selects a slice of a dataset.
+
+        Args:
+            dataset (str): An output name or a dataset name, as for resolve.
+            categories (list[str] | None): Only return these categories (default is all categories).
+            start (str | None): The first period to return, e.g. '2019' or '2019Q3' (default is unbounded).
+            end (str | None): The last period to return, inclusive (default is unbounded).
+
+        Returns:
+            pd.DataFrame: The 'category', 'year', 'quarter', 'provisional' and 'value' of the matching rows.
+        """
+        entry = self.get(dataset)
+        return entry.frame.iloc[entry.positions(categories, start, end)]
+
+    def render(
+            self,
+            dataset: str,
+            output_format: str = 'json',
+            categories: list[str] | None = None,
+            start: str | None = None,
+            end: str | None = None
+    ) -> bytes:
+        """
+        Serializes a slice of a dataset, reusing the response to an identical earlier request.
+
+        Args:
+            dataset (str): An output name or a dataset name, as for resolve.
+            output_format (str): 'json' for an array of records or 'arrow' for an Arrow IPC stream (default is 'json').
+            categories (list[str] | None): Only return these categories (default is all categories).
+            start (str | None): The first period to return, e.g. '2019' or '2019Q3' (default is unbounded).
+            end (str | None): The last period to return, inclusive (default is unbounded).
+
+        Returns:
+            bytes: The serialized slice.
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown format '{output_format}'. Choose from {sorted(FORMATS)}.")
+        entry = self.get(dataset)
+        with self._lock:
+            body = entry.render(output_format, categories, start, end)
+            self._evict()
+        return body
+
+
+class ReadApiHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET /datasets and GET /datasets/<name>?category=...&start=...&end=...&format=json|arrow.
+    """
+    reader: OutputReader
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, 'application/json', json.dumps({'error': message}).encode())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        params = parse_qs(url.query)
+        try:
+            if parts == ['datasets']:
+                self._send(200, 'application/json', json.dumps(sorted(self.reader.datasets())).encode())
+                return
+            if len(parts) != 2 or parts[0] != 'datasets':
+                self._error(404, f"No route for {url.path}")
+                return
+            output_format = params.get('format', ['json'])[0]
+            body = self.reader.render(parts[1], output_format, params.get('category'),
+                                      params.get('start', [None])[0], params.get('end', [None])[0])
+            self._send(200, FORMATS[output_format][0], body)
+        except KeyError as e:
+            self._error(404, f"No dataset {e}")
+        except ValueError as e:
+            self._error(400, str(e))
+        except Exception as e:
+            logger.error("Error serving %s: %s", self.path, e)
+            self._error(500, 'Internal error')
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def make_server(reader: OutputReader, host: str = '127.0.0.1', port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Creates an HTTP server for the read API; call serve_forever on it to serve requests.
+
+    Args:
+        reader (OutputReader): The reader to serve.
+        host (str): The address to listen on (default is '127.0.0.1', local only).
+        port (int): The port to listen on, or 0 for any free port (default is 8000).
+
+    Returns:
+        ThreadingHTTPServer: The server, handling each request in its own thread.
+    """
+    handler = type('BoundReadApiHandler', (ReadApiHandler,), {'reader': reader})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve slices of the processed outputs over HTTP.')
+    parser.add_argument('--output-path', type=str, default='./output', help='The directory holding the processed outputs.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='The address to listen on.')
+    parser.add_argument('--port', type=int, default=8000, help='The port to listen on.')
+    parser.add_argument('--max-mb', type=int, default=256, help='Memory budget of the read cache in MB.')
+    args = parser.parse_args()
+
+    server = make_server(OutputReader(args.output_path, args.max_mb * 2 ** 20), args.host, args.port)
+    logger.info("Serving %s on http://%s:%s", args.output_path, args.host, server.server_address[1])
+    server.serve_forever()
@@ -0,0 +1,178 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from energytrend_etl.orchestration import LazyTasks
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.warehouse import dataset_name
+from energytrend_etl.writers import columnar_frame
+from energytrend_etl.energy_table import EnergyTable
+from energytrend_etl.preprocess_data import METADATA_COLUMNS, clean_category_labels
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/revisions.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Prefect tasks, built on first access (see LazyTasks)
+_tasks = LazyTasks(globals())
+
+DEFAULT_SNAPSHOT_DIR = './output/snapshots'
+
+REVISION_COLUMNS = ['category', 'period', 'old', 'new', 'delta']
+
+# Schema metadata key recording which release a snapshot was published from
+SOURCE_KEY = b'energytrend_etl.filename'
+
+
+def snapshot_path(filename: str, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, previous: bool = False) -> str:
+    """
+    Builds the path of a published snapshot of a dataset.
+
+    Args:
+        filename (str): The workbook filename of any release of the dataset.
+        snapshot_dir (str): The directory holding published snapshots (default is './output/snapshots').
+        previous (bool): Whether to return the path of the release published before the latest (default is False).
+
+    Returns:
+        str: The snapshot path, shared by every release of the dataset.
+    """
+    suffix = '.previous' if previous else ''
+    return os.path.join(snapshot_dir, f"{dataset_name(filename)}{suffix}.arrow")
+
+
+def _snapshot_source(path: str) -> str | None:
+    """Returns the workbook filename a snapshot was published from, or None if there is no snapshot."""
+    if not os.path.exists(path):
+        return None
+    metadata = feather.read_table(path, memory_map=True).schema.metadata or {}
+    return metadata.get(SOURCE_KEY, b'').decode()
+
+
+def load_snapshot(filename: str, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> pd.DataFrame | None:
+    """
+    Loads the last snapshot published from a release other than `filename`.
+
+    Re-running the pipeline on a release that was already published therefore still compares it
+    with the release before it, rather than with itself.
+
+    Args:
+        filename (str): The workbook filename of the release being validated.
+        snapshot_dir (str): The directory holding published snapshots (default is './output/snapshots').
+
+    Returns:
+        pd.DataFrame | None: The published wide DataFrame, or None if no other release was published.
+    """
+    path = snapshot_path(filename, snapshot_dir)
+    if _snapshot_source(path) == filename:
+        path = snapshot_path(filename, snapshot_dir, previous=True)
+    if not os.path.exists(path):
+        return None
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def numeric_frame(df: pd.DataFrame, table: EnergyTable | None = None) -> pd.DataFrame:
+    """
+    Prepares a wide DataFrame for comparison: period columns only, as float64, indexed by unique category.
+
+    Args:
+        df (pd.DataFrame): A processed or published wide DataFrame.
+        table (EnergyTable | None): The table of `df`, if the caller already converted it (default
+            is None, converted here).
+
+    Returns:
+        pd.DataFrame: The float64 period block indexed by the cleaned, unique category labels.
+    """
+    # Wrapped without a further copy
+    data = (table or EnergyTable.from_frame(df)).frame()
+    data.index = pd.Index(clean_category_labels(data.index))
+    return data
+
+
+def diff_frames(previous_df: pd.DataFrame, df: pd.DataFrame, table: EnergyTable | None = None) -> pd.DataFrame:
+    """
+    Computes the cell-level revisions between two releases of a wide table.
+
+    Rows are first compared by content hash over the shared periods, so unchanged rows are
+    skipped cheaply; only changed rows are compared cell by cell, as one vectorized mask.
+    Categories and periods that exist in only one release are additions or removals, not
+    revisions, and are left out.
+
+    Args:
+        previous_df (pd.DataFrame): The previously published wide DataFrame.
+        df (pd.DataFrame): The current wide DataFrame.
+        table (EnergyTable | None): The table of `df`, if already converted (default is None).
+
+    Returns:
+        pd.DataFrame: One row per revised cell with 'category', 'period', 'old', 'new' and 'delta' columns.
+    """
+    previous, current = numeric_frame(previous_df), numeric_frame(df, table)
+    categories = current.index.intersection(previous.index, sort=False)
+    periods = current.columns.intersection(previous.columns, sort=False)
+    # Aligning copies the blocks, so it is skipped when both releases already share their rows and periods
+    if not (previous.index.equals(categories) and previous.columns.equals(periods)):
+        previous = previous.loc[categories, periods]
+    if not (current.index.equals(categories) and current.columns.equals(periods)):
+        current = current.loc[categories, periods]
+
+    # Skip rows whose contents hash identically
+    changed = (pd.util.hash_pandas_object(previous, index=False).to_numpy()
+               != pd.util.hash_pandas_object(current, index=False).to_numpy())
+    old = previous.to_numpy()[changed]
+    new = current.to_numpy()[changed]
+
+    # NaN == NaN is not a revision
+    revised = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+    rows, cols = np.nonzero(revised)
+    return pd.DataFrame({
+        'category': categories[changed][rows],
+        'period': periods[cols],
+        'old': old[rows, cols],
+        'new': new[rows, cols],
+        'delta': new[rows, cols] - old[rows, cols],
+    }, columns=REVISION_COLUMNS)
+
+
+# Prefect task
+@_tasks.task(log_prints=True, tags=["validate_data"])
+def publish_snapshot(df: pd.DataFrame, filename: str, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> str:
+    """
+    Function to publish the processed data as the snapshot that the next release is compared against.
+
+    Args:
+        df (pd.DataFrame): The processed wide DataFrame that was saved.
+        filename (str): The workbook filename the data was read from.
+        snapshot_dir (str): The directory holding published snapshots (default is './output/snapshots').
+
+    Returns:
+        str: Path to the published snapshot.
+    """
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        path = snapshot_path(filename, snapshot_dir)
+
+        # Keep the snapshot of the previous release when a new release is published
+        source = _snapshot_source(path)
+        if source is not None and source != filename:
+            os.replace(path, snapshot_path(filename, snapshot_dir, previous=True))
+
+        tmp_path = f"{path}.tmp"
+        table = pa.Table.from_pandas(columnar_frame(df.drop(columns=METADATA_COLUMNS, errors='ignore')))
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: filename.encode()})
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+        logger.info("Published snapshot of %s at %s", filename, path)
+        return path
+
+    except Exception as e:
+        logger.error("Error publishing snapshot: %s", e)
+        return ""
+
+
+__getattr__ = _tasks.getattr()
@@ -1,9 +1,22 @@
 import os
+import json
 import logging
+import contextlib
 import pandas as pd
-from prefect import task
+from typing import Iterator
+from datetime import datetime, timezone
+from energytrend_etl.writers import CSV_EXTENSIONS, WRITERS, atomic_path
+from energytrend_etl.orchestration import LazyTasks
+from energytrend_etl.stage_cache import frame_digest
+from energytrend_etl.energy_table import METADATA_COLUMNS
+from energytrend_etl.sheet_cache import file_sha256
 from energytrend_etl.logger_config import setup_logger
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
 
 # Set up logging
 logger = setup_logger(
@@ -13,9 +26,12 @@ logger = setup_logger(
     log_format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Prefect tasks, built on first access (see LazyTasks)
+_tasks = LazyTasks(globals())
+
 
 # Prefect task
-@task(log_prints=True, tags=["save_data"])
+@_tasks.task(log_prints=True, tags=["save_data"])
 def save_data_to_csv(df: pd.DataFrame, filename: str, output_path: str = './output') -> str:
     """
     Function to save data to a CSV file.
@@ -38,10 +54,160 @@ def save_data_to_csv(df: pd.DataFrame, filename: str, output_path: str = './outp
         
         # Save the DataFrame to a CSV file
         df.to_csv(save_csv, index=True)
-        logger.info(f"Data successfully saved in the file {save_csv}")
+        logger.info("Data successfully saved in the file %s", save_csv)
+        
+        return save_filename
+
+    except Exception as e:
+        logger.error("Error saving data to CSV file: %s", e)
+        return ""
+
+
+# Names of the checksum manifest and its lock file within the output directory
+MANIFEST_NAME = '.manifest.json'
+LOCK_NAME = '.manifest.lock'
+
+
+@contextlib.contextmanager
+def output_lock(output_path: str) -> Iterator[None]:
+    """
+    Holds an exclusive lock on a whole output directory, so that flows writing to the same
+    directory, in this or other processes, do not interleave their writes and manifest updates.
+    Flows saving different datasets to one directory wait for each other too.
+
+    Args:
+        output_path (str): The output directory, which must exist.
+    """
+    with open(os.path.join(output_path, LOCK_NAME), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_manifest(output_path: str) -> dict:
+    """
+    Reads the checksum manifest of an output directory.
+
+    Args:
+        output_path (str): The output directory.
+
+    Returns:
+        dict: The content checksum and files of every output, keyed by the output's base filename;
+            empty if there is no manifest or it cannot be read.
+    """
+    try:
+        with open(os.path.join(output_path, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(output_path: str, manifest: dict) -> None:
+    with atomic_path(os.path.join(output_path, MANIFEST_NAME)) as tmp_path, open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+
+def _intact(written: dict) -> bool:
+    """Whether a written output is still there with the size and sha256 the manifest records for it."""
+    path = written['path']
+    if not os.path.exists(path):
+        return False
+    if not os.path.isfile(path):
+        # Partitioned outputs are directories, recorded without a size or hash
+        return True
+    # The size is checked first, as it catches truncated files without reading them
+    return os.path.getsize(path) == written.get('bytes') and file_sha256(path) == written.get('sha256')
+
+
+def _unchanged(entry: dict, checksum: str, output_format: str, compression: str | None) -> bool:
+    """Whether the manifest records this format of the output with the same content, and the file is still intact."""
+    written = entry.get('files', {}).get(output_format)
+    return (entry.get('checksum') == checksum and written is not None
+            and written.get('compression') == compression and _intact(written))
+
+
+# Prefect task
+@_tasks.task(log_prints=True, tags=["save_data"])
+def save_data(
+        df: pd.DataFrame, 
+        filename: str, 
+        output_path: str = './output', 
+        formats: list[str] | None = None,
+        compression: str | None = None
+) -> str:
+    """
+    Function to save data in one or more output formats.
+
+    Each file is written to a temporary file, flushed to disk and renamed into place, so readers
+    never see a partial output. A checksum of the DataFrame's data, leaving out the metadata
+    columns (which change on every run), is recorded in the directory's manifest
+    ('.manifest.json'), and a format whose recorded checksum matches is not rewritten, unless its
+    file no longer has the size and sha256 recorded when it was written. The whole
+    output directory is locked while saving, so flows saving any dataset to the same directory
+    wait for each other rather than interleaving their writes.
+
+    Args:
+        df (pd.DataFrame): The preprocessed DataFrame to save.
+        filename (str): The base filename (without extension) to use for the saved files.
+        output_path (str): The directory path where the output files will be saved (default is './output').
+        formats (list[str] | None): Output formats to write, any of 'csv', 'parquet' and 'feather'
+            (default is ['csv']).
+        compression (str | None): Compression of the CSV output, None, 'gzip' or 'zstd' (default is None).
+
+    Returns:
+        str: The base filename of the saved data without extension.
+    """
+    try:
+        formats = formats or ['csv']
+        unknown = set(formats) - set(WRITERS)
+        if unknown:
+            logger.error("Unknown output format(s): %s. Choose from %s.", sorted(unknown), sorted(WRITERS))
+            return ""
+        if compression not in CSV_EXTENSIONS:
+            logger.error("Unknown CSV compression '%s'. Choose from %s.", compression, list(CSV_EXTENSIONS))
+            return ""
+
+        # Ensure the target directory exists
+        os.makedirs(output_path, exist_ok=True)
+        
+        # Construct the save path and write each requested format whose content changed
+        save_filename = os.path.splitext(filename)[0]
+        checksum = frame_digest(df.drop(columns=METADATA_COLUMNS, errors='ignore'))
+        with output_lock(output_path):
+            manifest = load_manifest(output_path)
+            entry = manifest.get(save_filename, {})
+            if entry.get('checksum') != checksum:
+                entry = {'checksum': checksum, 'files': {}}
+            written = False
+            for output_format in formats:
+                codec = compression if output_format == 'csv' else None
+                if _unchanged(entry, checksum, output_format, codec):
+                    logger.info("Skipping %s: content unchanged", entry['files'][output_format]['path'])
+                    continue
+                kwargs = {'compression': codec} if output_format == 'csv' else {}
+                save_path = WRITERS[output_format](df, os.path.join(output_path, save_filename), **kwargs)
+                entry['files'][output_format] = {
+                    'path': save_path,
+                    'compression': codec,
+                    'bytes': os.path.getsize(save_path) if os.path.isfile(save_path) else None,
+                    'sha256': file_sha256(save_path) if os.path.isfile(save_path) else None,
+                    'written_at': datetime.now(timezone.utc).isoformat(),
+                }
+                written = True
+                logger.info("Data successfully saved in the file %s", save_path)
+            if written:
+                manifest[save_filename] = entry
+                _write_manifest(output_path, manifest)
         
         return save_filename
 
     except Exception as e:
-        logger.error(f"Error saving data to CSV file: {str(e)}")
+        logger.error("Error saving data: %s", e)
         return ""
+
+
+__getattr__ = _tasks.getattr()
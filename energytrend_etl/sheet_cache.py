@@ -0,0 +1,179 @@
+import os
+import hashlib
+import logging
+import pandas as pd
+import pyarrow as pa
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.arrow_handoff import ARROW_ERRORS, join_frame, split_frame
+from energytrend_etl.excel_readers import open_workbook, read_sheet
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/sheet_cache.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Schema metadata keys used to validate a sidecar against its workbook
+SOURCE_HASH_KEY = b'energytrend_etl.source_sha256'
+SHEET_NAME_KEY = b'energytrend_etl.sheet_name'
+HEADER_KEY = b'energytrend_etl.header'
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Computes the SHA-256 hex digest of a file, reading it in fixed-size chunks.
+
+    Args:
+        file_path (str): The path of the file to hash.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sidecar_path(file_path: str, sheet_name: str, header: int) -> str:
+    """
+    Builds the path of the Arrow sidecar that caches one parsed sheet of a workbook.
+
+    Args:
+        file_path (str): The path of the Excel workbook.
+        sheet_name (str): The name of the cached sheet.
+        header (int): The header row used to parse the sheet.
+
+    Returns:
+        str: The sidecar path, stored next to the workbook.
+    """
+    stem = os.path.splitext(file_path)[0]
+    safe_sheet = ''.join(c if c.isalnum() else '_' for c in str(sheet_name))
+    return f"{stem}.{safe_sheet}.h{header}.arrow"
+
+
+def _read_sidecar(path: str, source_hash: str, sheet_name: str, header: int) -> pd.DataFrame | None:
+    """Loads a sidecar through a memory map, returning None if it is missing or stale."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, 'r') as source:
+            values = pa.ipc.read_tensor(source).to_numpy()
+            table = pa.ipc.open_stream(source).read_all()
+        metadata = table.schema.metadata or {}
+        if (metadata.get(SOURCE_HASH_KEY) != source_hash.encode()
+                or metadata.get(SHEET_NAME_KEY) != str(sheet_name).encode()
+                or metadata.get(HEADER_KEY) != str(header).encode()):
+            return None
+        return join_frame(values, table)
+    except (OSError, *ARROW_ERRORS) as e:
+        logger.warning("Ignoring unreadable sheet cache %s: %s", path, e)
+        return None
+
+
+def _write_sidecar(df: pd.DataFrame, path: str, source_hash: str, sheet_name: str, header: int) -> None:
+    """Writes a parsed sheet to its sidecar atomically, logging instead of raising on failure."""
+    tmp_path = f"{path}.tmp"
+    try:
+        # Float columns go in one tensor, and columns mixing floats with text (such as the per
+        # cent changes of the Main Table, with '(-) ' placeholders) are stored without loss
+        values, table = split_frame(df)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            SOURCE_HASH_KEY: source_hash.encode(),
+            SHEET_NAME_KEY: str(sheet_name).encode(),
+            HEADER_KEY: str(header).encode(),
+        })
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            pa.ipc.write_tensor(pa.Tensor.from_numpy(values), sink)
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except (OSError, *ARROW_ERRORS) as e:
+        logger.warning("Could not write sheet cache %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_excel_sheets_cached(
+        file_path: str, 
+        sheets: dict[str, int], 
+        engine: str | None = None
+) -> dict[str, pd.DataFrame]:
+    """
+    Reads several sheets of an Excel workbook, each with its own header row, opening the workbook at most once.
+
+    Sheets with a valid sidecar are loaded from it; the workbook is only opened and decompressed
+    if at least one sheet has to be parsed, and then all of those sheets are parsed from the same
+    open workbook.
+
+    Args:
+        file_path (str): The path of the Excel workbook.
+        sheets (dict[str, int]): The sheets to read, mapped to the row (0-indexed) holding their column labels.
+        engine (str | None): The Excel reader backend (default is the fastest installed backend). All
+            backends produce identical frames, so sidecars are shared between them.
+
+    Returns:
+        dict[str, pd.DataFrame]: The parsed sheets, in the order requested.
+    """
+    try:
+        source_hash = file_sha256(file_path)
+    except OSError as e:
+        # Without the workbook bytes there is nothing to key on; let pandas report the problem.
+        logger.warning("Sheet cache disabled for %s: %s", file_path, e)
+        return {sheet_name: read_sheet(file_path, sheet_name, header, engine)
+                for sheet_name, header in sheets.items()}
+
+    frames = {}
+    for sheet_name, header in sheets.items():
+        path = sidecar_path(file_path, sheet_name, header)
+        df = _read_sidecar(path, source_hash, sheet_name, header)
+        if df is not None:
+            logger.info("Loaded sheet '%s' of %s from cache %s", sheet_name, file_path, path)
+            frames[sheet_name] = df
+
+    missing = {sheet_name: header for sheet_name, header in sheets.items() if sheet_name not in frames}
+    if missing:
+        # A single sheet is read straight from the path; several share one open workbook
+        workbook = open_workbook(file_path, engine) if len(missing) > 1 else None
+        try:
+            for sheet_name, header in missing.items():
+                # Labels are read as text whatever the header cells hold, from the workbook or its sidecar
+                df = read_sheet(workbook or file_path, sheet_name, header, engine)
+                df.columns = df.columns.astype(str)
+                path = sidecar_path(file_path, sheet_name, header)
+                _write_sidecar(df, path, source_hash, sheet_name, header)
+                logger.info("Parsed sheet '%s' of %s and cached it at %s", sheet_name, file_path, path)
+                frames[sheet_name] = df
+        finally:
+            if workbook is not None:
+                workbook.close()
+
+    return {sheet_name: frames[sheet_name] for sheet_name in sheets}
+
+
+def read_excel_cached(file_path: str, sheet_name: str, header: int, engine: str | None = None) -> pd.DataFrame:
+    """
+    Reads a sheet of an Excel workbook, parsing the workbook only when its bytes have changed.
+
+    Parsed sheets are stored in an uncompressed Arrow sidecar next to the workbook (a tensor of
+    their float columns followed by an IPC stream of the others, as arrow_handoff.write_frame),
+    keyed on the workbook's content hash, the sheet name and the header row, and are loaded back
+    through a memory map. Column labels are read as text. Any stage or later run asking for the same sheet of the same bytes reuses it.
+
+    Args:
+        file_path (str): The path of the Excel workbook.
+        sheet_name (str): The name of the sheet to read.
+        header (int): Row (0-indexed) to use for the column labels of the parsed DataFrame.
+        engine (str | None): The Excel reader backend (default is the fastest installed backend).
+
+    Returns:
+        pd.DataFrame: The parsed sheet.
+    """
+    return read_excel_sheets_cached(file_path, {sheet_name: header}, engine)[sheet_name]
@@ -0,0 +1,220 @@
+import os
+import glob
+import pickle
+import hashlib
+import logging
+import contextlib
+import pandas as pd
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.sheet_cache import file_sha256
+from energytrend_etl.arrow_handoff import ArrowPickler, ArrowUnpickler
+
+if TYPE_CHECKING:
+    from energytrend_etl.instrumentation import RunMetrics
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/stage_cache.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_CACHE_DIR = './.stage_cache'
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """
+    Computes a content hash of a DataFrame, covering its values, index, column labels and dtypes.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the DataFrame's contents.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((list(df.columns), [str(dtype) for dtype in df.dtypes])).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def path_digest(path: str) -> str:
+    """
+    Computes a content hash of a file, or a fixed marker if the file does not exist.
+
+    Args:
+        path (str): The path of the file to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the file, or 'missing'.
+    """
+    return file_sha256(path) if os.path.isfile(path) else 'missing'
+
+
+def succeeded(value: Any) -> bool:
+    """
+    Tells whether a stage result is a success, following the pipeline's empty-result convention for failures.
+
+    Args:
+        value (Any): The value returned by a stage.
+
+    Returns:
+        bool: False for empty DataFrames, empty strings and negative counts; True otherwise.
+    """
+    if isinstance(value, pd.DataFrame):
+        return not value.empty
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value >= 0
+    return bool(value)
+
+
+@dataclass(frozen=True)
+class WrittenResult:
+    """The result of a stage that writes files, stored with the digests of the files it wrote."""
+    value: Any
+    digests: dict[str, str]
+
+    def intact(self) -> bool:
+        """Tells whether every file the stage wrote is still there, unchanged."""
+        return all(path_digest(path) == digest for path, digest in self.digests.items())
+
+
+class StageCache:
+    """
+    A local store of stage results keyed on the content hashes of the stages' inputs.
+
+    Only successful results are stored, so a run that failed part-way resumes from the last
+    completed stage, and a run whose inputs did not change skips every stage. Large DataFrames
+    in a result are stored as Arrow IPC files next to its pickle and memory-mapped when loaded.
+
+    Stages that write files name them through `outputs`, and are only skipped while those files
+    are unchanged. Stages whose effects cannot be checked, such as database writes, are not cached.
+    """
+
+    def __init__(
+            self, 
+            cache_dir: str = DEFAULT_CACHE_DIR, 
+            max_entries: int = 256, 
+            enabled: bool = True, 
+            metrics: 'RunMetrics | None' = None
+    ):
+        """
+        Args:
+            cache_dir (str): The directory where results are persisted (default is './.stage_cache').
+            max_entries (int): The number of results kept before the oldest are evicted (default is 256).
+            enabled (bool): Whether results are looked up and stored at all (default is True).
+            metrics (RunMetrics | None): Records the resource usage of every stage run through the
+                cache, including cache hits (default is None, no instrumentation).
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.metrics = metrics
+
+    def key(self, stage: str, *inputs: Any) -> str:
+        """Builds the cache key of a stage from its name and input digests or parameters."""
+        return hashlib.sha256(repr((stage, inputs)).encode()).hexdigest()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+    def load(self, stage: str, key: str) -> tuple[bool, Any]:
+        """Loads a stored result, returning (hit, value)."""
+        try:
+            path = self._path(stage, key)
+            with open(path, 'rb') as file:
+                return True, ArrowUnpickler(file, path).load()
+        except FileNotFoundError:
+            return False, None
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+            logger.warning("Ignoring unreadable cached result of %s: %s", stage, e)
+            return False, None
+
+    def store(self, stage: str, key: str, value: Any) -> None:
+        """Persists a result atomically and evicts the oldest results beyond `max_entries`."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(stage, key)
+            with open(f"{path}.tmp", 'wb') as file:
+                ArrowPickler(file, path).dump(value)
+            os.replace(f"{path}.tmp", path)
+            self._evict()
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning("Could not cache result of %s: %s", stage, e)
+
+    def _evict(self) -> None:
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+        if len(entries) > self.max_entries:
+            entries.sort(key=os.path.getmtime)
+            for path in entries[:len(entries) - self.max_entries]:
+                for frame_path in glob.glob(f"{glob.escape(path)}.*.arrow"):
+                    os.remove(frame_path)
+                os.remove(path)
+
+    def run(
+            self, 
+            stage: str, 
+            inputs: tuple | None, 
+            func: Callable[..., Any], 
+            *args: Any, 
+            outputs: Callable[[Any], list[str]] | None = None, 
+            **kwargs: Any
+    ) -> Any:
+        """
+        Runs a stage unless a result for the same inputs is already stored.
+
+        Args:
+            stage (str): The name of the stage.
+            inputs (tuple | None): Digests of the stage's data inputs and any parameters that affect
+                its result, or None for a stage with effects the cache cannot check, which always runs.
+            func (Callable[..., Any]): The stage to run on a cache miss.
+            *args (Any): Positional arguments for `func`.
+            outputs (Callable[[Any], list[str]] | None): Maps the stage's result to the files it wrote;
+                a stored result is only reused while they are unchanged (default is None, no files).
+            **kwargs (Any): Keyword arguments for `func`.
+
+        Returns:
+            Any: The cached or freshly computed result.
+        """
+        with self.metrics.measure(stage) if self.metrics else contextlib.nullcontext() as record:
+            hit, value = self._run(stage, inputs, func, outputs, *args, **kwargs)
+            if record is not None:
+                record.cached = hit
+                record.observe(value, *args)
+        return value
+
+    def _run(
+            self, 
+            stage: str, 
+            inputs: tuple | None, 
+            func: Callable[..., Any], 
+            outputs: Callable[[Any], list[str]] | None, 
+            *args: Any, 
+            **kwargs: Any
+    ) -> tuple[bool, Any]:
+        if not self.enabled or inputs is None:
+            return False, func(*args, **kwargs)
+
+        key = self.key(stage, *inputs)
+        hit, value = self.load(stage, key)
+        if hit and outputs is not None:
+            hit = isinstance(value, WrittenResult) and value.intact()
+            if hit:
+                value = value.value
+            else:
+                logger.info("Outputs of %s are missing or changed; running it again.", stage)
+        if hit:
+            logger.info("Inputs of %s unchanged; reusing cached result.", stage)
+            return True, value
+
+        value = func(*args, **kwargs)
+        if succeeded(value):
+            stored = value
+            if outputs is not None:
+                stored = WrittenResult(value, {path: path_digest(path) for path in outputs(value)})
+            self.store(stage, key, stored)
+        return False, value
@@ -3,6 +3,11 @@ import logging
 import pandas as pd
 from prefect import task
 from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.sheet_cache import read_excel_cached
+from energytrend_etl.energy_table import EnergyTable
+from energytrend_etl.writers import columnar_dtypes
+from energytrend_etl.preprocess_data import METADATA_COLUMNS
+from energytrend_etl.revisions import DEFAULT_SNAPSHOT_DIR, diff_frames, load_snapshot
 
 
 # Set up logging
@@ -13,58 +18,94 @@ logger = setup_logger(
 )
 
 
+def revisions_path(dataset: str, report_dir: str = './report') -> str:
+    """Builds the path of the revisions table that validate_data writes for a dataset."""
+    return os.path.join(report_dir, f"{os.path.splitext(dataset)[0]}_revisions.csv")
+
+
 # Prefect task
 @task(log_prints=True, tags=["validate_data"])
-def validate_data(filename: str, df: pd.DataFrame, sheet_name: str, header: int) -> pd.DataFrame:
+def validate_data(
+        filename: str, 
+        df: pd.DataFrame, 
+        sheet_name: str, 
+        header: int, 
+        snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, 
+        report_dir: str = './report', 
+        dataset: str | None = None, 
+        table: EnergyTable | None = None
+) -> pd.DataFrame:
     """
-    Function to validate the schema of the data.
+    Function to validate the schema of the data and detect revisions against the last published snapshot.
 
     Args:
         filename (str): The name of the Excel file with previous data.
         df (pd.DataFrame): The processed DataFrame to validate.
         sheet_name (str): The name of the sheet in the Excel file.
         header (int): Row (0-indexed) to use for the column labels of the parsed DataFrame.
+        snapshot_dir (str): The directory holding published snapshots (default is './output/snapshots').
+        report_dir (str): The directory where the revisions table will be saved (default is './report').
+        dataset (str | None): The name that snapshots and the revisions table are keyed on, when several
+            sheets of one workbook are validated (default is `filename`).
+        table (EnergyTable | None): The table of `df`, if the flow already converted it (default is None).
 
     Returns:
-        pd.DataFrame: The previous unprocessed DataFrame for reference.
+        pd.DataFrame: The previous DataFrame for reference.
     """
     try:
-        # Read the previous unprocessed dataset
-        previous_df = pd.read_excel(f"./data/{filename}", sheet_name=sheet_name, header=header)
+        dataset = dataset or filename
+
+        # Compare against the last published snapshot of the dataset
+        previous_df = load_snapshot(dataset, snapshot_dir)
+        if previous_df is None:
+            logger.info("No published snapshot for %s; validating against the workbook itself.", filename)
 
-        # Basic cleaning on the previous DataFrame
-        previous_df.rename(columns=lambda x: x.replace(' ', '_').replace('\n', '_'), inplace=True)
-        previous_df.set_index('Column1', inplace=True)
+            # Read the previous unprocessed dataset from the shared parsed-sheet cache
+            previous_df = read_excel_cached(f"./data/{filename}", sheet_name=sheet_name, header=header)
 
-        # Subset the columns of interest from the previous data (exclude engineered columns)
-        previous_df = previous_df[df.columns[:-2]]
-        new_df = df[df.columns[:-2]]
+            # Basic cleaning on the previous DataFrame
+            previous_df.rename(columns=lambda x: x.replace(' ', '_').replace('\n', '_'), inplace=True)
+            previous_df.set_index('Column1', inplace=True)
+
+        # Subset the columns of interest (exclude engineered columns); the checks below only read
+        # labels and dtypes, so the processed DataFrame itself is not copied
+        previous_metadata = previous_df.columns.intersection(METADATA_COLUMNS)
+        if len(previous_metadata):
+            previous_df = previous_df.drop(columns=previous_metadata)
+        new_columns = df.columns.difference(METADATA_COLUMNS, sort=False)
+        common_columns = new_columns.intersection(previous_df.columns, sort=False)
 
         # Validation checks
-        if set(previous_df.columns) != set(new_df.columns):
+        if set(previous_df.columns) != set(new_columns):
             logger.warning("Columns in previous and new data don't match")
         else:
             logger.info("Columns in previous and new data match")
 
-        if not all(previous_df.dtypes == new_df.dtypes):
+        # Snapshots store blanks as nulls rather than '', so both sides are compared as they would be stored
+        if not all(columnar_dtypes(previous_df)[common_columns] == columnar_dtypes(df)[common_columns]):
             logger.warning("Data types in previous and new data don't match")
         else:
             logger.info("Data types in previous and new data match")
 
-        if previous_df.shape[0] != new_df.shape[0]:
+        if previous_df.shape[0] != df.shape[0]:
             logger.warning("Number of rows in previous and new data don't match")
         else:
             logger.info("Number of rows in previous and new data match")
 
-        if not previous_df.equals(new_df):
-            logger.warning("Values in previous and new data don't match")
+        # Cell-level revisions to previously published values
+        revisions = diff_frames(previous_df, df, table)
+        if not revisions.empty:
+            logger.warning("%s value(s) revised since the previous data", len(revisions))
         else:
             logger.info("Values in previous and new data match")
 
+        os.makedirs(report_dir, exist_ok=True)
+        revisions.to_csv(revisions_path(dataset, report_dir), index=False)
+
         return previous_df
 
     except Exception as e:
-        logger.error(f"Error validating data: {str(e)}")
+        logger.error("Error validating data: %s", e)
 
         # Return an empty DataFrame on error for consistency
         return pd.DataFrame()
@@ -1,9 +1,11 @@
 import os
 import logging
+import threading
 import pandas as pd
 from prefect import task
-from ydata_profiling import ProfileReport
 from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.energy_table import EnergyTable
+from energytrend_etl.consistency_rules import DEFAULT_RULES, evaluate_rules
 
 
 # Set up logging
@@ -14,6 +16,9 @@ logger = setup_logger(
     log_format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# ydata_profiling draws its plots through matplotlib's global state, so reports are rendered one at a time
+_PROFILING_LOCK = threading.Lock()
+
 
 # Prefect task
 @task(log_prints=True, tags=["profiling_report"])
@@ -38,9 +43,12 @@ def generate_data_profiling_report(
         os.makedirs(report_dir, exist_ok=True)
         
         # Generate standard HTML profiling report with pandas_profiling
-        profile = ProfileReport(df, minimal=True)
+        # ydata_profiling is imported here as it is by far the slowest dependency to load
+        from ydata_profiling import ProfileReport
         save_path_html = os.path.join(report_dir, f"{save_filename}_data_profiling.html")
-        profile.to_file(save_path_html)
+        with _PROFILING_LOCK:
+            profile = ProfileReport(df, minimal=True)
+            profile.to_file(save_path_html)
 
         # Generate additional profiling statistics in CSV format
         missing_values = df.isna().sum()
@@ -54,11 +62,11 @@ def generate_data_profiling_report(
         save_path_csv = os.path.join(report_dir, f"{save_filename}_data_profiling.csv")
         description.to_csv(save_path_csv)
 
-        logger.info(f"Data profiling report generated at {save_path_html} and {save_path_csv}")
+        logger.info("Data profiling report generated at %s and %s", save_path_html, save_path_csv)
         return save_path_html
 
     except Exception as e:
-        logger.error(f"Error generating data profiling report: {str(e)}")
+        logger.error("Error generating data profiling report: %s", e)
         return ""
 
 
@@ -68,7 +76,9 @@ def generate_data_consistency_report(
         df: pd.DataFrame, 
         previous_df: pd.DataFrame, 
         save_filename: str, 
-        report_dir: str = './report'
+        report_dir: str = './report', 
+        rules: tuple = DEFAULT_RULES, 
+        table: EnergyTable | None = None
 ) -> str:
     """
     Function to generate a data consistency report.
@@ -78,52 +88,29 @@ def generate_data_consistency_report(
         previous_df (pd.DataFrame): The previous unprocessed DataFrame to compare against.
         save_filename (str): The base filename to use for the saved report.
         report_dir (str): The directory where reports will be saved (default is './report').
+        rules (tuple): The consistency rules to evaluate (default is consistency_rules.DEFAULT_RULES).
+        table (EnergyTable | None): The table of `df`, if the flow already converted it (default is None).
 
     Returns:
         str: Path to the generated data consistency report.
     """
     try:
-        report = {}
-
         # Ensure the report directory exists
         os.makedirs(report_dir, exist_ok=True)
 
-        # Check for correct time format
-        time_cols = ['processed_date']
-        for col in time_cols:
-            if col in df.columns and not pd.api.types.is_datetime64_dtype(df[col]):
-                report[col] = f"Column {col} has incorrect time format"
-            else:
-                report[col] = f"Column {col} has correct time format"
-
-        # Check for missing values
-        for col in df.columns:
-            if df[col].isnull().sum() > 0:
-                report[col] = f"Column {col} has {df[col].isnull().sum()} missing value(s)"
-            else:
-                report[col] = "No missing values"
-
-        # Check for new and missing columns
-        new_cols = set(df.columns) - set(previous_df.columns)
-        if new_cols:
-            report['new_columns'] = f"New column(s) detected: {new_cols}"
-        else:
-            report['new_columns'] = "No new column(s) detected"
-        
-        missing_cols = set(previous_df.columns) - set(df.columns)
-        if missing_cols:
-            report['missing_columns'] = f"Missing column(s) detected: {missing_cols}"
-        else:
-            report['missing_columns'] = "No missing column(s) detected"
-        
+        # One row per rule and column, so results for the same column no longer overwrite each other
+        report_df = evaluate_rules(df, previous_df, rules, table)
+        failed = report_df.loc[~report_df['passed']]
+        if not failed.empty:
+            logger.warning("%s consistency check(s) failed: %s", len(failed), failed.groupby('rule').size().to_dict())
+
         # Save report to file
-        report_df = pd.DataFrame(report.items(), columns=['Check', 'Result'])
         save_path_csv = os.path.join(report_dir, f"{save_filename}_data_consistency.csv")
         report_df.to_csv(save_path_csv, index=False)
-        logger.info(f"Data consistency report generated at {save_path_csv}")
+        logger.info("Data consistency report generated at %s", save_path_csv)
 
         return save_path_csv
 
     except Exception as e:
-        logger.error(f"Error generating data consistency report: {str(e)}")
+        logger.error("Error generating data consistency report: %s", e)
         return ""
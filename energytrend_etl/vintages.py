@@ -0,0 +1,360 @@
+import os
+import re
+import sqlite3
+import logging
+import numpy as np
+import pandas as pd
+from datetime import date
+from energytrend_etl.orchestration import LazyTasks
+from energytrend_etl.logger_config import setup_logger
+from energytrend_etl.warehouse import ANNUAL_QUARTER, DEFAULT_WAREHOUSE, dataset_name
+from energytrend_etl.warehouse import connect as connect_warehouse
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/vintages.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Prefect tasks, built on first access (see LazyTasks)
+_tasks = LazyTasks(globals())
+
+# Each release stores only the cells it changed: new cells, revised values or provisional flags,
+# and tombstones for cells it dropped. The primary key is the sorted index of as-of queries.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vintages (
+    dataset TEXT NOT NULL,
+    category TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    release TEXT NOT NULL,
+    value REAL,
+    provisional INTEGER NOT NULL DEFAULT 0,
+    removed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dataset, category, year, quarter, release)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS releases (
+    dataset TEXT NOT NULL,
+    release TEXT NOT NULL,
+    filename TEXT,
+    cells INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    PRIMARY KEY (dataset, release)
+) WITHOUT ROWID;
+"""
+
+INSERT = """
+INSERT INTO vintages (dataset, category, year, quarter, release, value, provisional, removed)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# SQLite takes the other columns of a MAX() aggregate from the row holding the maximum,
+# so this is the latest stored version of every cell, read in index order
+AS_OF = """
+SELECT category, year, quarter, value, provisional, removed, MAX(release) AS release
+FROM vintages
+WHERE dataset = ? AND release {operator} ? {filters}
+GROUP BY category, year, quarter
+ORDER BY category, year, quarter
+"""
+
+KEY_COLUMNS = ['category', 'year', 'quarter']
+
+CELL_COLUMNS = KEY_COLUMNS + ['value', 'provisional']
+
+MONTHS = {month: number for number, month in enumerate(
+    ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'], start=1)}
+
+
+def release_date(filename: str) -> str | None:
+    """
+    Derives the release date of a workbook from its filename.
+
+    Args:
+        filename (str): The workbook filename, e.g. 'ET_3.1_JUL_24.xlsx' or 'ET_3.1_JUL_24_Annual.xlsx'.
+
+    Returns:
+        str | None: The ISO year and month of the release, e.g. '2024-07', or None if the filename has no release tag.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = re.search(r'_([A-Z]{3})_(\d{2})(?=_|$)', stem)
+    if not match or match.group(1) not in MONTHS:
+        return None
+    return f"20{match.group(2)}-{MONTHS[match.group(1)]:02d}"
+
+
+def connect(db_path: str = DEFAULT_WAREHOUSE) -> sqlite3.Connection:
+    """
+    Opens the warehouse, creating the vintage tables if needed.
+
+    Args:
+        db_path (str): The path of the SQLite database file (default is './output/energytrend.sqlite').
+
+    Returns:
+        sqlite3.Connection: An open connection in WAL mode.
+    """
+    conn = connect_warehouse(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _cells(long_df: pd.DataFrame) -> pd.DataFrame:
+    """Converts long-format rows to the cells of a release, with plain-typed keys."""
+    return pd.DataFrame({
+        'category': long_df['category'].astype(str).to_numpy(),
+        'year': long_df['year'].astype(int).to_numpy(),
+        'quarter': long_df['quarter'].astype('Int64').fillna(ANNUAL_QUARTER).astype(int).to_numpy(),
+        'value': long_df['value'].astype(np.float64).to_numpy(),
+        'provisional': long_df['provisional'].astype(int).to_numpy() if 'provisional' in long_df else 0,
+    })
+
+
+def _state(conn: sqlite3.Connection, dataset: str, release: str, inclusive: bool = True, filters: str = '',
+           params: tuple = ()) -> pd.DataFrame:
+    """Reads every cell as published in `release` (or just before it), omitting removed cells."""
+    query = AS_OF.format(operator='<=' if inclusive else '<', filters=filters)
+    state = pd.read_sql_query(query, conn, params=(dataset, release, *params))
+    state = state[state['removed'] == 0].drop(columns='removed').reset_index(drop=True)
+    state['value'] = state['value'].astype(np.float64)
+    return state
+
+
+def _delta(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the cells to store for a release: cells that are new or changed since the previous
+    state, and tombstones for cells that are no longer published.
+    """
+    merged = current[CELL_COLUMNS].merge(previous[CELL_COLUMNS], on=KEY_COLUMNS, how='outer',
+                                         suffixes=('', '_previous'), indicator=True)
+    value, old = merged['value'].to_numpy(), merged['value_previous'].to_numpy()
+    same_value = (value == old) | (np.isnan(value) & np.isnan(old))
+    changed = (merged['_merge'] == 'left_only') | (
+        (merged['_merge'] == 'both') & (~same_value | (merged['provisional'] != merged['provisional_previous'])))
+    removed = merged['_merge'] == 'right_only'
+
+    delta = merged.loc[changed | removed, CELL_COLUMNS].copy()
+    delta['removed'] = removed[changed | removed].astype(int).to_numpy()
+    delta.loc[delta['removed'] == 1, ['value', 'provisional']] = [np.nan, 0]
+    delta['provisional'] = delta['provisional'].astype(int)
+    return delta
+
+
+def _write_release(conn: sqlite3.Connection, dataset: str, release: str, delta: pd.DataFrame) -> None:
+    """Replaces the stored cells of a release."""
+    conn.execute('DELETE FROM vintages WHERE dataset = ? AND release = ?', (dataset, release))
+    value = delta['value'].astype(object).where(delta['value'].notna(), None)
+    conn.executemany(INSERT, zip(
+        [dataset] * len(delta),
+        delta['category'].tolist(),
+        delta['year'].astype(int).tolist(),
+        delta['quarter'].astype(int).tolist(),
+        [release] * len(delta),
+        value.tolist(),
+        delta['provisional'].astype(int).tolist(),
+        delta['removed'].astype(int).tolist(),
+    ))
+
+
+def record_vintage(
+        conn: sqlite3.Connection,
+        long_df: pd.DataFrame,
+        dataset: str,
+        release: str,
+        filename: str | None = None
+) -> int:
+    """
+    Records the cells of one release, storing only those that changed since the release before it.
+
+    Releases may be recorded in any order, e.g. by a parallel backfill, and re-recorded: the next
+    later release's stored changes are recomputed against this one, so as-of queries for every
+    release stay exact.
+
+    Args:
+        conn (sqlite3.Connection): An open connection from vintages.connect.
+        long_df (pd.DataFrame): Rows as produced by preprocess_data.reshape_to_long.
+        dataset (str): The dataset the rows belong to.
+        release (str): The ISO release date, e.g. '2024-07' or '2024-07-25'.
+        filename (str | None): The workbook the release was read from (default is None).
+
+    Returns:
+        int: The number of cells new, revised or removed since the previous release.
+    """
+    current = _cells(long_df)
+    # Take the write lock before reading, so concurrent writers cannot interleave releases
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        delta = _delta(_state(conn, dataset, release, inclusive=False), current)
+        next_release, = conn.execute('SELECT MIN(release) FROM releases WHERE dataset = ? AND release > ?',
+                                     (dataset, release)).fetchone()
+        # Read the next release as published before this one is written, to store it against this one
+        following = _state(conn, dataset, next_release) if next_release is not None else None
+
+        _write_release(conn, dataset, release, delta)
+        if following is not None:
+            following_delta = _delta(current, following)
+            _write_release(conn, dataset, next_release, following_delta)
+            conn.execute('UPDATE releases SET changed = ? WHERE dataset = ? AND release = ?',
+                         (len(following_delta), dataset, next_release))
+            logger.info("Recomputed the changes of %s release %s against release %s.", dataset, next_release, release)
+
+        conn.execute("""
+            INSERT INTO releases (dataset, release, filename, cells, changed) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (dataset, release) DO UPDATE SET
+                filename = excluded.filename, cells = excluded.cells, changed = excluded.changed
+        """, (dataset, release, filename, len(current), len(delta)))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(delta)
+
+
+def as_of(
+        conn: sqlite3.Connection,
+        dataset: str,
+        release: str,
+        categories: list[str] | None = None,
+        start_year: int | None = None,
+        end_year: int | None = None
+) -> pd.DataFrame:
+    """
+    Queries a dataset as it was published in a release.
+
+    Args:
+        conn (sqlite3.Connection): An open connection from vintages.connect.
+        dataset (str): The dataset to query.
+        release (str): An ISO release date; the latest release on or before it is used.
+        categories (list[str] | None): Only return these categories (default is all categories).
+        start_year (int | None): The first year to return (default is unbounded).
+        end_year (int | None): The last year to return (default is unbounded).
+
+    Returns:
+        pd.DataFrame: One row per cell with 'category', 'year', 'quarter', 'value', 'provisional' and
+            'release', the release the value was last changed in.
+    """
+    clauses, params = [], []
+    if categories:
+        clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+        params.extend(categories)
+    if start_year is not None:
+        clauses.append('year >= ?')
+        params.append(start_year)
+    if end_year is not None:
+        clauses.append('year <= ?')
+        params.append(end_year)
+    filters = ''.join(f" AND {clause}" for clause in clauses)
+    return _state(conn, dataset, release, filters=filters, params=tuple(params))
+
+
+def value_as_of(
+        conn: sqlite3.Connection,
+        dataset: str,
+        category: str,
+        year: int,
+        quarter: int | None,
+        release: str
+) -> float | None:
+    """
+    Looks up one value as published in a release, with a single seek on the sorted index.
+
+    Args:
+        conn (sqlite3.Connection): An open connection from vintages.connect.
+        dataset (str): The dataset, e.g. 'ET_3.1'.
+        category (str): The category, e.g. 'Crude oil'.
+        year (int): The year of the period.
+        quarter (int | None): The quarter of the period, or None for an annual value.
+        release (str): An ISO release date; the latest release on or before it is used.
+
+    Returns:
+        float | None: The value, or None if it was not published (or blank) in that release.
+    """
+    row = conn.execute("""
+        SELECT value, removed FROM vintages
+        WHERE dataset = ? AND category = ? AND year = ? AND quarter = ? AND release <= ?
+        ORDER BY release DESC LIMIT 1
+    """, (dataset, category, year, ANNUAL_QUARTER if quarter is None else quarter, release)).fetchone()
+    if row is None or row[1]:
+        return None
+    return row[0]
+
+
+def cell_history(conn: sqlite3.Connection, dataset: str, category: str, year: int, quarter: int | None) -> pd.DataFrame:
+    """
+    Lists every published version of one value.
+
+    Args:
+        conn (sqlite3.Connection): An open connection from vintages.connect.
+        dataset (str): The dataset, e.g. 'ET_3.1'.
+        category (str): The category, e.g. 'Crude oil'.
+        year (int): The year of the period.
+        quarter (int | None): The quarter of the period, or None for an annual value.
+
+    Returns:
+        pd.DataFrame: The 'release', 'value', 'provisional' and 'removed' of each release that changed the value.
+    """
+    return pd.read_sql_query("""
+        SELECT release, value, provisional, removed FROM vintages
+        WHERE dataset = ? AND category = ? AND year = ? AND quarter = ?
+        ORDER BY release
+    """, conn, params=(dataset, category, year, ANNUAL_QUARTER if quarter is None else quarter))
+
+
+def list_releases(conn: sqlite3.Connection, dataset: str) -> pd.DataFrame:
+    """
+    Lists the recorded releases of a dataset.
+
+    Args:
+        conn (sqlite3.Connection): An open connection from vintages.connect.
+        dataset (str): The dataset, e.g. 'ET_3.1'.
+
+    Returns:
+        pd.DataFrame: The 'release', 'filename', number of 'cells' and number of 'changed' cells of each release.
+    """
+    return pd.read_sql_query('SELECT release, filename, cells, changed FROM releases WHERE dataset = ? ORDER BY release',
+                             conn, params=(dataset,))
+
+
+# Prefect task
+@_tasks.task(log_prints=True, tags=["save_data"])
+def save_data_to_vintage_store(
+        long_df: pd.DataFrame,
+        filename: str,
+        db_path: str = DEFAULT_WAREHOUSE,
+        release: str | None = None
+) -> int:
+    """
+    Function to record a release in the vintage store, keeping every earlier release queryable.
+
+    Args:
+        long_df (pd.DataFrame): The long-format DataFrame of the release.
+        filename (str): The workbook filename the data was read from.
+        db_path (str): The path of the SQLite database file (default is './output/energytrend.sqlite').
+        release (str | None): The ISO year and month of the release (default is derived from the
+            filename, or the current month if the filename has no release tag).
+
+    Returns:
+        int: The number of cells new, revised or removed since the previous release, or -1 on error.
+    """
+    try:
+        dataset = dataset_name(filename)
+        release = release or release_date(filename)
+        if release is None:
+            release = date.today().strftime('%Y-%m')
+            logger.warning("No release tag in %s; recording it as released on %s.", filename, release)
+        conn = connect(db_path)
+        try:
+            changed = record_vintage(conn, long_df, dataset, release, filename)
+        finally:
+            conn.close()
+        logger.info("Recorded %s release %s in %s: %s of %s cell(s) changed.", dataset, release, db_path, changed, len(long_df))
+        return changed
+
+    except Exception as e:
+        logger.error("Error saving data to the vintage store: %s", e)
+        return -1
+
+
+__getattr__ = _tasks.getattr()
@@ -0,0 +1,222 @@
+import os
+import re
+import sqlite3
+import logging
+import pandas as pd
+from energytrend_etl.orchestration import LazyTasks
+from energytrend_etl.logger_config import setup_logger
+
+
+# Set up logging
+logger = setup_logger(
+    name=__name__,
+    log_file='./logs/warehouse.log',
+    level=logging.INFO,
+    log_format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Prefect tasks, built on first access (see LazyTasks)
+_tasks = LazyTasks(globals())
+
+DEFAULT_WAREHOUSE = './output/energytrend.sqlite'
+
+# The sheet whose outputs are named after the workbook alone, as before multi-sheet mode
+PRIMARY_SHEET = 'Quarter'
+
+# Annual observations have no quarter; 0 keeps them in the primary key
+ANNUAL_QUARTER = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    dataset TEXT NOT NULL,
+    category TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    value REAL,
+    provisional INTEGER NOT NULL DEFAULT 0,
+    processed_date TEXT,
+    filename TEXT,
+    PRIMARY KEY (dataset, category, year, quarter)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_by_period ON observations (dataset, year, quarter);
+"""
+
+# Only rows whose value or provisional flag changed are rewritten
+UPSERT = """
+INSERT INTO observations (dataset, category, year, quarter, value, provisional, processed_date, filename)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (dataset, category, year, quarter) DO UPDATE SET
+    value = excluded.value,
+    provisional = excluded.provisional,
+    processed_date = excluded.processed_date,
+    filename = excluded.filename
+WHERE observations.value IS NOT excluded.value
+   OR observations.provisional IS NOT excluded.provisional
+"""
+
+
+def dataset_name(filename: str) -> str:
+    """
+    Derives a dataset name that is stable across releases from a workbook filename.
+
+    Args:
+        filename (str): The workbook filename, e.g. 'ET_3.1_JUL_24.xlsx', optionally followed by a
+            sheet suffix, e.g. 'ET_3.1_JUL_24_Annual.xlsx'.
+
+    Returns:
+        str: The filename without extension and release suffix, e.g. 'ET_3.1' or 'ET_3.1_Annual'.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return re.sub(r'_[A-Z]{3}_\d{2}(?=_|$)', '', stem, count=1)
+
+
+def sheet_filename(filename: str, sheet_name: str) -> str:
+    """
+    Names the outputs of one sheet of a workbook.
+
+    Args:
+        filename (str): The workbook filename, e.g. 'ET_3.1_JUL_24.xlsx'.
+        sheet_name (str): The sheet name, e.g. 'Main Table'.
+
+    Returns:
+        str: `filename` for the primary sheet, otherwise the filename with the sheet appended,
+            e.g. 'ET_3.1_JUL_24_Main_Table.xlsx'.
+    """
+    if sheet_name == PRIMARY_SHEET:
+        return filename
+    stem, extension = os.path.splitext(filename)
+    safe_sheet = ''.join(c if c.isalnum() else '_' for c in sheet_name)
+    return f"{stem}_{safe_sheet}{extension}"
+
+
+def connect(db_path: str = DEFAULT_WAREHOUSE) -> sqlite3.Connection:
+    """
+    Opens the warehouse, creating its schema if needed.
+
+    Args:
+        db_path (str): The path of the SQLite database file (default is './output/energytrend.sqlite').
+
+    Returns:
+        sqlite3.Connection: An open connection in WAL mode, so readers are not blocked by a writer.
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def upsert_observations(
+        conn: sqlite3.Connection,
+        long_df: pd.DataFrame,
+        dataset: str,
+        batch_size: int = 10000
+) -> int:
+    """
+    Upserts long-format rows keyed on (dataset, category, year, quarter), writing only changed rows.
+
+    Args:
+        conn (sqlite3.Connection): An open warehouse connection.
+        long_df (pd.DataFrame): Rows as produced by preprocess_data.reshape_to_long.
+        dataset (str): The dataset the rows belong to.
+        batch_size (int): The number of rows per transaction (default is 10000).
+
+    Returns:
+        int: The number of rows inserted or updated.
+    """
+    n_rows = len(long_df)
+    # Plain Python values, as sqlite3 does not bind NumPy integers
+    quarter = long_df['quarter'].astype('Int64').fillna(ANNUAL_QUARTER).astype(int).tolist()
+    value = long_df['value'].astype(object).where(long_df['value'].notna(), None).tolist()
+    provisional = long_df['provisional'].astype(int).tolist() if 'provisional' in long_df else [0] * n_rows
+    processed_date = long_df['processed_date'].astype(str).tolist() if 'processed_date' in long_df else [None] * n_rows
+    filename = long_df['filename'].astype(str).tolist() if 'filename' in long_df else [None] * n_rows
+    rows = list(zip(
+        [dataset] * n_rows,
+        long_df['category'].astype(str).tolist(),
+        long_df['year'].astype(int).tolist(),
+        quarter,
+        value,
+        provisional,
+        processed_date,
+        filename,
+    ))
+
+    changes_before = conn.total_changes
+    for start in range(0, len(rows), batch_size):
+        with conn:
+            conn.executemany(UPSERT, rows[start:start + batch_size])
+    return conn.total_changes - changes_before
+
+
+def query_observations(
+        conn: sqlite3.Connection,
+        dataset: str | None = None,
+        categories: list[str] | None = None,
+        start_year: int | None = None,
+        end_year: int | None = None
+) -> pd.DataFrame:
+    """
+    Queries observations by dataset, categories and an inclusive year range through the table's indexes.
+
+    Args:
+        conn (sqlite3.Connection): An open warehouse connection.
+        dataset (str | None): Only return this dataset (default is all datasets).
+        categories (list[str] | None): Only return these categories (default is all categories).
+        start_year (int | None): The first year to return (default is unbounded).
+        end_year (int | None): The last year to return (default is unbounded).
+
+    Returns:
+        pd.DataFrame: The matching observations ordered by dataset, category, year and quarter.
+    """
+    clauses, params = [], []
+    if dataset is not None:
+        clauses.append('dataset = ?')
+        params.append(dataset)
+    if categories:
+        clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+        params.extend(categories)
+    if start_year is not None:
+        clauses.append('year >= ?')
+        params.append(start_year)
+    if end_year is not None:
+        clauses.append('year <= ?')
+        params.append(end_year)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    query = f"SELECT * FROM observations {where} ORDER BY dataset, category, year, quarter"
+    return pd.read_sql_query(query, conn, params=params)
+
+
+# Prefect task
+@_tasks.task(log_prints=True, tags=["save_data"])
+def save_data_to_warehouse(long_df: pd.DataFrame, filename: str, db_path: str = DEFAULT_WAREHOUSE) -> int:
+    """
+    Function to upsert long-format data into the local warehouse.
+
+    Args:
+        long_df (pd.DataFrame): The long-format DataFrame to store.
+        filename (str): The workbook filename the data was read from.
+        db_path (str): The path of the SQLite database file (default is './output/energytrend.sqlite').
+
+    Returns:
+        int: The number of rows inserted or updated, or -1 on error.
+    """
+    try:
+        dataset = dataset_name(filename)
+        conn = connect(db_path)
+        try:
+            changed = upsert_observations(conn, long_df, dataset)
+        finally:
+            conn.close()
+        logger.info("Upserted %s into %s: %s of %s row(s) changed.", dataset, db_path, changed, len(long_df))
+        return changed
+
+    except Exception as e:
+        logger.error("Error saving data to warehouse: %s", e)
+        return -1
+
+
+__getattr__ = _tasks.getattr()
@@ -0,0 +1,210 @@
+import os
+import uuid
+import shutil
+import contextlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from typing import Callable, Iterator
+
+
+# File extension of CSV outputs by compression codec
+CSV_EXTENSIONS = {None: '.csv', 'gzip': '.csv.gz', 'zstd': '.csv.zst'}
+
+
+def _fsync(path: str) -> None:
+    """Flushes a file, or every file of a directory tree, and the directory entries, to disk."""
+    paths = [path]
+    if os.path.isdir(path):
+        paths = [os.path.join(root, name) for root, dirs, files in os.walk(path) for name in files + dirs] + [path]
+    for target in paths:
+        fd = os.open(target, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """
+    Yields a temporary path next to `path` to write to, then moves it into place once written and
+    flushed to disk, so readers see either the previous output or the complete new one.
+
+    A file replaces the previous output atomically. A directory, such as a partitioned Parquet
+    dataset, is swapped in with two renames, so `path` is briefly missing.
+
+    Args:
+        path (str): The path of the output.
+
+    Yields:
+        str: The temporary path; it is removed if the block raises.
+    """
+    directory = os.path.dirname(path) or '.'
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        yield tmp_path
+        _fsync(tmp_path)
+        if os.path.isdir(path) or (os.path.isdir(tmp_path) and os.path.exists(path)):
+            old_path = f"{tmp_path}.old"
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path) if os.path.isdir(old_path) else os.remove(old_path)
+        else:
+            os.replace(tmp_path, path)
+        _fsync(directory)
+    except BaseException:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def columnar_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Restores typed columns for columnar formats, turning the blanks left by fillna('') back into nulls.
+
+    Columns mixing numbers with placeholder text, such as the '(-)' marking per cent changes
+    that are not applicable in the Main Table sheet, are stored as numbers with nulls in place
+    of the placeholders, since a columnar format needs one type per column.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to write.
+
+    Returns:
+        pd.DataFrame: The DataFrame with object columns of numbers and blanks converted to float64.
+    """
+    object_cols = df.columns[df.dtypes == object]
+    if len(object_cols) == 0:
+        return df
+    typed = df.copy()
+    blanks_as_null = typed[object_cols].where(typed[object_cols] != '')
+    typed[object_cols] = blanks_as_null.infer_objects()
+    for col in typed.columns[typed.dtypes == object]:
+        if pd.api.types.infer_dtype(typed[col], skipna=True).startswith('mixed'):
+            typed[col] = pd.to_numeric(typed[col], errors='coerce')
+    return typed
+
+
+def columnar_dtypes(df: pd.DataFrame) -> pd.Series:
+    """
+    Lists the dtypes columnar_frame gives the columns of a DataFrame, e.g. those of a published snapshot.
+
+    Only the object columns are converted, so the dtypes of a processed sheet can be compared
+    with those of a snapshot without copying its numeric columns.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        pd.Series: The dtype of each column.
+    """
+    dtypes = df.dtypes.copy()
+    object_cols = df.columns[dtypes == object]
+    if len(object_cols):
+        dtypes[object_cols] = columnar_frame(df[object_cols]).dtypes
+    return dtypes
+
+
+def write_csv(df: pd.DataFrame, path: str, compression: str | None = None, chunksize: int = 100000) -> str:
+    """
+    Writes a DataFrame as a text CSV file, atomically and in chunks of rows.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to write.
+        path (str): The path without extension.
+        compression (str | None): None, 'gzip' or 'zstd' (default is None, uncompressed).
+        chunksize (int): The number of rows rendered to text at a time (default is 100000).
+
+    Returns:
+        str: The path written, ending in '.csv', '.csv.gz' or '.csv.zst'.
+    """
+    if compression not in CSV_EXTENSIONS:
+        raise ValueError(f"Unknown CSV compression '{compression}'. Choose from {list(CSV_EXTENSIONS)}.")
+    save_path = f"{path}{CSV_EXTENSIONS[compression]}"
+    with atomic_path(save_path) as tmp_path, open(tmp_path, 'wb') as file:
+        stream = pa.CompressedOutputStream(file, compression) if compression else file
+        # The header is written with the first chunk, or alone for an empty DataFrame
+        for start in range(0, max(len(df), 1), chunksize):
+            stream.write(df.iloc[start:start + chunksize].to_csv(index=True, header=start == 0).encode())
+        if compression:
+            stream.close()
+    return save_path
+
+
+def write_parquet(df: pd.DataFrame, path: str, compression: str = 'zstd') -> str:
+    """
+    Writes a DataFrame as compressed Parquet, partitioned by year when it has a 'year' column.
+
+    Long-format tables become a directory with one 'year=YYYY' partition per year, as proposed
+    in DeltaTable.md; wide tables, whose years are columns, become a single file.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to write.
+        path (str): The path without extension.
+        compression (str): The Parquet compression codec (default is 'zstd').
+
+    Returns:
+        str: The file or dataset directory written.
+    """
+    # Parquet is only needed for this format, and is the slowest part of pyarrow to import
+    import pyarrow.parquet as pq
+    save_path = f"{path}.parquet"
+    table = pa.Table.from_pandas(columnar_frame(df))
+    with atomic_path(save_path) as tmp_path:
+        if 'year' in df.columns:
+            pq.write_to_dataset(table, tmp_path, partition_cols=['year'], compression=compression)
+        else:
+            pq.write_table(table, tmp_path, compression=compression)
+    return save_path
+
+
+def write_feather(df: pd.DataFrame, path: str) -> str:
+    """
+    Writes a DataFrame as an uncompressed Arrow IPC (Feather v2) file that readers can memory-map.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to write.
+        path (str): The path without extension.
+
+    Returns:
+        str: The path written.
+    """
+    save_path = f"{path}.arrow"
+    with atomic_path(save_path) as tmp_path:
+        feather.write_feather(pa.Table.from_pandas(columnar_frame(df)), tmp_path, compression='uncompressed')
+    return save_path
+
+
+def read_output(path: str) -> pd.DataFrame:
+    """
+    Reads back a file written by one of the writers, memory-mapping Arrow IPC files.
+
+    Args:
+        path (str): The path returned by the writer.
+
+    Returns:
+        pd.DataFrame: The DataFrame read back.
+    """
+    if path.endswith('.csv'):
+        return pd.read_csv(path, index_col=0)
+    if path.endswith(('.csv.gz', '.csv.zst')):
+        with pa.input_stream(path, compression='detect') as stream:
+            return pd.read_csv(stream, index_col=0)
+    if path.endswith('.parquet'):
+        # Datasets are only needed to read partitioned outputs, and are slow to import
+        import pyarrow.dataset as ds
+        # Hive partition keys are read back as plain integers rather than dictionaries
+        return ds.dataset(path, format='parquet', partitioning='hive').to_table().to_pandas()
+    if path.endswith('.arrow'):
+        return feather.read_table(path, memory_map=True).to_pandas()
+    raise ValueError(f"Unknown output format for {path}")
+
+
+# Output formats selectable in the save stage; only CSV takes a compression codec
+WRITERS: dict[str, Callable[..., str]] = {
+    'csv': write_csv,
+    'parquet': write_parquet,
+    'feather': write_feather,
+}
@@ -36,8 +36,12 @@ MOCK_DF_DATA = {
 
 
 @pytest.fixture
-def mock_environment(monkeypatch):
+def mock_environment(monkeypatch, tmp_path):
     """Fixture to mock environment setup and external dependencies."""
+    # Run in a scratch directory so downloads and sheet caches don't leak into the repo
+    (tmp_path / 'data').mkdir()
+    monkeypatch.chdir(tmp_path)
+
     # Mocking os.path.exists to simulate file checking
     monkeypatch.setattr(os.path, 'exists', mock.Mock(return_value=False))
 
@@ -45,9 +49,10 @@ def mock_environment(monkeypatch):
     monkeypatch.setattr(os, 'makedirs', mock.Mock())
 
     # Mocking requests.get to return a mock response
-    response_mock = mock.Mock(status_code=200)
+    response_mock = mock.Mock(status_code=200, headers={})
     response_mock.raise_for_status = mock.Mock()
     response_mock.content = HTML_CONTENT.encode('utf-8')
+    response_mock.iter_content = mock.Mock(return_value=iter([response_mock.content]))
     monkeypatch.setattr('energytrend_etl.ingest_data.requests.get', mock.Mock(return_value=response_mock))
 
     # Mocking requests.head to simulate the 'Last-Modified' header in responses
@@ -88,7 +93,8 @@ def test_end_to_end_pipeline(mock_environment):
     assert saved_filename == expected_csv_filename, "Saving to CSV failed or incorrect filename returned."
 
     # Verify mocks to ensure expected calls were made
-    mock_read_excel.assert_called_once_with(f"./data/{MOCK_EXCEL_FILENAME}", sheet_name=MOCK_SHEET_NAME, header=MOCK_HEADER)
+    mock_read_excel.assert_called_once_with(f"./data/{MOCK_EXCEL_FILENAME}", sheet_name=MOCK_SHEET_NAME, header=MOCK_HEADER,
+                                            engine=mock.ANY, engine_kwargs=mock.ANY)
     
     # Update the path to match the actual output path
     expected_csv_path = os.path.join(output_path, f"{expected_csv_filename}.csv")
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+from energytrend_etl.stage_cache import StageCache
+from energytrend_etl.arrow_handoff import SharedFrame, read_frame, receive_frame, share_frame, write_frame
+
+
+# Processed sheet, with blanks filled with '' in the object period columns
+MOCK_DF = pd.DataFrame({
+    '2019__3rd_quarter': [1.5, ''],
+    '2019__4th_quarter': [2.5, 3.0],
+    'processed_date': ['2024-07-25', '2024-07-25'],
+    'filename': ['ET_3.1_JUL_24.xlsx', 'ET_3.1_JUL_24.xlsx'],
+}, index=pd.Index(['Crude oil', 'NGLs'], name='Category'))
+
+
+def test_write_frame_round_trips_mixed_columns_on_the_map(tmp_path):
+    """Test that a processed sheet reads back identical, with float columns as read-only views of the file."""
+    df = read_frame(write_frame(MOCK_DF, str(tmp_path / 'frame.arrow')))
+
+    pd.testing.assert_frame_equal(df, MOCK_DF)
+    assert df['2019__3rd_quarter'].tolist() == [1.5, '']
+    assert not df['2019__4th_quarter'].to_numpy().flags.writeable
+
+
+def test_share_frame_removes_the_file_once_received(tmp_path):
+    """Test that a shared sheet is received intact and its shared-memory file removed."""
+    shared = share_frame(MOCK_DF, str(tmp_path), min_cells=0)
+
+    assert isinstance(shared, SharedFrame)
+    pd.testing.assert_frame_equal(receive_frame(shared), MOCK_DF)
+    assert os.listdir(tmp_path) == []
+
+
+def test_share_frame_falls_back_to_the_dataframe(tmp_path):
+    """Test that small DataFrames, and DataFrames Arrow cannot represent, are handed over as is."""
+    df = pd.DataFrame({'mixed': [1, 'a']})
+
+    assert share_frame(df, str(tmp_path), min_cells=0) is df
+    assert share_frame(MOCK_DF, str(tmp_path)) is MOCK_DF
+    assert os.listdir(tmp_path) == []
+
+
+def test_stage_cache_stores_dataframes_as_arrow_files(tmp_path):
+    """Test that large DataFrames in a cached result are stored next to its pickle and reloaded equal."""
+    cache = StageCache(str(tmp_path))
+    df = pd.DataFrame(np.random.default_rng(0).random((1000, 500)), columns=[f"p{i}" for i in range(500)])
+    value = (df, {'rows': 1000, 'sheet': MOCK_DF})
+
+    cache.store('process', 'key', value)
+    hit, loaded = StageCache(str(tmp_path)).load('process', 'key')
+
+    assert hit
+    assert sorted(os.listdir(tmp_path)) == ['process-key.pkl', 'process-key.pkl.0.arrow']
+    pd.testing.assert_frame_equal(loaded[0], df)
+    pd.testing.assert_frame_equal(loaded[1]['sheet'], MOCK_DF)
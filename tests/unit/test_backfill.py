@@ -0,0 +1,49 @@
+import json
+from benchmarks.synthetic import write_et_workbook
+from energytrend_etl.backfill import CHECKPOINT_NAME, backfill, find_workbooks, load_checkpoint
+
+
+def _archive(tmp_path):
+    archive = tmp_path / 'archive'
+    archive.mkdir()
+    write_et_workbook(str(archive / 'ET_3.1_APR_24.xlsx'), years=3, seed=1)
+    write_et_workbook(str(archive / 'ET_3.1_JUL_24.xlsx'), years=3, seed=2)
+    (archive / 'ET_3.1_JAN_24.xlsx').write_bytes(b'not a workbook')
+    return archive
+
+
+def test_find_workbooks_expands_directories(tmp_path):
+    """Test that directories contribute their workbooks and duplicates are dropped."""
+    archive = _archive(tmp_path)
+
+    paths = find_workbooks([str(archive), str(archive / 'ET_3.1_JUL_24.xlsx')])
+
+    assert [path.rsplit('/', 1)[1] for path in paths] == ['ET_3.1_APR_24.xlsx', 'ET_3.1_JAN_24.xlsx', 'ET_3.1_JUL_24.xlsx']
+
+
+def test_backfill_processes_vintages_and_resumes(tmp_path):
+    """Test that a backfill stores each vintage, journals progress, and skips completed vintages when rerun."""
+    archive = _archive(tmp_path)
+    output = tmp_path / 'vintages'
+
+    first = backfill([str(archive)], str(output), max_workers=1)
+
+    assert sorted(result.status for result in first.results) == ['done', 'done', 'failed']
+    assert (output / 'ET_3.1_APR_24.csv').exists() and (output / 'ET_3.1_JUL_24.csv').exists()
+    assert first.files_per_second > 0
+    journal = [json.loads(line) for line in (output / CHECKPOINT_NAME).read_text().splitlines()]
+    assert len(journal) == 3 and len(load_checkpoint(str(output / CHECKPOINT_NAME))) == 2
+
+    # Only the failed workbook is retried
+    second = backfill([str(archive)], str(output), max_workers=1)
+
+    assert sorted(result.status for result in second.results) == ['failed', 'skipped', 'skipped']
+    assert second.processed == 1
+
+
+def test_load_checkpoint_ignores_interrupted_line(tmp_path):
+    """Test that a journal line cut short by an interruption is ignored."""
+    journal = tmp_path / CHECKPOINT_NAME
+    journal.write_text('{"path": "a.xlsx", "sha256": "abc", "status": "done"}\n{"path": "b.xl')
+
+    assert load_checkpoint(str(journal)) == {'abc': 'a.xlsx'}
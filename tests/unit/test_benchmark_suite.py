@@ -0,0 +1,67 @@
+import requests
+from benchmarks.suite import compare
+from benchmarks.bench_ingest import bench
+from benchmarks.stand_in import SiteProfile, simulate_site
+from benchmarks.synthetic import write_et_workbook
+from energytrend_etl.excel_readers import read_sheet
+
+
+# Test Data for baseline and current metrics of one scenario
+BASELINE = {'small': {'preprocess': {'wall_s': 0.100, 'peak_mb': 10.0}}}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    """Test that slower or larger stages beyond tolerance are reported as regressions."""
+    results = {'small': {'preprocess': {'wall_s': 0.200, 'peak_mb': 14.0}}}
+
+    regressions = compare(results, BASELINE, time_tolerance=0.5, memory_tolerance=0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith('small/preprocess: wall_s')
+
+
+def test_compare_ignores_noise_and_new_stages():
+    """Test that changes within tolerance or below the noise floor, and unknown stages, pass."""
+    results = {
+        'small': {'preprocess': {'wall_s': 0.105, 'peak_mb': 10.5}, 'save': {'wall_s': 9.0, 'peak_mb': 900.0}},
+        'large': {'preprocess': {'wall_s': 9.0, 'peak_mb': 900.0}},
+    }
+
+    assert compare(results, BASELINE, time_tolerance=0.0, memory_tolerance=0.0) == []
+
+
+def test_synthetic_workbook_is_et_shaped(tmp_path):
+    """Test that the synthetic workbook has the ET 3.1 row labels and scales in rows and periods."""
+    path = write_et_workbook(str(tmp_path / 'synthetic.xlsx'), scale=2, years=3)
+
+    df = read_sheet(path, 'Quarter', 4)
+
+    assert df.shape == (38, 13)
+    assert df['Column1'].iloc[0] == 'Indigenous production [note 2]'
+    assert df.columns[1] == '1999 \n1st quarter'
+
+
+def test_simulated_site_answers_conditional_and_range_requests(tmp_path):
+    """Test that the simulated site sends validators, and honours conditional and resumed requests."""
+    (tmp_path / 'et.xlsx').write_bytes(b'x' * 1000)
+
+    with simulate_site(str(tmp_path)) as (base_url, stats):
+        full = requests.get(f"{base_url}/et.xlsx")
+        unchanged = requests.get(f"{base_url}/et.xlsx", headers={'If-None-Match': full.headers['ETag']})
+        resumed = requests.get(f"{base_url}/et.xlsx", headers={'Range': 'bytes=600-', 'If-Range': full.headers['ETag']})
+
+    assert full.status_code == 200 and len(full.content) == 1000
+    assert unchanged.status_code == 304
+    assert resumed.status_code == 206 and len(resumed.content) == 400
+    assert stats.statuses == {200: 1, 304: 1, 206: 1}
+
+
+def test_ingest_benchmark_recovers_from_simulated_faults():
+    """Test that ingestion completes through error bursts and truncated bodies, and the retries are counted."""
+    profile = SiteProfile(error_rate=0.3, burst_length=1, truncate_rate=0.3, seed=1)
+
+    cold, warm = bench(files=3, scale=1, workers=[1], per_host_limit=1, profile=profile, backoff_scale=0)
+
+    assert cold['ok'] == warm['ok'] == 3
+    assert cold['retries'] == cold['requests'] - 4 > 0
+    assert warm['statuses'].get(304) == 4
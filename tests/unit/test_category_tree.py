@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from energytrend_etl.preprocess_data import process_excel_data
+from energytrend_etl.category_tree import ET_3_1_LAYOUT, CategoryTree, check_identities, dataset_layout
+
+
+# Test Data for the rows of an ET 3.1 sheet, with one consistent quarter
+ET_3_1_ROWS = {
+    'Indigenous production [note 2]': 100.0,
+    'Crude oil': 90.0,
+    'NGLs [note 3]': 8.0,
+    'Feedstocks': 2.0,
+    'Imports [note 4]': 50.0,
+    'Crude oil & NGLs': 45.0,
+    'Feedstocks ': 5.0,
+    'Exports [note 4]': 30.0,
+    'Crude Oil & NGLs': 28.0,
+    ' Feedstocks': 2.0,
+    'Stock change [note 5]': -4.0,
+    'Transfers [note 6]': 1.0,
+    'Total supply': 117.0,
+    'Statistical difference [note 7]': 2.0,
+    'Total demand ': 115.0,
+    'Transformation': 110.0,
+    'Petroleum refineries': 110.0,
+    'Energy industry use': 5.0,
+    'Oil & gas extraction': 5.0,
+}
+
+
+def et_3_1_frame(n_periods=3):
+    """Builds a wide ET 3.1 frame whose quarters all satisfy the table's identities."""
+    values = np.tile(np.array(list(ET_3_1_ROWS.values()))[:, None], n_periods)
+    columns = [f"2020__{quarter}_quarter" for quarter in ['1st', '2nd', '3rd', '4th'][:n_periods]]
+    return pd.DataFrame(values, index=list(ET_3_1_ROWS), columns=columns)
+
+
+def test_category_tree_parses_nesting_and_notes():
+    """Test that nesting is recovered from the flat labels and notes are stripped into metadata."""
+    tree = CategoryTree.from_labels(pd.Index(list(ET_3_1_ROWS)), ET_3_1_LAYOUT)
+
+    assert tree.labels[0] == 'Indigenous production'
+    assert tree.notes[0] == (2,)
+    assert tree.labels[tree.children(0)].tolist() == ['Crude oil', 'NGLs', 'Feedstocks']
+    # Repeated labels attach to their nearest enclosing parent
+    assert tree.paths[tree.parent == tree.row_of('Exports')].tolist() == ['Exports / Crude Oil & NGLs', 'Exports / Feedstocks']
+    assert tree.paths[16] == 'Total demand / Transformation / Petroleum refineries'
+    assert tree.depth[16] == 2
+    assert (tree.parent[tree.row_of('Total supply')], tree.parent[tree.row_of('Stock change')]) == (-1, -1)
+
+
+def test_check_identities_flags_each_broken_period():
+    """Test that roll-ups and identities are checked for every period at once."""
+    df = et_3_1_frame()
+    tree = CategoryTree.from_labels(df.index, ET_3_1_LAYOUT)
+    values = df.to_numpy()
+
+    assert check_identities(values, df.columns, tree, ET_3_1_LAYOUT).empty
+
+    values[tree.row_of('Imports / Feedstocks'), 1] += 1.0
+    failures = check_identities(values, df.columns, tree, ET_3_1_LAYOUT)
+
+    assert failures[['check', 'period']].values.tolist() == [['Imports roll-up', '2020__2nd_quarter']]
+    assert failures['residual'].item() == -1.0
+
+
+def test_check_identities_skips_missing_terms():
+    """Test that a period with a missing term is not reported as a failure."""
+    df = et_3_1_frame()
+    tree = CategoryTree.from_labels(df.index, ET_3_1_LAYOUT)
+    values = df.to_numpy()
+    values[tree.row_of('Transfers'), 0] = np.nan
+
+    assert check_identities(values, df.columns, tree, ET_3_1_LAYOUT).empty
+
+
+def test_process_excel_data_rejects_broken_identity(monkeypatch):
+    """Test that process_excel_data fails when total supply does not add up, if given the ET 3.1 layout."""
+    df = et_3_1_frame()
+    df.loc['Total supply', '2020__3rd_quarter'] = 200.0
+    raw = df.rename_axis('Column1').reset_index()
+    monkeypatch.setattr('energytrend_etl.preprocess_data.read_excel_cached', lambda *args, **kwargs: raw.copy())
+
+    assert process_excel_data.fn('ET_3.1_JUL_24.xlsx', 'Quarter', 4, layout=ET_3_1_LAYOUT).empty
+    assert not process_excel_data.fn('ET_3.1_JUL_24.xlsx', 'Quarter', 4).empty
+
+
+def test_dataset_layout_only_checks_et_3_1():
+    """Test that the pipeline checks ET 3.1 workbooks against their layout, and other datasets against none."""
+    assert dataset_layout('ET_3.1_JUL_24.xlsx') is ET_3_1_LAYOUT
+    assert dataset_layout('ET_4.1_JUL_24.xlsx') is None
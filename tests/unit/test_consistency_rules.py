@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from energytrend_etl.consistency_rules import (
+    ColumnDrift, NotNull, NumericRange, QuarterOnQuarterChange, TimeFormat, ZScoreOutlier, evaluate_rules
+)
+from energytrend_etl.validation_report import generate_data_consistency_report
+
+
+# Test Data for a processed wide DataFrame and the previous release
+MOCK_DF = pd.DataFrame(
+    {
+        '2019__3rd_quarter': [100.0, 10.0, -5.0],
+        '2019__4th_quarter': [110.0, '', -7.0],
+        '2020__1st_quarter': [300.0, 12.0, 4.0],
+        'processed_date': ['2024-07-01 00:00:00', '2024-07-01 00:00:00', 'not a date'],
+        'filename': 'ET_3.1_JUL_24.xlsx',
+    },
+    index=['Crude oil [note 1]', 'Feedstocks', 'Stock change [note 5]'],
+)
+
+MOCK_PREVIOUS_DF = MOCK_DF.drop(columns=['2020__1st_quarter']).assign(dropped=1.0)
+
+
+def failures(report, rule):
+    """Returns the failure count of each column for one rule."""
+    rows = report[report['rule'] == rule]
+    return dict(zip(rows['column'], rows['failures']))
+
+
+def test_evaluate_rules_reports_each_rule_per_column():
+    """Test that every rule reports one row per column without overwriting other rules' results."""
+    report = evaluate_rules(MOCK_DF, MOCK_PREVIOUS_DF, (NotNull(), TimeFormat()))
+
+    assert list(report.columns) == ['rule', 'column', 'checked', 'failures', 'passed']
+    assert failures(report, 'not_null') == {
+        '2019__3rd_quarter': 0, '2019__4th_quarter': 1, '2020__1st_quarter': 0, 'processed_date': 0, 'filename': 0
+    }
+    # processed_date has both a missing-value and a time-format result
+    assert failures(report, 'time_format') == {'processed_date': 1}
+
+
+def test_numeric_range_skips_excluded_categories():
+    """Test that range checks only apply to the selected categories."""
+    report = evaluate_rules(MOCK_DF, MOCK_PREVIOUS_DF, (NumericRange(min_value=0, exclude=('Stock change',)),))
+
+    assert failures(report, 'numeric_range') == {'2019__3rd_quarter': 0, '2019__4th_quarter': 0, '2020__1st_quarter': 0}
+
+    report = evaluate_rules(MOCK_DF, MOCK_PREVIOUS_DF, (NumericRange(min_value=0),))
+
+    assert failures(report, 'numeric_range') == {'2019__3rd_quarter': 1, '2019__4th_quarter': 1, '2020__1st_quarter': 0}
+
+
+def test_quarter_on_quarter_change_threshold():
+    """Test that changes above the threshold are flagged against the preceding period only."""
+    report = evaluate_rules(MOCK_DF, MOCK_PREVIOUS_DF, (QuarterOnQuarterChange(max_relative_change=0.5),))
+
+    # Crude oil jumps from 110 to 300; Feedstocks has no comparable base around the blank
+    assert failures(report, 'quarter_on_quarter_change') == {
+        '2019__3rd_quarter': 0, '2019__4th_quarter': 0, '2020__1st_quarter': 1
+    }
+
+
+def test_z_score_outlier():
+    """Test that a single extreme value in a category is flagged."""
+    df = pd.DataFrame([np.r_[np.full(20, 10.0), 1000.0]], columns=[f"{2000 + i}__1st_quarter" for i in range(21)])
+
+    report = evaluate_rules(df, df, (ZScoreOutlier(threshold=4.0),))
+
+    assert report['failures'].sum() == 1
+    assert report.loc[report['failures'] > 0, 'column'].item() == '2020__1st_quarter'
+
+
+def test_quarterly_rules_skip_annual_columns():
+    """Test that annual totals are neither compared with quarters nor counted in a category's quarterly spread."""
+    quarters = [f"2019__{q}_quarter" for q in ('1st', '2nd', '3rd', '4th')]
+    df = pd.DataFrame([[10.0, 11.0, 10.0, 11.0, 42.0, 12.0]], columns=quarters + ['2019', '2020__1st_quarter'])
+
+    report = evaluate_rules(df, df, (QuarterOnQuarterChange(max_relative_change=0.5), ZScoreOutlier(threshold=2.0)))
+
+    # 2020 Q1 follows 2019 Q4, not the annual total, and the annual column is not checked
+    assert failures(report, 'quarter_on_quarter_change') == dict.fromkeys(df.columns, 0)
+    annual = report[report['column'] == '2019']
+    assert annual['checked'].tolist() == [0, 0]
+    assert report.loc[report['rule'] == 'z_score_outlier', 'failures'].sum() == 0
+
+
+def test_column_drift():
+    """Test that added and dropped columns are reported, but not metadata missing from a published snapshot."""
+    snapshot = MOCK_PREVIOUS_DF.drop(columns=['processed_date', 'filename'])
+    for previous_df in (MOCK_PREVIOUS_DF, snapshot):
+        report = evaluate_rules(MOCK_DF, previous_df, (ColumnDrift('new'), ColumnDrift('missing')))
+
+        assert report.loc[~report['passed'] & (report['rule'] == 'new_columns'), 'column'].tolist() == ['2020__1st_quarter']
+        assert report.loc[~report['passed'] & (report['rule'] == 'missing_columns'), 'column'].tolist() == ['dropped']
+        assert not report['column'].isin(['processed_date', 'filename']).any()
+
+
+def test_generate_data_consistency_report(tmp_path):
+    """Test that the report is written as a per-rule, per-column table."""
+    save_path = generate_data_consistency_report.fn(MOCK_DF, MOCK_PREVIOUS_DF, 'ET_3.1_JUL_24', str(tmp_path))
+
+    report = pd.read_csv(save_path)
+    assert set(report['rule']) == {
+        'not_null', 'time_format', 'numeric_range', 'quarter_on_quarter_change',
+        'z_score_outlier', 'new_columns', 'missing_columns'
+    }
+    assert not report['passed'].all()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from energytrend_etl.revisions import diff_frames
+from energytrend_etl.energy_table import EnergyTable
+from energytrend_etl.preprocess_data import reshape_to_long
+from energytrend_etl.consistency_rules import evaluate_rules
+
+
+# Test Data for a processed wide DataFrame with a blank cell and a placeholder
+MOCK_WIDE_DF = pd.DataFrame(
+    {
+        '2019__3rd_quarter': [1.0, 2.0, 3.0],
+        '2019__4th_quarter': [4.0, '', 6.0],
+        'Annual_per_cent_change': [5.5, '(-) ', 1.0],
+        'processed_date': '2024-07-01 00:00:00',
+        'filename': 'mockfile.xlsx',
+    },
+    index=['Crude oil', 'NGLs', 'Feedstocks'],
+)
+
+
+def test_from_frame_builds_one_float_block_without_metadata():
+    """Test that values land in one column-major float block, with metadata kept out of the rows."""
+    table = EnergyTable.from_frame(MOCK_WIDE_DF)
+
+    assert table.values.dtype == np.float64 and table.values.flags.f_contiguous
+    assert table.periods.tolist() == ['2019__3rd_quarter', '2019__4th_quarter', 'Annual_per_cent_change']
+    assert table.categories.tolist() == ['Crude oil', 'NGLs', 'Feedstocks']
+    assert table.metadata == {'processed_date': '2024-07-01 00:00:00', 'filename': 'mockfile.xlsx'}
+    assert np.isnan(table.values[1, 1]) and np.isnan(table.values[1, 2]), "Blanks and placeholders should be NaN."
+
+
+def test_frame_and_view_share_the_block():
+    """Test that stages receive DataFrames and sub-tables over the same memory rather than copies."""
+    table = EnergyTable.from_frame(MOCK_WIDE_DF)
+    frame = table.frame()
+    view = table.view(categories=slice(1, None), periods=slice(0, 2))
+
+    assert np.shares_memory(frame.to_numpy(), table.values)
+    assert np.shares_memory(view.values, table.values)
+    assert view.frame().loc['Feedstocks', '2019__4th_quarter'] == 6.0
+
+
+def test_float32_mode_halves_the_block():
+    """Test that the float32 mode stores the same values in half the memory."""
+    wide, compact = EnergyTable.from_frame(MOCK_WIDE_DF), EnergyTable.from_frame(MOCK_WIDE_DF, dtype=np.float32)
+
+    assert compact.values.nbytes * 2 == wide.values.nbytes
+    np.testing.assert_allclose(compact.values, wide.values)
+
+
+def test_stages_share_the_table_they_are_given(monkeypatch):
+    """Test that the reshape, the consistency rules and revision detection reuse a table passed to them."""
+    table = EnergyTable.from_frame(MOCK_WIDE_DF)
+    conversions = []
+    from_frame = EnergyTable.from_frame
+    monkeypatch.setattr(EnergyTable, 'from_frame',
+                        classmethod(lambda cls, df, *args, **kwargs: conversions.append(df) or from_frame(df, *args, **kwargs)))
+
+    reshape_to_long.fn(MOCK_WIDE_DF, table)
+    evaluate_rules(MOCK_WIDE_DF, MOCK_WIDE_DF, table=table)
+    diff_frames(MOCK_WIDE_DF, MOCK_WIDE_DF, table)
+
+    # Only the previous release, which has no table of its own, is converted
+    assert len(conversions) == 1
+
+
+def test_stages_convert_changed_frames_afresh():
+    """Test that a DataFrame changed in place is converted again rather than served a stale table."""
+    df = MOCK_WIDE_DF.copy()
+    reshape_to_long.fn(df)
+    df.loc['Crude oil', '2019__3rd_quarter'] = 99.0
+
+    long_df = reshape_to_long.fn(df)
+
+    assert long_df['value'].iloc[0] == 99.0
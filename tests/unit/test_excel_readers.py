@@ -0,0 +1,63 @@
+import os
+import pytest
+import pandas as pd
+from energytrend_etl.excel_readers import ENGINES, available_engines, open_workbook, read_sheet, select_engine
+
+
+SHIPPED_WORKBOOK = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'ET_3.1_JUL_24.xlsx')
+
+# Sheets of the shipped workbook and the row (0-indexed) holding their column labels
+SHIPPED_SHEETS = {'Quarter': 4, 'Annual': 4, 'Main Table': 3}
+
+# Test Data for a sheet with a preamble, blanks, integers, floats, text and placeholders
+MOCK_SHEET_ROWS = [
+    ['Table 3.1 Supply and use of crude oil'],
+    ['This worksheet contains one table'],
+    ['Column1', '2023 \n4th quarter', '2024 1st quarter [provisional]', 'Annual per cent change'],
+    ['Indigenous production [note 2]', 8280.18, 8026.91, -3.1],
+    ['Crude oil', 7657, None, '(-) '],
+    ['Feedstocks', 0, 82.32, None],
+]
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Fixture to write a small workbook with a preamble above the header row."""
+    file_path = str(tmp_path / 'test_file.xlsx')
+    pd.DataFrame(MOCK_SHEET_ROWS).to_excel(file_path, sheet_name='Quarter', header=False, index=False)
+    return file_path
+
+
+def test_select_engine_prefers_fastest_installed():
+    """Test that the first installed engine in order of preference is chosen."""
+    assert select_engine() == available_engines()[0]
+    assert select_engine('openpyxl') == 'openpyxl'
+    with pytest.raises(ValueError):
+        select_engine('xlrd2')
+
+
+@pytest.mark.parametrize('engine', available_engines())
+def test_engines_produce_identical_frames(workbook, engine):
+    """Test that every installed engine parses the same frame as openpyxl."""
+    expected = read_sheet(workbook, 'Quarter', 2, engine='openpyxl')
+
+    pd.testing.assert_frame_equal(read_sheet(workbook, 'Quarter', 2, engine=engine), expected)
+    with open_workbook(workbook, engine) as opened:
+        pd.testing.assert_frame_equal(read_sheet(opened, 'Quarter', 2), expected)
+
+
+@pytest.mark.skipif(not os.path.exists(SHIPPED_WORKBOOK), reason='Shipped workbook not available.')
+@pytest.mark.parametrize('engine', available_engines())
+@pytest.mark.parametrize('sheet_name', list(SHIPPED_SHEETS))
+def test_engines_produce_identical_frames_on_shipped_workbook(engine, sheet_name):
+    """Test that every installed engine parses the shipped ET 3.1 sheets identically."""
+    header = SHIPPED_SHEETS[sheet_name]
+    expected = read_sheet(SHIPPED_WORKBOOK, sheet_name, header, engine='openpyxl')
+
+    pd.testing.assert_frame_equal(read_sheet(SHIPPED_WORKBOOK, sheet_name, header, engine=engine), expected)
+
+
+def test_all_engines_are_declared_with_their_module():
+    """Test that every engine names the module that makes it available."""
+    assert 'openpyxl' in available_engines(), "openpyxl is a required dependency."
+    assert all(engine.module for engine in ENGINES.values())
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import subprocess
+
+
+# Wall-clock budget for importing the CLI module in a fresh interpreter, once Prefect is loaded
+IMPORT_BUDGET_SECONDS = 2.0
+
+# Wall-clock budget for importing the modules a spawned worker imports, in a fresh interpreter
+WORKER_IMPORT_BUDGET_SECONDS = 1.5
+
+# Dependencies that must only be loaded by the stages that use them
+LAZY_DEPENDENCIES = ['ydata_profiling', 'pyarrow.parquet', 'pyarrow.dataset']
+
+# Workers neither orchestrate nor download, so they load none of Prefect or the HTTP stack either
+WORKER_LAZY_DEPENDENCIES = LAZY_DEPENDENCIES + ['prefect', 'bs4', 'tenacity', 'requests']
+
+# Modules imported by the workers of process_workbook and backfill
+WORKER_MODULES = [
+    'energytrend_etl.preprocess_data',
+    'energytrend_etl.backfill',
+    'energytrend_etl.save_to_csv',
+    'energytrend_etl.vintages',
+    'energytrend_etl.consistency_rules',
+]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IMPORT_SCRIPT = """
+import sys, json, time
+# Tasks and flows are Prefect objects, so Prefect is always loaded; the budget covers the rest
+import prefect
+start = time.perf_counter()
+import energytrend_etl.main
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+WORKER_IMPORT_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import {modules}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+""".format(modules=', '.join(WORKER_MODULES))
+
+
+def measure_import(cwd, script=IMPORT_SCRIPT):
+    """Runs an import script in a fresh interpreter and returns its timing and loaded modules."""
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT}
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=cwd, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_within_budget(tmp_path):
+    """Test that importing the CLI module stays within the import-time budget."""
+    # Best of three to keep the check robust against a noisy machine
+    best = min(measure_import(tmp_path)['seconds'] for _ in range(3))
+
+    assert best < IMPORT_BUDGET_SECONDS, f"Importing energytrend_etl.main took {best:.2f}s (budget {IMPORT_BUDGET_SECONDS}s)."
+
+
+def test_import_does_not_load_heavy_dependencies(tmp_path):
+    """Test that ydata_profiling and the Parquet readers are not imported until they are used."""
+    modules = measure_import(tmp_path)['modules']
+
+    loaded = [name for name in LAZY_DEPENDENCIES if name in modules]
+    assert not loaded, f"Heavy dependencies loaded at import time: {loaded}"
+
+
+def test_worker_import_within_budget_without_prefect(tmp_path):
+    """Test that spawned workers import their modules cold within budget, without Prefect or the HTTP stack."""
+    runs = [measure_import(tmp_path, WORKER_IMPORT_SCRIPT) for _ in range(3)]
+    best = min(run['seconds'] for run in runs)
+
+    assert best < WORKER_IMPORT_BUDGET_SECONDS, f"Importing the worker modules took {best:.2f}s (budget {WORKER_IMPORT_BUDGET_SECONDS}s)."
+    loaded = [name for name in WORKER_LAZY_DEPENDENCIES if name in runs[0]['modules']]
+    assert not loaded, f"Dependencies loaded by worker imports: {loaded}"
+
+
+def test_import_has_no_filesystem_side_effects(tmp_path):
+    """Test that importing the package does not create log directories or files."""
+    measure_import(tmp_path)
+
+    assert os.listdir(tmp_path) == [], "Importing should not create ./logs or any other file."
@@ -0,0 +1,141 @@
+import time
+import pytest
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tenacity import wait_none
+from energytrend_etl.ingest_data import fetch_html
+from energytrend_etl.ingest_catalogue import CatalogueTarget, ingest_catalogue
+
+
+# Mock statistics page listing two workbooks
+HTML_CONTENT = """
+<html>
+<head><title>Test</title></head>
+<body>
+<a href="/files/et_1.xlsx">Table 1 (ET 1.1 - quarterly)</a>
+<a href="/files/et_2.xlsx">Table 2 (ET 1.2 - quarterly)</a>
+</body>
+</html>
+"""
+
+# Mock page linking to two different workbooks with the same name
+COLLIDING_HTML_CONTENT = """
+<html>
+<body>
+<a href="/2024/files/et.xlsx">Table (ET 1.1 - 2024)</a>
+<a href="/2023/files/et.xlsx">Table (ET 1.1 - 2023)</a>
+</body>
+</html>
+"""
+
+PAGES = {'/page': HTML_CONTENT, '/colliding': COLLIDING_HTML_CONTENT}
+
+FILE_CONTENT = b"x" * 64 * 1024
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the mock page and workbooks while recording request counts and concurrency."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(0.05)
+            if self.path == '/broken':
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = PAGES[self.path].encode('utf-8') if self.path in PAGES else self.path.encode() + FILE_CONTENT
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    """Fixture to run a local HTTP stand-in for the statistics site."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.requests = Counter()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_ingest_catalogue_downloads_all_targets(stand_in_server, tmp_path):
+    """Test that every target is downloaded and each page is fetched only once."""
+    page = f"http://127.0.0.1:{stand_in_server.server_address[1]}/page"
+    targets = [
+        CatalogueTarget(page, "ET 1.1"),
+        CatalogueTarget(page, "ET 1.2"),
+        CatalogueTarget(page, "ET 1.1 - quarterly"),
+    ]
+
+    results = ingest_catalogue.fn(targets, data_dir=str(tmp_path), max_workers=4, per_host_limit=2)
+
+    assert [result.filename for result in results] == ["et_1.xlsx", "et_2.xlsx", "et_1.xlsx"]
+    assert all(result.status == 'downloaded' for result in results)
+    assert stand_in_server.requests['/page'] == 1, "Shared page should only be fetched once."
+    assert stand_in_server.requests['/files/et_1.xlsx'] == 1, "Duplicate targets should only be downloaded once."
+    assert (tmp_path / "et_2.xlsx").read_bytes() == b"/files/et_2.xlsx" + FILE_CONTENT
+
+
+def test_ingest_catalogue_respects_per_host_limit(stand_in_server, tmp_path):
+    """Test that no more than per_host_limit requests are in flight to one host."""
+    page = f"http://127.0.0.1:{stand_in_server.server_address[1]}/page"
+    targets = [CatalogueTarget(page, "ET 1.1"), CatalogueTarget(page, "ET 1.2")]
+
+    ingest_catalogue.fn(targets, data_dir=str(tmp_path), max_workers=8, per_host_limit=1)
+
+    assert stand_in_server.max_in_flight == 1, "Requests to one host should be serialised with a limit of 1."
+
+
+def test_ingest_catalogue_reports_missing_target(stand_in_server, tmp_path):
+    """Test that a target without a matching link is reported as not found."""
+    page = f"http://127.0.0.1:{stand_in_server.server_address[1]}/page"
+
+    results = ingest_catalogue.fn([CatalogueTarget(page, "Missing File")], data_dir=str(tmp_path))
+
+    assert results[0].status == 'not_found'
+    assert results[0].filename == ""
+
+
+def test_ingest_catalogue_reports_page_errors_as_failures(stand_in_server, tmp_path, monkeypatch):
+    """Test that targets on a page that cannot be fetched fail with the error rather than going missing."""
+    monkeypatch.setattr(fetch_html.retry, 'wait', wait_none())
+    page = f"http://127.0.0.1:{stand_in_server.server_address[1]}/broken"
+
+    results = ingest_catalogue.fn([CatalogueTarget(page, "ET 1.1")], data_dir=str(tmp_path))
+
+    assert results[0].status == 'failed'
+    assert '503' in results[0].error
+    assert stand_in_server.requests['/broken'] == 3, "The page should be retried before the target fails."
+
+
+def test_ingest_catalogue_keeps_workbooks_with_the_same_name_apart(stand_in_server, tmp_path):
+    """Test that different workbooks published under the same filename are saved to different files."""
+    page = f"http://127.0.0.1:{stand_in_server.server_address[1]}/colliding"
+    targets = [CatalogueTarget(page, "ET 1.1 - 2024"), CatalogueTarget(page, "ET 1.1 - 2023")]
+
+    results = ingest_catalogue.fn(targets, data_dir=str(tmp_path))
+
+    filenames = [result.filename for result in results]
+    assert len(set(filenames)) == 2 and all(name.startswith('et_') for name in filenames)
+    assert (tmp_path / filenames[0]).read_bytes() == b"/2024/files/et.xlsx" + FILE_CONTENT
+    assert (tmp_path / filenames[1]).read_bytes() == b"/2023/files/et.xlsx" + FILE_CONTENT
@@ -1,7 +1,7 @@
 import os
 import pytest
 from unittest import mock
-from energytrend_etl.ingest_data import ingest_excel_files
+from energytrend_etl.ingest_data import download_file, ingest_excel_files, load_http_metadata
 
 
 # Test data for the HTML page content with Excel links
@@ -15,6 +15,8 @@ HTML_CONTENT = """
 </html>
 """
 
+URL_FILE = "http://example.com/test_file.xlsx"
+
 
 @pytest.fixture
 def mock_environment(monkeypatch):
@@ -63,30 +65,78 @@ def test_ingest_excel_files_no_file_found():
 
 
 @pytest.mark.usefixtures("mock_environment")
-def test_ingest_excel_files_file_up_to_date(monkeypatch):
-    """Test that the function does not download a file if it's up-to-date."""
+def test_ingest_excel_files_file_up_to_date():
+    """Test that the function returns the filename without rewriting it when the file is up-to-date."""
     url = "http://example.com"
     html_name = "Test File"
 
-    # Mocking os.path.exists to return True to simulate existence of the file
-    monkeypatch.setattr(os.path, 'exists', mock.Mock(return_value=True))
-    
-    # Mocking os.path.getmtime to return a more recent modification time
-    monkeypatch.setattr(os.path, 'getmtime', mock.Mock(return_value=2000000000))
-    
-    # Mocking requests.get to return the HTML content that includes the file link
-    response_mock_get = mock.Mock(status_code=200)
-    response_mock_get.content = HTML_CONTENT.encode('utf-8')
-    monkeypatch.setattr('energytrend_etl.ingest_data.requests.get', mock.Mock(return_value=response_mock_get))
-
-    # Mocking requests.head to return an older Last-Modified time
-    response_mock_head = mock.Mock(status_code=200, headers={'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
-    response_mock_head.raise_for_status = mock.Mock()
-    monkeypatch.setattr('energytrend_etl.ingest_data.requests.head', mock.Mock(return_value=response_mock_head))
-
-    with mock.patch('energytrend_etl.ingest_data.download_file') as mock_download:
+    # download_file returns None when the server answers the conditional request with 304
+    with mock.patch('energytrend_etl.ingest_data.download_file', return_value=None) as mock_download:
         result = ingest_excel_files.fn(url, html_name)  # Use .fn here as well
         
-        # Assertions to verify that no download occurred
-        mock_download.assert_not_called()
+        # Assertions to verify that only the conditional download was attempted
+        mock_download.assert_called_once_with("http://example.com/test_file.xlsx", "./data/test_file.xlsx")
         assert result == "test_file.xlsx", "Should return the filename since it's already up-to-date."
+
+
+def make_response(status_code, body=b"", headers=None):
+    """Builds a mock streaming response."""
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.raise_for_status = mock.Mock()
+    response.iter_content = mock.Mock(return_value=iter([body[i:i + 4] for i in range(0, len(body), 4)]))
+    return response
+
+
+def test_download_file_streams_and_stores_validators(tmp_path):
+    """Test that the body is streamed into place and its validators are stored."""
+    save_path = str(tmp_path / "test_file.xlsx")
+    session = mock.Mock()
+    session.get.return_value = make_response(200, b"workbook bytes", {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+
+    transferred = download_file.__wrapped__(URL_FILE, save_path, session)
+
+    assert transferred == len(b"workbook bytes")
+    assert open(save_path, 'rb').read() == b"workbook bytes"
+    assert not os.path.exists(f"{save_path}.part"), "Partial file should be renamed into place."
+    assert load_http_metadata(save_path) == {'etag': '"v1"', 'last_modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+
+
+def test_download_file_sends_conditional_request(tmp_path):
+    """Test that stored validators are sent and a 304 leaves the file untouched."""
+    save_path = str(tmp_path / "test_file.xlsx")
+    session = mock.Mock()
+    session.get.return_value = make_response(200, b"old", {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    download_file.__wrapped__(URL_FILE, save_path, session)
+
+    session.get.return_value = make_response(304)
+    transferred = download_file.__wrapped__(URL_FILE, save_path, session)
+
+    headers = session.get.call_args.kwargs['headers']
+    assert headers['If-None-Match'] == '"v1"'
+    assert headers['If-Modified-Since'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert transferred is None, "Should return None when the server reports no change."
+    assert open(save_path, 'rb').read() == b"old"
+
+
+def test_download_file_resumes_partial_download(tmp_path):
+    """Test that an interrupted download is resumed with a range request."""
+    save_path = str(tmp_path / "test_file.xlsx")
+    session = mock.Mock()
+    interrupted = make_response(200, b"", {'ETag': '"v2"'})
+
+    def failing_iter(chunk_size):
+        yield b"work"
+        raise ConnectionError("reset")
+
+    interrupted.iter_content = mock.Mock(side_effect=failing_iter)
+    session.get.return_value = interrupted
+    with pytest.raises(ConnectionError):
+        download_file.__wrapped__(URL_FILE, save_path, session)
+
+    session.get.return_value = make_response(206, b"book bytes", {'ETag': '"v2"'})
+    transferred = download_file.__wrapped__(URL_FILE, save_path, session)
+
+    headers = session.get.call_args.kwargs['headers']
+    assert headers == {'Range': 'bytes=4-', 'If-Range': '"v2"'}
+    assert transferred == len(b"book bytes")
+    assert open(save_path, 'rb').read() == b"workbook bytes"
@@ -0,0 +1,85 @@
+import json
+import tracemalloc
+import pytest
+import pandas as pd
+from unittest import mock
+from energytrend_etl.stage_cache import StageCache
+from energytrend_etl.instrumentation import RunMetrics
+
+
+# Test Data for DataFrame
+MOCK_DF = pd.DataFrame({'Value1': [1.0, 2.0, 3.0], 'Value2': [4.0, 5.0, 6.0]})
+
+
+def test_measure_records_stage_metrics(tmp_path):
+    """Test that a measured stage records its timings, memory, data size and outcome."""
+    metrics = RunMetrics(str(tmp_path), trace_memory=True)
+
+    with metrics.dataset('ET_3.1_JUL_24.xlsx'), metrics.measure('process_excel_data') as record:
+        record.observe(MOCK_DF.copy())
+
+    stage = metrics.stages[0]
+    assert (stage.stage, stage.dataset, stage.status) == ('process_excel_data', 'ET_3.1_JUL_24.xlsx', 'succeeded')
+    assert (stage.rows, stage.cells) == (3, 6)
+    assert stage.wall_s > 0 and stage.cpu_s >= 0
+    assert stage.peak_traced_mb > 0
+
+    metrics.write()
+    assert not tracemalloc.is_tracing()
+
+
+def test_measure_leaves_out_the_traced_peak_of_overlapping_stages(tmp_path):
+    """Test that stages running at once, which share one allocation trace, record no traced peak."""
+    metrics = RunMetrics(str(tmp_path), trace_memory=True)
+
+    with metrics.measure('save_data'):
+        with metrics.measure('generate_data_profiling_report'):
+            pass
+    with metrics.measure('publish_snapshot'):
+        pass
+    metrics.write()
+
+    assert [stage.peak_traced_mb is None for stage in metrics.stages] == [True, True, False]
+
+
+def test_measure_records_errors():
+    """Test that a stage raising an exception is recorded as an error and the exception propagates."""
+    metrics = RunMetrics()
+
+    with pytest.raises(ValueError), metrics.measure('save_data'):
+        raise ValueError("disk full")
+
+    assert metrics.stages[0].status == 'error'
+    assert metrics.summary()['status'] == 'failed'
+
+
+def test_stage_cache_records_hits_and_sizes_inputs(tmp_path):
+    """Test that stages run through an instrumented cache are measured, including cache hits."""
+    metrics = RunMetrics(str(tmp_path / 'metrics'))
+    cache = StageCache(str(tmp_path / 'cache'), metrics=metrics)
+    stage = mock.Mock(return_value="output.csv")
+
+    cache.run('save_data', ('digest',), stage, MOCK_DF)
+    cache.run('save_data', ('digest',), stage, MOCK_DF)
+
+    assert [s.cached for s in metrics.stages] == [False, True]
+    assert [s.status for s in metrics.stages] == ['succeeded', 'succeeded']
+    assert metrics.stages[0].cells == 6
+
+
+def test_write_emits_jsonl_and_prometheus(tmp_path):
+    """Test that each run appends one JSON line and replaces the Prometheus textfile."""
+    for _ in range(2):
+        metrics = RunMetrics(str(tmp_path))
+        with metrics.dataset('ET "3.1"'), metrics.measure('validate_data') as record:
+            record.observe(pd.DataFrame())
+        metrics.write()
+
+    records = [json.loads(line) for line in (tmp_path / 'runs.jsonl').read_text().splitlines()]
+    assert len(records) == 2
+    assert records[1]['stages'][0]['status'] == 'failed'
+
+    prom = (tmp_path / 'energytrend_etl.prom').read_text()
+    assert '# TYPE energytrend_etl_stage_wall_seconds gauge' in prom
+    assert 'energytrend_etl_stage_success{stage="validate_data",dataset="ET \\"3.1\\""} 0.0' in prom
+    assert 'energytrend_etl_last_run_success 0.0' in prom
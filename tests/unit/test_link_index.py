@@ -0,0 +1,72 @@
+import pytest
+from unittest import mock
+from energytrend_etl.link_index import LinkIndex, PageIndexCache
+from energytrend_etl.ingest_data import fetch_link_index, page_index_cache
+
+
+# Test data for the HTML page content with Excel and non-Excel links
+HTML_CONTENT = """
+<html>
+<head><title>Test</title></head>
+<body>
+<a href="/guidance.html">Guidance for Test File</a>
+<a href="test_file.xlsx">Test File</a>
+<a href="another_test_file.xls">Another Test File</a>
+<a>Anchor without a link</a>
+</body>
+</html>
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_page_index_cache():
+    """Fixture to isolate tests from link indexes cached by other tests."""
+    page_index_cache.clear()
+    yield
+    page_index_cache.clear()
+
+
+def test_link_index_from_html_keeps_only_excel_links():
+    """Test that only Excel links are indexed and relative links are resolved."""
+    index = LinkIndex.from_html(HTML_CONTENT.encode('utf-8'), "http://example.com/page")
+
+    assert index.links == [
+        ("http://example.com/test_file.xlsx", "Test File"),
+        ("http://example.com/another_test_file.xls", "Another Test File"),
+    ]
+
+
+def test_link_index_find_returns_first_match_in_document_order():
+    """Test that lookups match substrings of the link text in document order."""
+    index = LinkIndex.from_html(HTML_CONTENT.encode('utf-8'), "http://example.com/page")
+
+    assert index.find("Test File") == "http://example.com/test_file.xlsx"
+    assert index.find("Another") == "http://example.com/another_test_file.xls"
+    assert index.find("Missing File") is None
+
+
+def test_page_index_cache_requires_matching_etag():
+    """Test that cached indexes are only returned for the ETag they were built from."""
+    cache = PageIndexCache()
+    index = LinkIndex([])
+
+    cache.put("http://example.com", '"v1"', index)
+    cache.put("http://example.com/no-etag", None, index)
+
+    assert cache.get("http://example.com", '"v1"') is index
+    assert cache.get("http://example.com", '"v2"') is None
+    assert cache.etag("http://example.com/no-etag") is None, "Pages without an ETag should not be cached."
+
+
+def test_fetch_link_index_reuses_index_when_page_not_modified():
+    """Test that a 304 for the page reuses the index built from the previous response."""
+    page = mock.Mock(status_code=200, headers={'ETag': '"v1"'}, content=HTML_CONTENT.encode('utf-8'))
+    not_modified = mock.Mock(status_code=304, headers={'ETag': '"v1"'})
+    session = mock.Mock()
+    session.get.side_effect = [page, not_modified]
+
+    first = fetch_link_index("http://example.com", session)
+    second = fetch_link_index("http://example.com", session)
+
+    assert second is first, "Unchanged page should not be parsed again."
+    assert session.get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
@@ -0,0 +1,82 @@
+import os
+import json
+import pytest
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from energytrend_etl.logger_config import (
+    queue_logging_initializer, setup_logger, start_queue_logging, stop_queue_logging
+)
+
+
+@pytest.fixture
+def json_log(tmp_path):
+    """Fixture to start queue logging to a JSON-lines file, stopping it after the test."""
+    log_file = tmp_path / 'pipeline.jsonl'
+    start_queue_logging(str(log_file), console=False)
+    try:
+        yield log_file
+    finally:
+        stop_queue_logging()
+
+
+def _read(log_file):
+    return [json.loads(line) for line in log_file.read_text().splitlines()]
+
+
+def _log_from_worker(log_dir: str, value: int) -> int:
+    setup_logger('queue_logging_worker', os.path.join(log_dir, 'worker.log')).info("worker value %d", value)
+    return os.getpid()
+
+
+class RenderProbe:
+    """Records the thread that renders it into a log message."""
+
+    def __str__(self):
+        self.rendered_in = threading.current_thread()
+        return 'probe'
+
+
+def test_queue_logging_writes_json_lines_instead_of_module_files(tmp_path, json_log):
+    """Test that loggers set up before and after starting queue logging both write JSON lines to one file."""
+    setup_logger('queue_logging_after', str(tmp_path / 'after.log')).info("rows: %d", 19)
+    stop_queue_logging()
+
+    entries = _read(json_log)
+    assert entries[0]['logger'] == 'queue_logging_after'
+    assert entries[0]['level'] == 'INFO'
+    assert entries[0]['message'] == 'rows: 19'
+    assert not (tmp_path / 'after.log').exists()
+
+
+def test_queue_logging_formats_messages_in_the_listener(json_log):
+    """Test that message arguments are rendered by the listener thread, not the logging caller."""
+    probe = RenderProbe()
+
+    logger = setup_logger('queue_logging_lazy', str(json_log.parent / 'lazy.log'))
+    # Pytest's log capture would also render the message, in this thread
+    logger.propagate = False
+    logger.info("value %s", probe)
+    stop_queue_logging()
+
+    assert _read(json_log)[0]['message'] == 'value probe'
+    assert probe.rendered_in is not threading.current_thread()
+
+
+def test_queue_logging_collects_worker_processes(tmp_path, json_log):
+    """Test that spawned worker processes log to the parent's JSON-lines file."""
+    initializer, initargs = queue_logging_initializer()
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=initializer, initargs=initargs) as pool:
+        pids = set(pool.map(_log_from_worker, [str(tmp_path)] * 4, range(4)))
+    stop_queue_logging()
+
+    entries = _read(json_log)
+    assert sorted(entry['message'] for entry in entries) == [f"worker value {i}" for i in range(4)]
+    assert {entry['process'] for entry in entries} == pids
+    assert not (tmp_path / 'worker.log').exists()
+
+
+def test_queue_logging_initializer_without_queue_logging():
+    """Test that pools get no initializer when queue logging is not started."""
+    assert queue_logging_initializer() == (None, ())
@@ -0,0 +1,153 @@
+import os
+import threading
+import contextvars
+import pytest
+import pandas as pd
+from prefect import Flow, Task
+from prefect.flows import load_flow_from_entrypoint
+from unittest.mock import MagicMock
+from energytrend_etl import main
+from energytrend_etl.stage_cache import StageCache
+from energytrend_etl.orchestration import SequentialExecutor, cancel, submit, task_runner
+
+
+LABEL = contextvars.ContextVar('label', default='')
+
+MOCK_DF = pd.DataFrame({'2019__3rd_quarter': [1.0, 2.0]}, index=['Crude oil', 'NGLs'])
+
+
+def test_flow_loads_from_its_deployment_entrypoint():
+    """Test that the entrypoint served by deploy_daily.py resolves to a Prefect flow."""
+    entrypoint = f"{os.path.abspath(main.__file__)}:main"
+
+    flow = load_flow_from_entrypoint(entrypoint)
+
+    assert isinstance(flow, Flow)
+    assert flow.name == 'Energy Trend Data ETL'
+
+
+def test_lazily_declared_stages_are_prefect_tasks():
+    """Test that stages declared through LazyTasks are built into Prefect tasks once, when first read."""
+    from energytrend_etl import preprocess_data
+    from energytrend_etl.preprocess_data import process_workbook
+
+    assert isinstance(process_workbook, Task)
+    assert process_workbook.tags == {'preprocess_data'}
+    assert preprocess_data.process_workbook is process_workbook
+
+
+def test_sequential_executor_runs_stages_when_needed():
+    """Test that stages run in the order their results are asked for, and cancelled ones never run."""
+    calls = []
+    with SequentialExecutor() as executor:
+        first = executor.submit(calls.append, 'first')
+        second = executor.submit(calls.append, 'second')
+        third = executor.submit(calls.append, 'third')
+        assert calls == []
+
+        second.result()
+        first.result()
+        cancel(third)
+
+    assert calls == ['second', 'first']
+    assert third.cancelled()
+
+
+def test_submit_runs_stages_in_the_callers_context():
+    """Test that stages in worker threads see the context variables set when they were submitted."""
+    with task_runner(2) as executor:
+        token = LABEL.set('ET_3.1_JUL_24.xlsx')
+        future = submit(executor, lambda: (LABEL.get(), threading.current_thread().name))
+        LABEL.reset(token)
+        label, thread_name = future.result()
+
+    assert label == 'ET_3.1_JUL_24.xlsx'
+    assert thread_name.startswith('stage')
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Replaces the stages run by process_sheet with mocks that succeed."""
+    mocks = {
+        'validate_data': MagicMock(return_value=MOCK_DF),
+        'save_data': MagicMock(return_value='mockfile'),
+        'publish_snapshot': MagicMock(return_value='snapshot.arrow'),
+        'generate_data_profiling_report': MagicMock(return_value='profiling.html'),
+        'generate_data_consistency_report': MagicMock(return_value='consistency.csv'),
+    }
+    for name, mock in mocks.items():
+        monkeypatch.setattr(main, name, mock)
+    return mocks
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_process_sheet_runs_every_stage(tmp_path, stages, max_workers):
+    """Test that every stage runs once, and reports are named after the saved output."""
+    with task_runner(max_workers) as executor:
+        result = main.process_sheet(StageCache(enabled=False), 'mockfile.xlsx', 'Quarter', 4, MOCK_DF,
+                                    str(tmp_path), 'wide', None, None, executor=executor)
+
+    assert result is True
+    for mock in stages.values():
+        mock.assert_called_once()
+    assert stages['generate_data_profiling_report'].call_args.args[1] == 'mockfile'
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_process_sheet_exits_after_failed_validation(tmp_path, stages, max_workers):
+    """Test that no stage after validation runs when validation fails."""
+    stages['validate_data'].return_value = pd.DataFrame()
+    with task_runner(max_workers) as executor:
+        result = main.process_sheet(StageCache(enabled=False), 'mockfile.xlsx', 'Quarter', 4, MOCK_DF,
+                                    str(tmp_path), 'wide', None, None, executor=executor)
+
+    assert result is False
+    for name in ('save_data', 'publish_snapshot', 'generate_data_profiling_report', 'generate_data_consistency_report'):
+        stages[name].assert_not_called()
+
+
+def test_process_sheet_does_not_publish_unsaved_data(tmp_path, stages):
+    """Test that the snapshot is not published when saving fails, even with the reports running concurrently."""
+    stages['save_data'].return_value = ""
+    with task_runner(4) as executor:
+        result = main.process_sheet(StageCache(enabled=False), 'mockfile.xlsx', 'Quarter', 4, MOCK_DF,
+                                    str(tmp_path), 'wide', None, None, executor=executor)
+
+    assert result is False
+    stages['publish_snapshot'].assert_not_called()
+
+
+def test_process_sheet_validates_again_once_its_revisions_table_is_gone(tmp_path, stages, monkeypatch):
+    """Test that a cached validation is reused only while the revisions table it wrote is still there."""
+    monkeypatch.chdir(tmp_path)
+    revisions = tmp_path / 'report' / 'mockfile_revisions.csv'
+
+    def validate(*args, **kwargs):
+        revisions.parent.mkdir(exist_ok=True)
+        revisions.write_text('category,period,old,new,delta\n')
+        return MOCK_DF
+
+    stages['validate_data'].side_effect = validate
+    cache = StageCache(str(tmp_path / 'cache'))
+    for _ in range(2):
+        main.process_sheet(cache, 'mockfile.xlsx', 'Quarter', 4, MOCK_DF, str(tmp_path), 'wide', None, None)
+    revisions.unlink()
+    main.process_sheet(cache, 'mockfile.xlsx', 'Quarter', 4, MOCK_DF, str(tmp_path), 'wide', None, None)
+
+    assert stages['validate_data'].call_count == 2
+    assert revisions.exists()
+
+
+def test_pipeline_stamps_cached_sheets_with_the_run_date(tmp_path, monkeypatch):
+    """Test that sheets reused from the stage cache carry the current run's processed_date."""
+    cached = MOCK_DF.assign(processed_date='2024-07-01 00:00:00', filename='mockfile.xlsx')
+    monkeypatch.setattr(main, 'ingest_excel_files', MagicMock(return_value='mockfile.xlsx'))
+    monkeypatch.setattr(main, 'path_digest', MagicMock(return_value='digest'))
+    monkeypatch.setattr(main.StageCache, 'run', MagicMock(return_value={'Quarter': cached}))
+    process_sheets = MagicMock(return_value=True)
+    monkeypatch.setattr(main, 'process_sheets', process_sheets)
+
+    main._run_pipeline(main.RunMetrics(str(tmp_path)), str(tmp_path), 'wide', None, None, True, {'Quarter': 4})
+
+    frames = process_sheets.call_args.args[2]
+    assert frames['Quarter']['processed_date'].iloc[0] != '2024-07-01 00:00:00'
@@ -1,6 +1,10 @@
+import os
 import pytest
 import pandas as pd
-from energytrend_etl.preprocess_data import process_excel_data
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from energytrend_etl.arrow_handoff import share_frame
+from energytrend_etl.preprocess_data import preprocess_frame, process_excel_data, process_workbook, reshape_to_long
 
 
 # Test Data for DataFrame
@@ -31,7 +35,7 @@ MOCK_DF_DATA_TOO_MANY_MISSING_VALUES = {
 @pytest.fixture
 def mock_read_excel(monkeypatch):
     """Fixture to mock pandas read_excel function with various scenarios."""
-    def mock_read_excel_function(file, sheet_name=None, header=0):
+    def mock_read_excel_function(file, sheet_name=None, header=0, **kwargs):
         if "success" in file:
             return pd.DataFrame(MOCK_DF_DATA_SUCCESS)
         elif "missing_column" in file:
@@ -87,3 +91,110 @@ def test_process_excel_data_max_missing_percentage():
     
     # Verify it returns an empty DataFrame due to too many missing values
     assert result.empty, "DataFrame should be empty if it has too many missing values."
+
+
+def test_preprocess_frame_leaves_parsed_sheet_unchanged():
+    """Test that cleaning shares the parsed sheet's memory without writing into it."""
+    raw_df = pd.DataFrame({'Column1': ['A', 'B', 'C', 'D', 'E'], 'Value 1': [1.0, 2.0, 3.0, 4.0, 5.0],
+                           'Value 2': ['x', None, 'y', 'z', 'w']})
+    expected = raw_df.copy()
+
+    result = preprocess_frame(raw_df, 'mockfile.xlsx', layout=None)
+
+    assert result.loc['B', 'Value_2'] == '', "Blanks should be filled in the processed frame."
+    pd.testing.assert_frame_equal(raw_df, expected)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_process_workbook_processes_every_sheet(tmp_path, monkeypatch, max_workers):
+    """Test that every configured sheet is processed, inline or in worker processes."""
+    (tmp_path / 'data').mkdir()
+    monkeypatch.chdir(tmp_path)
+    with pd.ExcelWriter('./data/mockfile.xlsx') as writer:
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Quarter', index=False)
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Main Table', index=False, startrow=3)
+
+    frames = process_workbook.fn('mockfile.xlsx', {'Quarter': 0, 'Main Table': 3}, max_workers=max_workers)
+
+    assert list(frames) == ['Quarter', 'Main Table']
+    assert frames['Quarter'].index.tolist() == ['A', 'B', 'C', 'D', 'E']
+    pd.testing.assert_frame_equal(frames['Quarter'].drop(columns='processed_date'), 
+                                  frames['Main Table'].drop(columns='processed_date'))
+
+
+def test_process_workbook_processes_small_workbooks_inline(tmp_path, monkeypatch):
+    """Test that workbooks below MIN_POOL_BYTES are processed without spawning worker processes."""
+    (tmp_path / 'data').mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('os.cpu_count', lambda: 4)
+    monkeypatch.setattr('energytrend_etl.preprocess_data.ProcessPoolExecutor', None)
+    with pd.ExcelWriter('./data/mockfile.xlsx') as writer:
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Quarter', index=False)
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Annual', index=False)
+
+    assert list(process_workbook.fn('mockfile.xlsx', {'Quarter': 0, 'Annual': 0})) == ['Quarter', 'Annual']
+
+
+def test_process_workbook_removes_shared_sheets_after_a_failure(tmp_path, monkeypatch):
+    """Test that sheets returned through shared memory are removed when receiving another sheet fails."""
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'shm').mkdir()
+    monkeypatch.chdir(tmp_path)
+    with pd.ExcelWriter('./data/mockfile.xlsx') as writer:
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Quarter', index=False)
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Annual', index=False)
+    # Workers run as threads here, and share every sheet whatever its size
+    monkeypatch.setattr('energytrend_etl.preprocess_data.ProcessPoolExecutor', 
+                        lambda max_workers, **kwargs: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr('energytrend_etl.preprocess_data.share_frame', 
+                        lambda df: share_frame(df, str(tmp_path / 'shm'), min_cells=0))
+    monkeypatch.setattr('energytrend_etl.preprocess_data.receive_frame', mock.Mock(side_effect=OSError('lost')))
+
+    assert process_workbook.fn('mockfile.xlsx', {'Quarter': 0, 'Annual': 0}, max_workers=2) == {}
+    assert os.listdir(tmp_path / 'shm') == []
+
+
+def test_process_workbook_fails_if_any_sheet_fails(tmp_path, monkeypatch):
+    """Test that a failing sheet fails the whole workbook, so partial results are not cached."""
+    (tmp_path / 'data').mkdir()
+    monkeypatch.chdir(tmp_path)
+    with pd.ExcelWriter('./data/mockfile.xlsx') as writer:
+        pd.DataFrame(MOCK_DF_DATA_SUCCESS).to_excel(writer, sheet_name='Quarter', index=False)
+        pd.DataFrame(MOCK_DF_DATA_MISSING_COLUMN).to_excel(writer, sheet_name='Annual', index=False)
+
+    assert process_workbook.fn('mockfile.xlsx', {'Quarter': 0, 'Annual': 0}, max_workers=1) == {}
+
+
+# Test Data for a processed wide DataFrame
+MOCK_WIDE_DF = pd.DataFrame(
+    {
+        '1999__1st_quarter': [1.0, 2.0, 3.0],
+        '1999__2nd_quarter': [4.0, '', 6.0],
+        '2024_1st_quarter_[provisional]': [7.0, 8.0, 9.0],
+        'processed_date': '2024-07-01 00:00:00',
+        'filename': 'mockfile_success.xlsx',
+    },
+    index=['Imports [note 4]', 'Feedstocks', 'Feedstocks'],
+)
+
+
+def test_reshape_to_long_schema():
+    """Test that the long format has one typed row per category and period."""
+    result = reshape_to_long.fn(MOCK_WIDE_DF)
+
+    assert len(result) == 9, "Should have one row per category and period."
+    assert result['value'].dtype == 'float64', "Values should be float64."
+    assert result['year'].dtype == 'Int16' and result['quarter'].dtype == 'Int8'
+    assert isinstance(result['category'].dtype, pd.CategoricalDtype), "Categories should be categorical."
+    assert isinstance(result['filename'].dtype, pd.CategoricalDtype), "Metadata should be categorical."
+
+
+def test_reshape_to_long_values():
+    """Test that periods, blanks, notes and repeated labels are handled."""
+    result = reshape_to_long.fn(MOCK_WIDE_DF)
+
+    assert result['category'].unique().tolist() == ['Imports', 'Feedstocks', 'Feedstocks (2)']
+    assert result['quarter'].tolist()[:3] == [1, 2, 1]
+    assert result['provisional'].tolist()[:3] == [False, False, True]
+    assert pd.isna(result.loc[4, 'value']), "Blank cells should become NaN."
+    assert result.loc[8, 'value'] == 9.0
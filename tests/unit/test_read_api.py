@@ -0,0 +1,126 @@
+import os
+import json
+import pytest
+import threading
+import urllib.error
+import urllib.request
+import pandas as pd
+import pyarrow as pa
+from energytrend_etl.writers import write_csv, write_feather
+from energytrend_etl.read_api import OutputReader, make_server, period_key
+
+
+# Test Data for a processed wide DataFrame
+MOCK_WIDE_DF = pd.DataFrame(
+    {
+        '2019__3rd_quarter': [1.0, 2.0],
+        '2019__4th_quarter': [3.0, 4.0],
+        '2020__1st_quarter': [5.0, ''],
+        'processed_date': '2024-07-01 00:00:00',
+        'filename': 'ET_3.1_JUL_24.xlsx',
+    },
+    index=pd.Index(['Crude oil', 'NGLs [note 3]'], name='Column1'),
+)
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    """Fixture for an output directory holding one release as CSV."""
+    write_csv(MOCK_WIDE_DF, str(tmp_path / 'ET_3.1_JUL_24'))
+    return tmp_path
+
+
+def test_period_key_bounds():
+    """Test that year bounds cover the annual value and every quarter of the year."""
+    assert period_key('2019') == 20190
+    assert period_key('2019', end=True) == 20194
+    assert period_key('2019q3') == 20193
+    with pytest.raises(ValueError):
+        period_key('Q3 2019')
+
+
+def test_query_slices_by_category_and_period(output_dir):
+    """Test that slices select categories and an inclusive period range from a wide output."""
+    reader = OutputReader(str(output_dir))
+
+    df = reader.query('ET_3.1_JUL_24', ['Crude oil', 'NGLs'], start='2019Q4')
+
+    assert df[['category', 'year', 'quarter', 'value']].values.tolist()[:2] == [['Crude oil', 2019, 4, 3.0], ['Crude oil', 2020, 1, 5.0]]
+    assert df['category'].tolist()[2:] == ['NGLs', 'NGLs']
+    assert len(reader.query('ET_3.1_JUL_24', end='2019')) == 4
+    assert reader.query('ET_3.1_JUL_24', ['Unknown']).empty
+
+
+def test_rewritten_output_invalidates_cache(output_dir):
+    """Test that a new version written by the pipeline is served instead of the cached one."""
+    reader = OutputReader(str(output_dir))
+    assert reader.render('ET_3.1_JUL_24', 'json', ['Crude oil'], '2019Q3', '2019Q3') == reader.render(
+        'ET_3.1_JUL_24', 'json', ['Crude oil'], '2019Q3', '2019Q3')
+
+    revised = MOCK_WIDE_DF.copy()
+    revised.loc['Crude oil', '2019__3rd_quarter'] = 1.5
+    write_csv(revised, str(output_dir / 'ET_3.1_JUL_24'))
+    os.utime(output_dir / 'ET_3.1_JUL_24.csv', ns=(1, 1))
+
+    body = reader.render('ET_3.1_JUL_24', 'json', ['Crude oil'], '2019Q3', '2019Q3')
+    assert json.loads(body)[0]['value'] == 1.5
+
+
+def test_dataset_name_resolves_latest_release_and_prefers_arrow(output_dir):
+    """Test that a stable dataset name serves the latest release by date, read from its Arrow output if present."""
+    write_feather(MOCK_WIDE_DF.assign(filename='ET_3.1_OCT_24.xlsx'), str(output_dir / 'ET_3.1_OCT_24'))
+    write_csv(MOCK_WIDE_DF, str(output_dir / 'ET_3.1_OCT_24'))
+    write_csv(MOCK_WIDE_DF, str(output_dir / 'ET_3.1_JAN_24'))
+    # The earlier releases were written last, e.g. by a backfill
+    for name in ('ET_3.1_OCT_24.arrow', 'ET_3.1_OCT_24.csv'):
+        os.utime(output_dir / name, (0, 0))
+    reader = OutputReader(str(output_dir))
+
+    assert reader.resolve('ET_3.1').endswith('ET_3.1_OCT_24.arrow')
+    with pytest.raises(KeyError):
+        reader.resolve('ET_3.2')
+
+
+def test_compressed_csv_outputs_are_served(output_dir):
+    """Test that gzip-compressed CSV outputs are listed and read like plain ones."""
+    write_csv(MOCK_WIDE_DF, str(output_dir / 'ET_3.1_OCT_24'), compression='gzip')
+    reader = OutputReader(str(output_dir))
+
+    assert reader.datasets()['ET_3.1_OCT_24'].endswith('ET_3.1_OCT_24.csv.gz')
+    assert reader.render('ET_3.1_OCT_24', 'json') == reader.render('ET_3.1_JUL_24', 'json')
+
+
+def test_cache_is_bounded_by_size(output_dir):
+    """Test that least recently used outputs are evicted beyond the memory budget."""
+    write_csv(MOCK_WIDE_DF, str(output_dir / 'ET_3.1_OCT_24'))
+    reader = OutputReader(str(output_dir), max_bytes=1)
+
+    reader.query('ET_3.1_JUL_24')
+    reader.query('ET_3.1_OCT_24')
+
+    assert list(reader._cache) == [str(output_dir / 'ET_3.1_OCT_24.csv')]
+
+
+def test_http_api_serves_json_and_arrow(output_dir):
+    """Test the HTTP routes, both response formats and error statuses."""
+    server = make_server(OutputReader(str(output_dir)), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base_url}/datasets") as response:
+            assert json.load(response) == ['ET_3.1_JUL_24']
+
+        with urllib.request.urlopen(f"{base_url}/datasets/ET_3.1?category=Crude%20oil&start=2020") as response:
+            assert json.load(response)[0]['value'] == 5.0
+
+        with urllib.request.urlopen(f"{base_url}/datasets/ET_3.1?format=arrow") as response:
+            assert response.headers['Content-Type'] == 'application/vnd.apache.arrow.stream'
+            assert pa.ipc.open_stream(response.read()).read_all().num_rows == 6
+
+        for path, status in [('/datasets/ET_9', 404), ('/datasets/ET_3.1?start=soon', 400), ('/datasets/ET_3.1?format=xml', 400)]:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{base_url}{path}")
+            assert error.value.code == status
+    finally:
+        server.shutdown()
+        server.server_close()
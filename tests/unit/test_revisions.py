@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import pandas as pd
+from unittest import mock
+from energytrend_etl.validation import validate_data
+from energytrend_etl.revisions import diff_frames, load_snapshot, publish_snapshot
+
+
+# Test Data for two releases of a processed wide DataFrame
+MOCK_PREVIOUS_DF = pd.DataFrame(
+    {
+        '2019__3rd_quarter': [1.0, 2.0, 3.0],
+        '2019__4th_quarter': [4.0, np.nan, 6.0],
+        'processed_date': '2024-04-01 00:00:00',
+        'filename': 'ET_3.1_APR_24.xlsx',
+    },
+    index=['Crude oil', 'Feedstocks', 'Feedstocks'],
+)
+
+MOCK_CURRENT_DF = pd.DataFrame(
+    {
+        '2019__3rd_quarter': [1.0, 2.0, 3.5],
+        '2019__4th_quarter': [4.0, '', 6.0],
+        '2020__1st_quarter': [7.0, 8.0, 9.0],
+        'processed_date': '2024-07-01 00:00:00',
+        'filename': 'ET_3.1_JUL_24.xlsx',
+    },
+    index=['Crude oil', 'Feedstocks', 'Feedstocks'],
+)
+
+
+def test_diff_frames_reports_only_revised_cells():
+    """Test that only changed shared cells are reported, with blanks matching NaN."""
+    revisions = diff_frames(MOCK_PREVIOUS_DF, MOCK_CURRENT_DF)
+
+    assert revisions.to_dict('records') == [
+        {'category': 'Feedstocks (2)', 'period': '2019__3rd_quarter', 'old': 3.0, 'new': 3.5, 'delta': 0.5}
+    ]
+
+
+def test_diff_frames_identical_releases():
+    """Test that identical releases produce an empty revisions table."""
+    revisions = diff_frames(MOCK_CURRENT_DF, MOCK_CURRENT_DF)
+
+    assert revisions.empty
+    assert list(revisions.columns) == ['category', 'period', 'old', 'new', 'delta']
+
+
+def test_validate_data_compares_against_published_snapshot(tmp_path):
+    """Test that validation diffs against the previously published release."""
+    snapshot_dir, report_dir = str(tmp_path / 'snapshots'), str(tmp_path / 'report')
+    publish_snapshot.fn(MOCK_PREVIOUS_DF, 'ET_3.1_APR_24.xlsx', snapshot_dir)
+
+    previous_df = validate_data.fn('ET_3.1_JUL_24.xlsx', MOCK_CURRENT_DF, 'Quarter', 4, snapshot_dir, report_dir)
+
+    assert list(previous_df.columns) == ['2019__3rd_quarter', '2019__4th_quarter']
+    revisions = pd.read_csv(os.path.join(report_dir, 'ET_3.1_JUL_24_revisions.csv'))
+    assert revisions['delta'].tolist() == [0.5]
+
+
+def test_validate_data_matches_dtypes_of_sheets_with_blanks(tmp_path):
+    """Test that a sheet whose blanks the snapshot stores as nulls still matches the snapshot's dtypes."""
+    snapshot_dir, report_dir = str(tmp_path / 'snapshots'), str(tmp_path / 'report')
+    publish_snapshot.fn(MOCK_CURRENT_DF, 'ET_3.1_APR_24.xlsx', snapshot_dir)
+
+    with mock.patch('energytrend_etl.validation.logger') as logger:
+        validate_data.fn('ET_3.1_JUL_24.xlsx', MOCK_CURRENT_DF, 'Quarter', 4, snapshot_dir, report_dir)
+
+    logger.info.assert_any_call("Data types in previous and new data match")
+
+
+def test_publish_snapshot_excludes_metadata(tmp_path):
+    """Test that the published snapshot keeps the typed period block only."""
+    publish_snapshot.fn(MOCK_CURRENT_DF, 'ET_3.1_JUL_24.xlsx', str(tmp_path))
+
+    snapshot = load_snapshot('ET_3.1_OCT_24.xlsx', str(tmp_path))
+    assert list(snapshot.columns) == ['2019__3rd_quarter', '2019__4th_quarter', '2020__1st_quarter']
+    assert snapshot['2019__4th_quarter'].dtype == 'float64'
+
+
+def test_load_snapshot_skips_snapshot_of_same_release(tmp_path):
+    """Test that re-validating a published release still compares it with the release before it."""
+    publish_snapshot.fn(MOCK_PREVIOUS_DF, 'ET_3.1_APR_24.xlsx', str(tmp_path))
+    publish_snapshot.fn(MOCK_CURRENT_DF, 'ET_3.1_JUL_24.xlsx', str(tmp_path))
+
+    snapshot = load_snapshot('ET_3.1_JUL_24.xlsx', str(tmp_path))
+    assert list(snapshot.columns) == ['2019__3rd_quarter', '2019__4th_quarter']
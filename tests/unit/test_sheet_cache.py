@@ -0,0 +1,110 @@
+import os
+import shutil
+import pytest
+import pandas as pd
+from unittest import mock
+from energytrend_etl.sheet_cache import read_excel_cached, read_excel_sheets_cached, sidecar_path
+
+
+# Test Data for the workbook
+MOCK_DF_DATA = {
+    'Column1': ['A', 'B', 'C'],
+    'Value1': [1.0, 2.0, None],
+    'Value2': [4.5, 5.5, 6.5]
+}
+
+SHIPPED_WORKBOOK = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'ET_3.1_JUL_24.xlsx')
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Fixture to write a small workbook with a single sheet."""
+    file_path = str(tmp_path / 'test_file.xlsx')
+    pd.DataFrame(MOCK_DF_DATA).to_excel(file_path, sheet_name='Sheet1', index=False)
+    return file_path
+
+
+@pytest.fixture
+def spy_read_excel(monkeypatch):
+    """Fixture to count calls to pandas read_excel without changing its behaviour."""
+    spy = mock.Mock(side_effect=pd.read_excel)
+    monkeypatch.setattr('energytrend_etl.sheet_cache.pd.read_excel', spy)
+    return spy
+
+
+def test_read_excel_cached_parses_once(workbook, spy_read_excel):
+    """Test that a second read of an unchanged workbook is served from the sidecar."""
+    first = read_excel_cached(workbook, sheet_name='Sheet1', header=0)
+    second = read_excel_cached(workbook, sheet_name='Sheet1', header=0)
+
+    assert spy_read_excel.call_count == 1, "Workbook should only be parsed once."
+    assert os.path.exists(sidecar_path(workbook, 'Sheet1', 0)), "Sidecar should be written next to the workbook."
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_read_excel_cached_reparses_changed_workbook(workbook, spy_read_excel):
+    """Test that changing the workbook bytes invalidates the sidecar."""
+    read_excel_cached(workbook, sheet_name='Sheet1', header=0)
+
+    changed = pd.DataFrame(MOCK_DF_DATA).assign(Value2=[7.0, 8.0, 9.0])
+    changed.to_excel(workbook, sheet_name='Sheet1', index=False)
+    result = read_excel_cached(workbook, sheet_name='Sheet1', header=0)
+
+    assert spy_read_excel.call_count == 2, "Changed workbook should be parsed again."
+    assert result['Value2'].tolist() == [7.0, 8.0, 9.0], "Result should reflect the new workbook contents."
+
+
+def test_read_excel_cached_keys_on_header(workbook, spy_read_excel):
+    """Test that a different header row does not reuse another parse."""
+    read_excel_cached(workbook, sheet_name='Sheet1', header=0)
+    read_excel_cached(workbook, sheet_name='Sheet1', header=1)
+
+    assert spy_read_excel.call_count == 2, "Each header row should have its own cache entry."
+
+
+def test_read_excel_sheets_cached_opens_workbook_once(tmp_path, monkeypatch):
+    """Test that several sheets are parsed from one open workbook, each with its own header row."""
+    file_path = str(tmp_path / 'test_file.xlsx')
+    with pd.ExcelWriter(file_path) as writer:
+        pd.DataFrame(MOCK_DF_DATA).to_excel(writer, sheet_name='Quarter', index=False)
+        pd.DataFrame(MOCK_DF_DATA).to_excel(writer, sheet_name='Main Table', index=False, startrow=2)
+    spy_excel_file = mock.Mock(side_effect=pd.ExcelFile)
+    monkeypatch.setattr('energytrend_etl.sheet_cache.pd.ExcelFile', spy_excel_file)
+
+    frames = read_excel_sheets_cached(file_path, {'Quarter': 0, 'Main Table': 2})
+
+    assert spy_excel_file.call_count == 1, "Workbook should be opened once for all sheets."
+    assert list(frames) == ['Quarter', 'Main Table']
+    pd.testing.assert_frame_equal(frames['Quarter'], frames['Main Table'])
+
+    cached = read_excel_sheets_cached(file_path, {'Quarter': 0, 'Main Table': 2})
+
+    assert spy_excel_file.call_count == 1, "Cached sheets should not reopen the workbook."
+    pd.testing.assert_frame_equal(cached['Main Table'], frames['Main Table'])
+
+
+def test_read_excel_cached_round_trips_the_main_table(tmp_path, spy_read_excel):
+    """Test that the Main Table, whose per cent changes mix floats with '(-) ' placeholders, is cached as parsed."""
+    file_path = str(tmp_path / 'ET_3.1_JUL_24.xlsx')
+    shutil.copy(SHIPPED_WORKBOOK, file_path)
+
+    first = read_excel_cached(file_path, sheet_name='Main Table', header=3)
+    second = read_excel_cached(file_path, sheet_name='Main Table', header=3)
+
+    assert os.path.exists(sidecar_path(file_path, 'Main Table', 3)), "Main Table should be cached."
+    assert spy_read_excel.call_count == 1, "Main Table should only be parsed once."
+    pd.testing.assert_frame_equal(first, second)
+    assert '(-) ' in second['Annual per cent change'].tolist()
+
+
+def test_read_excel_cached_reads_labels_as_text(tmp_path, spy_read_excel):
+    """Test that numeric header cells give the same text labels whether parsed or loaded from the sidecar."""
+    file_path = str(tmp_path / 'test_file.xlsx')
+    pd.DataFrame({'Column1': ['A', 'B'], 2022: [1.0, 2.0], 2023.5: [3.0, 4.0]}).to_excel(file_path, index=False)
+
+    first = read_excel_cached(file_path, sheet_name='Sheet1', header=0)
+    second = read_excel_cached(file_path, sheet_name='Sheet1', header=0)
+
+    assert spy_read_excel.call_count == 1
+    assert first.columns.tolist() == ['Column1', '2022', '2023.5']
+    pd.testing.assert_frame_equal(first, second)
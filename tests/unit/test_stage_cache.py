@@ -0,0 +1,95 @@
+import pandas as pd
+from unittest import mock
+from energytrend_etl.stage_cache import StageCache, frame_digest
+
+
+# Test Data for DataFrame
+MOCK_DF = pd.DataFrame({'Value1': [1.0, 2.0], 'Value2': [3.0, 4.0]}, index=['A', 'B'])
+
+
+def test_stage_cache_reuses_result_for_same_inputs(tmp_path):
+    """Test that a stage only runs once for unchanged inputs, across cache instances."""
+    stage = mock.Mock(return_value=MOCK_DF)
+
+    first = StageCache(str(tmp_path)).run('process', ('digest', 'Quarter', 4), stage, 'file.xlsx')
+    second = StageCache(str(tmp_path)).run('process', ('digest', 'Quarter', 4), stage, 'file.xlsx')
+
+    stage.assert_called_once_with('file.xlsx')
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_stage_cache_reruns_for_changed_inputs(tmp_path):
+    """Test that a changed input digest invalidates the cached result."""
+    cache = StageCache(str(tmp_path))
+    stage = mock.Mock(return_value="saved")
+
+    cache.run('save', ('digest-1',), stage)
+    cache.run('save', ('digest-2',), stage)
+
+    assert stage.call_count == 2
+
+
+def test_stage_cache_does_not_store_failures(tmp_path):
+    """Test that empty failure results are not cached, so the stage is retried on the next run."""
+    cache = StageCache(str(tmp_path))
+    stage = mock.Mock(side_effect=[pd.DataFrame(), MOCK_DF])
+
+    assert cache.run('process', ('digest',), stage).empty
+    assert not cache.run('process', ('digest',), stage).empty
+    assert stage.call_count == 2
+
+
+def test_stage_cache_disabled(tmp_path):
+    """Test that a disabled cache always runs the stage and stores nothing."""
+    cache = StageCache(str(tmp_path / 'cache'), enabled=False)
+    stage = mock.Mock(return_value="saved")
+
+    cache.run('save', ('digest',), stage)
+    cache.run('save', ('digest',), stage)
+
+    assert stage.call_count == 2
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_stage_cache_reruns_stages_whose_outputs_changed(tmp_path):
+    """Test that a stage writing a file is skipped while the file is unchanged, and rerun once it is removed or edited."""
+    cache = StageCache(str(tmp_path / 'cache'))
+    report = tmp_path / 'report.csv'
+
+    def write_report():
+        report.write_text('passed')
+        return str(report)
+    stage = mock.Mock(side_effect=write_report)
+
+    for _ in range(2):
+        assert cache.run('report', ('digest',), stage, outputs=lambda path: [path]) == str(report)
+    assert stage.call_count == 1
+
+    report.unlink()
+    cache.run('report', ('digest',), stage, outputs=lambda path: [path])
+    report.write_text('edited')
+    cache.run('report', ('digest',), stage, outputs=lambda path: [path])
+
+    assert stage.call_count == 3
+    assert report.read_text() == 'passed'
+
+
+def test_stage_cache_always_runs_stages_without_inputs(tmp_path):
+    """Test that stages whose effects the cache cannot check, such as database writes, are never skipped."""
+    cache = StageCache(str(tmp_path / 'cache'))
+    stage = mock.Mock(return_value=3)
+
+    cache.run('save_data_to_warehouse', None, stage)
+    cache.run('save_data_to_warehouse', None, stage)
+
+    assert stage.call_count == 2
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_frame_digest_tracks_content():
+    """Test that frame digests are stable for equal frames and change with any value."""
+    changed = MOCK_DF.copy()
+    changed.loc['B', 'Value2'] = 5.0
+
+    assert frame_digest(MOCK_DF) == frame_digest(MOCK_DF.copy())
+    assert frame_digest(MOCK_DF) != frame_digest(changed)
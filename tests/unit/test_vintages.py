@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from energytrend_etl.preprocess_data import reshape_to_long
+from energytrend_etl.vintages import (
+    as_of, cell_history, connect, list_releases, record_vintage, release_date, save_data_to_vintage_store, value_as_of
+)
+
+
+# Test Data for three releases: APR revises Crude oil 2019 Q3, JUL adds a quarter and drops NGLs
+RELEASES = {
+    '2024-01': pd.DataFrame({'2019__3rd_quarter': [1.0, 2.0], '2019__4th_quarter': [3.0, 4.0]},
+                            index=['Crude oil', 'NGLs [note 3]']),
+    '2024-04': pd.DataFrame({'2019__3rd_quarter': [1.5, 2.0], '2019__4th_quarter': [3.0, 4.0]},
+                            index=['Crude oil', 'NGLs [note 3]']),
+    '2024-07': pd.DataFrame({'2019__3rd_quarter': [1.5], '2019__4th_quarter': [3.0], '2020__1st_quarter': [5.0]},
+                            index=['Crude oil']),
+}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Fixture for a scratch warehouse connection."""
+    conn = connect(str(tmp_path / 'warehouse.sqlite'))
+    yield conn
+    conn.close()
+
+
+def _record(conn, release):
+    return record_vintage(conn, reshape_to_long.fn(RELEASES[release]), 'ET_3.1', release)
+
+
+def test_release_date_from_filename():
+    """Test that release dates are read from the release tag of workbook filenames."""
+    assert release_date('ET_3.1_JUL_24.xlsx') == '2024-07'
+    assert release_date('ET_3.1_OCT_23_Main_Table.xlsx') == '2023-10'
+    assert release_date('test_file.xlsx') is None
+
+
+def test_record_vintage_stores_only_changes(conn):
+    """Test that each release stores only its new, revised and removed cells."""
+    assert [_record(conn, release) for release in RELEASES] == [4, 1, 3]
+
+    releases = list_releases(conn, 'ET_3.1')
+    assert releases['release'].tolist() == list(RELEASES)
+    assert releases['cells'].tolist() == [4, 4, 3]
+
+
+def test_as_of_queries(conn):
+    """Test that values are returned as published in each release."""
+    for release in RELEASES:
+        _record(conn, release)
+
+    assert value_as_of(conn, 'ET_3.1', 'Crude oil', 2019, 3, '2024-01') == 1.0
+    assert value_as_of(conn, 'ET_3.1', 'Crude oil', 2019, 3, '2024-05-15') == 1.5
+    assert value_as_of(conn, 'ET_3.1', 'NGLs', 2019, 3, '2024-04') == 2.0
+    assert value_as_of(conn, 'ET_3.1', 'NGLs', 2019, 3, '2024-07') is None
+    assert value_as_of(conn, 'ET_3.1', 'Crude oil', 2019, 3, '2023-12') is None
+
+    published = as_of(conn, 'ET_3.1', '2024-07')
+    assert published[['category', 'year', 'quarter', 'value']].values.tolist() == [
+        ['Crude oil', 2019, 3, 1.5], ['Crude oil', 2019, 4, 3.0], ['Crude oil', 2020, 1, 5.0]]
+    assert as_of(conn, 'ET_3.1', '2024-01', categories=['NGLs'], start_year=2019, end_year=2019)['value'].tolist() == [2.0, 4.0]
+
+    history = cell_history(conn, 'ET_3.1', 'Crude oil', 2019, 3)
+    assert history['release'].tolist() == ['2024-01', '2024-04']
+
+
+def test_out_of_order_recording_matches_in_order(tmp_path):
+    """Test that recording releases in any order, or twice, gives the same as-of results."""
+    in_order = connect(str(tmp_path / 'in_order.sqlite'))
+    shuffled = connect(str(tmp_path / 'shuffled.sqlite'))
+    for release in RELEASES:
+        _record(in_order, release)
+    for release in ['2024-07', '2024-01', '2024-04', '2024-01']:
+        _record(shuffled, release)
+
+    for release in RELEASES:
+        pd.testing.assert_frame_equal(as_of(in_order, 'ET_3.1', release).drop(columns='release'),
+                                      as_of(shuffled, 'ET_3.1', release).drop(columns='release'))
+    stored = 'SELECT COUNT(*) FROM vintages'
+    assert in_order.execute(stored).fetchone() == shuffled.execute(stored).fetchone()
+    in_order.close()
+    shuffled.close()
+
+
+def test_save_data_to_vintage_store_keeps_blank_cells(tmp_path):
+    """Test that the task derives the dataset and release from the filename and keeps blank cells as missing."""
+    df = pd.DataFrame({'2019__3rd_quarter': [1.0, ''], 'filename': 'ET_3.1_JUL_24.xlsx'}, index=['Crude oil', 'NGLs'])
+    db_path = str(tmp_path / 'warehouse.sqlite')
+
+    assert save_data_to_vintage_store.fn(reshape_to_long.fn(df), 'ET_3.1_JUL_24.xlsx', db_path) == 2
+    assert save_data_to_vintage_store.fn(reshape_to_long.fn(df), 'ET_3.1_JUL_24.xlsx', db_path) == 2
+
+    conn = connect(db_path)
+    published = as_of(conn, 'ET_3.1', '2024-07')
+    conn.close()
+    assert np.isnan(published['value'].iloc[1])
+
+
+def test_save_data_to_vintage_store_dates_untagged_files_by_month(tmp_path):
+    """Test that a file without a release tag is recorded under the current month, like tagged releases."""
+    df = pd.DataFrame({'2019__3rd_quarter': [1.0], 'filename': 'ET_3.1.xlsx'}, index=['Crude oil'])
+    db_path = str(tmp_path / 'warehouse.sqlite')
+
+    save_data_to_vintage_store.fn(reshape_to_long.fn(df), 'ET_3.1.xlsx', db_path)
+
+    conn = connect(db_path)
+    releases = list_releases(conn, 'ET_3.1')
+    conn.close()
+    assert releases['release'].tolist() == [date.today().strftime('%Y-%m')]
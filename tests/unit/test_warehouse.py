@@ -0,0 +1,58 @@
+import pytest
+import pandas as pd
+from energytrend_etl.preprocess_data import reshape_to_long
+from energytrend_etl.warehouse import connect, dataset_name, query_observations, save_data_to_warehouse
+
+
+# Test Data for a processed wide DataFrame
+MOCK_WIDE_DF = pd.DataFrame(
+    {
+        '2019__3rd_quarter': [1.0, 2.0],
+        '2020__1st_quarter': [3.0, ''],
+        'processed_date': '2024-07-01 00:00:00',
+        'filename': 'ET_3.1_JUL_24.xlsx',
+    },
+    index=['Crude oil', 'NGLs [note 3]'],
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture for a scratch warehouse path."""
+    return str(tmp_path / 'warehouse.sqlite')
+
+
+def test_dataset_name_strips_release_suffix():
+    """Test that datasets are named consistently across releases."""
+    assert dataset_name('ET_3.1_JUL_24.xlsx') == 'ET_3.1'
+    assert dataset_name('test_file.xlsx') == 'test_file'
+    assert dataset_name('ET_3.1_JUL_24_Main_Table.xlsx') == 'ET_3.1_Main_Table'
+
+
+def test_save_data_to_warehouse_only_writes_changed_rows(db_path):
+    """Test that re-running with identical data writes nothing and a revision writes one row."""
+    long_df = reshape_to_long.fn(MOCK_WIDE_DF)
+
+    assert save_data_to_warehouse.fn(long_df, 'ET_3.1_JUL_24.xlsx', db_path) == 4
+    assert save_data_to_warehouse.fn(long_df, 'ET_3.1_JUL_24.xlsx', db_path) == 0, "Unchanged rows should not be rewritten."
+
+    revised = long_df.copy()
+    revised.loc[0, 'value'] = 1.5
+    assert save_data_to_warehouse.fn(revised, 'ET_3.1_OCT_24.xlsx', db_path) == 1
+
+    conn = connect(db_path)
+    result = query_observations(conn, dataset='ET_3.1', categories=['Crude oil'])
+    conn.close()
+    assert result['value'].tolist() == [1.5, 3.0]
+
+
+def test_query_observations_filters_year_range(db_path):
+    """Test that queries filter by an inclusive year range and keep missing values."""
+    save_data_to_warehouse.fn(reshape_to_long.fn(MOCK_WIDE_DF), 'ET_3.1_JUL_24.xlsx', db_path)
+
+    conn = connect(db_path)
+    result = query_observations(conn, start_year=2020, end_year=2020)
+    conn.close()
+
+    assert result[['category', 'year', 'quarter']].values.tolist() == [['Crude oil', 2020, 1], ['NGLs', 2020, 1]]
+    assert pd.isna(result.loc[1, 'value'])
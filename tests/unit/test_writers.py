@@ -0,0 +1,116 @@
+import os
+import pytest
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from energytrend_etl.save_to_csv import load_manifest, save_data
+from energytrend_etl.writers import WRITERS, read_output
+from energytrend_etl.preprocess_data import reshape_to_long
+
+
+# Test Data for a processed wide DataFrame with a blank cell
+MOCK_WIDE_DF = pd.DataFrame(
+    {
+        '1999__1st_quarter': [1.0, 2.0],
+        '2000__1st_quarter': [3.0, ''],
+        'processed_date': '2024-07-01 00:00:00',
+        'filename': 'mockfile.xlsx',
+    },
+    index=['Crude oil', 'NGLs'],
+)
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'feather'])
+def test_columnar_writers_round_trip_typed_values(tmp_path, output_format):
+    """Test that columnar formats read back the wide table with blanks as nulls."""
+    path = WRITERS[output_format](MOCK_WIDE_DF, str(tmp_path / 'mockfile'))
+    result = read_output(path)
+
+    assert result.index.tolist() == ['Crude oil', 'NGLs']
+    assert result['2000__1st_quarter'].dtype == 'float64', "Blank cells should not force an object column."
+    assert pd.isna(result.loc['NGLs', '2000__1st_quarter'])
+
+
+def test_columnar_writers_store_placeholders_as_nulls(tmp_path):
+    """Test that columns mixing numbers and placeholder text are written as numbers."""
+    df = MOCK_WIDE_DF.assign(Annual_per_cent_change=[5.5, '(-) '])
+    result = read_output(WRITERS['feather'](df, str(tmp_path / 'mockfile')))
+
+    assert result['Annual_per_cent_change'].dtype == 'float64'
+    assert pd.isna(result.loc['NGLs', 'Annual_per_cent_change'])
+    assert result['filename'].tolist() == ['mockfile.xlsx', 'mockfile.xlsx'], "Text columns should stay text."
+
+
+def test_parquet_writer_partitions_long_format_by_year(tmp_path):
+    """Test that long-format tables are written as a dataset partitioned by year."""
+    long_df = reshape_to_long.fn(MOCK_WIDE_DF)
+    path = WRITERS['parquet'](long_df, str(tmp_path / 'mockfile'))
+
+    assert sorted(os.listdir(path)) == ['year=1999', 'year=2000']
+    result = read_output(path).sort_values(['year', 'category']).reset_index(drop=True)
+    assert result['year'].tolist() == [1999, 1999, 2000, 2000]
+
+
+def test_save_data_writes_requested_formats(tmp_path):
+    """Test that the save stage writes every requested format."""
+    result = save_data.fn(MOCK_WIDE_DF, 'mockfile.xlsx', str(tmp_path), ['csv', 'feather'])
+
+    assert result == 'mockfile'
+    assert sorted(name for name in os.listdir(tmp_path) if not name.startswith('.')) == ['mockfile.arrow', 'mockfile.csv']
+    assert set(load_manifest(str(tmp_path))['mockfile']['files']) == {'csv', 'feather'}
+
+
+@pytest.mark.parametrize('compression, extension', [('gzip', '.csv.gz'), ('zstd', '.csv.zst')])
+def test_csv_writer_compresses_in_chunks(tmp_path, compression, extension):
+    """Test that compressed CSVs written in chunks read back the same as an uncompressed one."""
+    df = pd.concat([MOCK_WIDE_DF] * 5)
+    path = WRITERS['csv'](df, str(tmp_path / 'mockfile'), compression=compression, chunksize=3)
+
+    assert path.endswith(extension)
+    expected = read_output(WRITERS['csv'](df, str(tmp_path / 'plain')))
+    pd.testing.assert_frame_equal(read_output(path), expected)
+    assert sorted(os.listdir(tmp_path)) == sorted(['mockfile' + extension, 'plain.csv']), "No temporary files should remain."
+
+
+def test_save_data_skips_unchanged_content(tmp_path):
+    """Test that saving the same data again leaves the file alone, whatever its metadata, and changed data replaces it."""
+    save_data.fn(MOCK_WIDE_DF, 'mockfile.xlsx', str(tmp_path))
+    csv_path = tmp_path / 'mockfile.csv'
+    os.utime(csv_path, (0, 0))
+
+    save_data.fn(MOCK_WIDE_DF.assign(processed_date='2024-07-02 00:00:00'), 'mockfile.xlsx', str(tmp_path))
+    assert os.path.getmtime(csv_path) == 0, "Unchanged data with a new processing date should not be rewritten."
+
+    save_data.fn(MOCK_WIDE_DF.assign(**{'1999__1st_quarter': [1.0, 5.0]}), 'mockfile.xlsx', str(tmp_path))
+    assert os.path.getmtime(csv_path) != 0
+    assert read_output(str(csv_path))['1999__1st_quarter'].tolist() == [1.0, 5.0]
+
+
+def test_save_data_rewrites_damaged_outputs(tmp_path):
+    """Test that an output truncated or edited since it was saved is written again, even with unchanged data."""
+    save_data.fn(MOCK_WIDE_DF, 'mockfile.xlsx', str(tmp_path))
+    csv_path = tmp_path / 'mockfile.csv'
+    original = csv_path.read_text()
+
+    for damaged in (original[:10], original.replace('1.0', '9.0')):
+        csv_path.write_text(damaged)
+        save_data.fn(MOCK_WIDE_DF, 'mockfile.xlsx', str(tmp_path))
+        assert csv_path.read_text() == original
+
+
+def test_save_data_serializes_concurrent_writers(tmp_path):
+    """Test that flows saving to the same directory at once keep a complete manifest."""
+    frames = {f"file{i}.xlsx": MOCK_WIDE_DF.assign(filename=f"file{i}.xlsx") for i in range(8)}
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda item: save_data.fn(item[1], item[0], str(tmp_path), ['csv', 'feather']),
+                                frames.items()))
+
+    assert results == [f"file{i}" for i in range(8)]
+    assert sorted(load_manifest(str(tmp_path))) == results
+
+
+def test_save_data_rejects_unknown_format(tmp_path):
+    """Test that an unknown format fails the save stage without writing anything."""
+    result = save_data.fn(MOCK_WIDE_DF, 'mockfile.xlsx', str(tmp_path), ['xml'])
+
+    assert result == ""
+    assert os.listdir(tmp_path) == []